@@ -0,0 +1,654 @@
+"""
+Benchmark funkcji klasy Transformacje oraz trybów wiersza poleceń skrypt.py.
+
+Dla każdej liczby punktów generowany jest powtarzalny (stałe ziarno) zbiór
+punktów z obszaru Polski w postaci XYZ, PLH w stopniach dziesiętnych i PLH
+w formacie dd:mm:ss. Mierzony jest czas, liczba punktów na sekundę i szczyt
+zużycia pamięci. Wyniki obliczeń porównywane są zawsze ze wzorcem z repozytorium
+(benchmark_baseline.json, bez czasów - patrz wzorzec_wynikow) - ich zmiana kończy
+program kodem 1. Pomiary można zapisać jako własny wzorzec i porównywać z nim
+kolejne uruchomienia na tym samym komputerze - wtedy kodem 1 kończy się także
+spadek wydajności większy od tolerancji.
+
+Użycie:
+    python benchmark.py [--sizes 1000,100000,1000000] [--save-baseline PLIK]
+                        [--baseline PLIK] [--tolerance 0.25] [--json PLIK] [--no-cli]
+    python benchmark.py --save-reference   (odtworzenie benchmark_baseline.json)
+    python benchmark.py --accuracy      (błędy metod xyz2plh, siatek i odwzorowań odwrotnych)
+"""
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from skrypt import Transformacje, METODY_XYZ2PLH, ZASIEG_SIATKI, siatka_odwzorowania
+
+SKRYPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skrypt.py')
+ZIARNO = 2023
+PORCJA_GENEROWANIA = 1000000
+POWTORZENIA = 3
+MIN_CZAS = 0.2
+MIN_CZAS_POROWNANIA = 0.005
+MAKS_SKALARNYCH = 10000          # funkcje skalarne mierzone są na co najwyżej tylu punktach
+PUNKTY_KONTROLI_ODWROTNEJ = 200000   # kontrola odwzorowań odwrotnych przy każdym pomiarze
+WIERSZE_KONTROLI = 16            # wiersze wyniku zapisywane we wzorcu i porównywane wprost
+SZUM_BEZWZGLEDNY = 1e-8          # dopuszczalna różnica wartości wyniku między platformami:
+SZUM_WZGLEDNY = 1e-13            # SZUM_BEZWZGLEDNY + SZUM_WZGLEDNY * największa wartość kolumny
+WZORZEC = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+ZASIEG_POLSKI = {'phi': (49.0, 54.9), 'lam': (14.1, 24.2), 'h': (0.0, 500.0)}
+STACJA = (3664945.620, 1409150.120, 5009524.552)
+
+
+def generuj_plh(n, ziarno = ZIARNO):
+    '''
+    Generator powtarzalnych porcji punktów (phi, lam, h) z obszaru Polski -
+    tablic (k,3) o co najwyżej PORCJA_GENEROWANIA wierszach.
+    '''
+    rng = np.random.default_rng(ziarno)
+    for start in range(0, n, PORCJA_GENEROWANIA):
+        k = min(PORCJA_GENEROWANIA, n - start)
+        yield np.column_stack([rng.uniform(*ZASIEG_POLSKI['phi'], k),
+                               rng.uniform(*ZASIEG_POLSKI['lam'], k),
+                               rng.uniform(*ZASIEG_POLSKI['h'], k)])
+
+
+def _dms(deg):
+    '''Tablica stopni dziesiętnych (dodatnich) -> lista napisów dd:mm:ss.sssss.'''
+    d = np.floor(deg)
+    m = np.floor((deg - d) * 60)
+    s = (deg - d - m / 60) * 3600
+    return ['%02d:%02d:%.5f' % w for w in zip(d.astype(int).tolist(), m.astype(int).tolist(), s.tolist())]
+
+
+def zapisz_dane(katalog, n):
+    '''
+    Zapisuje pliki wejściowe dla n punktów: xyz.txt, plh.txt, dms.txt, xyz_id.txt
+    (identyfikator, x, y, z, epoka), pl2000.txt (x, y w układzie 2000 na GRS-80, h;
+    wszystkie z jedną linią nagłówka) oraz xyz.npy, plh.npy i xyz_rek.npy
+    (tablica rekordów id, x, y, z, epoka).
+
+    Returns
+    -------
+    DICT
+        rodzaj danych -> ścieżka pliku
+    '''
+    wgs = Transformacje(model = 'wgs84')
+    grs = Transformacje(model = 'grs80')
+    sciezki = {nazwa: os.path.join(katalog, f'{nazwa}_{n}.{rozsz}') for nazwa, rozsz in
+               [('xyz', 'txt'), ('plh', 'txt'), ('dms', 'txt'), ('xyz_id', 'txt'), ('pl2000', 'txt'),
+                ('xyz_npy', 'npy'), ('plh_npy', 'npy'), ('xyz_rek', 'npy')]}
+    xyz_npy = np.lib.format.open_memmap(sciezki['xyz_npy'], mode = 'w+', dtype = '<f8', shape = (n, 3))
+    plh_npy = np.lib.format.open_memmap(sciezki['plh_npy'], mode = 'w+', dtype = '<f8', shape = (n, 3))
+    xyz_rek = np.lib.format.open_memmap(sciezki['xyz_rek'], mode = 'w+', shape = (n,),
+                                        dtype = [('id', 'U12'), ('x', '<f8'), ('y', '<f8'), ('z', '<f8'), ('epoka', '<f8')])
+    with open(sciezki['xyz'], 'w') as f_xyz, open(sciezki['plh'], 'w') as f_plh, open(sciezki['dms'], 'w') as f_dms, \
+         open(sciezki['xyz_id'], 'w') as f_id, open(sciezki['pl2000'], 'w') as f_pl:
+        f_xyz.write('x[m], y[m], z[m]\n')
+        f_plh.write('phi[deg], lam[deg], h[m]\n')
+        f_dms.write('phi[dms], lam[dms], h[m]\n')
+        f_id.write('id, x[m], y[m], z[m], epoka\n')
+        f_pl.write('x[m], y[m], h[m]\n')
+        start = 0
+        for plh in generuj_plh(n):
+            xyz = wgs.plh2xyz_batch(*plh.T)
+            xyz_npy[start:start + len(plh)] = xyz
+            plh_npy[start:start + len(plh)] = plh
+            numery = np.arange(start, start + len(plh))
+            rekordy = xyz_rek[start:start + len(plh)]
+            rekordy['id'] = np.char.add('P', numery.astype(str))
+            rekordy['x'], rekordy['y'], rekordy['z'] = xyz.T
+            rekordy['epoka'] = 2020 + numery % 1000 / 1000
+            start += len(plh)
+            f_xyz.write(('%.3f,%.3f,%.3f\n' * len(xyz)) % tuple(xyz.ravel().tolist()))
+            pola = [v for wiersz in zip(numery.tolist(), *xyz.T.tolist(), rekordy['epoka'].tolist()) for v in wiersz]
+            f_id.write(('P%d,%.3f,%.3f,%.3f,%.3f\n' * len(xyz)) % tuple(pola))
+            f_plh.write(('%.9f,%.9f,%.3f\n' * len(plh)) % tuple(plh.ravel().tolist()))
+            pl2000 = np.column_stack(grs.pl22000_batch(plh[:, 0], plh[:, 1]) + (plh[:, 2],))
+            f_pl.write(('%.3f,%.3f,%.3f\n' * len(plh)) % tuple(pl2000.ravel().tolist()))
+            f_dms.write(''.join(f'{p},{l},{h:.3f}\n' for p, l, h in zip(_dms(plh[:, 0]), _dms(plh[:, 1]), plh[:, 2].tolist())))
+    xyz_npy.flush()
+    plh_npy.flush()
+    xyz_rek.flush()
+    return sciezki
+
+
+def _zmierz(funkcja):
+    '''
+    Zwraca (wynik, czas [s], szczyt pamięci [MB]). Czas to najlepszy z co najmniej
+    POWTORZENIA przebiegów, powtarzanych aż łącznie trwają MIN_CZAS sekund;
+    pamięć mierzona jest w osobnym przebiegu (tracemalloc spowalnia obliczenia).
+    '''
+    czas = float('inf')
+    lacznie = 0.0
+    powtorzenia = 0
+    while powtorzenia < POWTORZENIA or lacznie < MIN_CZAS:
+        t0 = time.perf_counter()
+        wynik = funkcja()
+        dt = time.perf_counter() - t0
+        czas = min(czas, dt)
+        lacznie += dt
+        powtorzenia += 1
+    del wynik
+    tracemalloc.start()
+    wynik = funkcja()
+    _, szczyt = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return wynik, czas, szczyt / 2**20
+
+
+def _kontrola(wynik):
+    '''Suma kontrolna wyniku funkcji (patrz _kontrola_tablicy).'''
+    return _kontrola_tablicy(np.column_stack(wynik) if isinstance(wynik, tuple) else wynik)
+
+
+def _kontrola_tablicy(tablica, rozdzielczosc = None):
+    '''
+    Suma kontrolna tablicy wyników (wiersz = punkt), porównywana ze wzorcem:
+    liczba wierszy, WIERSZE_KONTROLI wierszy rozłożonych równomiernie (różnica
+    bezwzględna) oraz dokładne (math.fsum) sumy kolumn z losowymi wagami
+    z [0.5, 1.5) dla kolejnych wierszy.
+    Sumy ważone zmienia błąd w dowolnym wierszu, zmiana kolejności wierszy
+    i błędy, które w średniej kolumny znosiłyby się nawzajem. rozdzielczosc -
+    krok zapisu kolumn pliku tekstowego (np. 0.001 dla %.3f), domyślnie 0.
+    '''
+    tablica = np.asarray(tablica, dtype = float)
+    tablica = tablica.reshape(len(tablica), -1)
+    n = len(tablica)
+    rozdzielczosc = [0.0] * tablica.shape[1] if rozdzielczosc is None else list(rozdzielczosc)
+    if not n:
+        return {'wiersze': 0, 'probka': [], 'sumy': [], 'rozdzielczosc': rozdzielczosc}
+    wagi = np.random.default_rng(ZIARNO).uniform(0.5, 1.5, n)
+    indeksy = np.unique(np.linspace(0, n - 1, WIERSZE_KONTROLI).astype(int))
+    return {'wiersze': n, 'probka': tablica[indeksy].tolist(),
+            'sumy': [math.fsum(wagi * tablica[:, j]) for j in range(tablica.shape[1])],
+            'rozdzielczosc': rozdzielczosc}
+
+
+def _roznica_kontroli(kontrola, wzor):
+    '''
+    Opis różnicy sum kontrolnych albo None. Dopuszczalna różnica wartości
+    kolumny (szum) to SZUM_BEZWZGLEDNY + SZUM_WZGLEDNY razy największa wartość
+    kolumny w próbce wzorca - ok. 1e-8 stopnia (1 mm) dla phi, lam i 0.5 mikrometra
+    dla x, y, z. Wiersze próbki muszą się zgadzać co do szumu, a sumy ważone -
+    co do szumu razy pierwiastek z liczby wierszy (różnice ostatnich bitów
+    sumują się jak błędy losowe). Dla plików tekstowych dochodzi krok zapisu
+    (inne zaokrąglenie pojedynczej wartości na innej platformie).
+    '''
+    if kontrola['wiersze'] != wzor['wiersze']:
+        return f"{kontrola['wiersze']} rows, baseline {wzor['wiersze']}"
+    probka, probka_wzoru = np.array(kontrola['probka'], dtype = float), np.array(wzor['probka'], dtype = float)
+    if probka.shape != probka_wzoru.shape:
+        return f"result shape {probka.shape}, baseline {probka_wzoru.shape}"
+    if not probka.size:
+        return None
+    if not np.array_equal(np.isnan(probka), np.isnan(probka_wzoru)):
+        return "sampled rows differ in NaN positions"
+    with np.errstate(invalid = 'ignore'):
+        skala = np.nanmax(np.abs(probka_wzoru), axis = 0, initial = 0.0)
+    szum = SZUM_BEZWZGLEDNY + SZUM_WZGLEDNY * skala
+    krok = np.array(wzor.get('rozdzielczosc') or [0.0] * len(szum), dtype = float)
+    roznica = np.nan_to_num(np.abs(probka - probka_wzoru))
+    if (roznica > szum + krok).any():
+        return f"sampled rows differ by up to {roznica.max():.3g}"
+    roznica_sum = np.nan_to_num(np.abs(np.array(kontrola['sumy']) - np.array(wzor['sumy'])))
+    if (roznica_sum > szum * math.sqrt(kontrola['wiersze']) + 1.5 * krok).any():
+        return f"weighted column sums differ by up to {roznica_sum.max():.3g}"
+    return None
+
+
+def zadania_funkcji(xyz, plh):
+    '''
+    Lista (nazwa, funkcja, liczba punktów) dla wszystkich funkcji klasy Transformacje -
+    wersji wsadowych na całym zbiorze i skalarnych na jego początku.
+    '''
+    wgs = Transformacje(model = 'wgs84')
+    grs = Transformacje(model = 'grs80')
+    xyz_s = xyz[:MAKS_SKALARNYCH].tolist()
+    plh_s = plh[:MAKS_SKALARNYCH].tolist()
+    x92, y92 = grs.pl21992_batch(plh[:, 0], plh[:, 1])
+    x00, y00 = grs.pl22000_batch(plh[:, 0], plh[:, 1])
+    pl_s = list(zip(x92[:MAKS_SKALARNYCH].tolist(), y92.tolist(), x00.tolist(), y00.tolist()))
+    return [
+        ('xyz2plh_batch', lambda: wgs.xyz2plh_batch(xyz), len(xyz)),
+        ('xyz2plh_batch warm', lambda: wgs.xyz2plh_batch(xyz, metoda = 'warm'), len(xyz)),
+        ('xyz2plh_batch bowring', lambda: wgs.xyz2plh_batch(xyz, metoda = 'bowring'), len(xyz)),
+        ('xyz2plh_batch vermeille', lambda: wgs.xyz2plh_batch(xyz, metoda = 'vermeille'), len(xyz)),
+        ('plh2xyz_batch', lambda: wgs.plh2xyz_batch(*plh.T), len(plh)),
+        ('pl21992_batch', lambda: grs.pl21992_batch(plh[:, 0], plh[:, 1]), len(plh)),
+        ('pl22000_batch', lambda: grs.pl22000_batch(plh[:, 0], plh[:, 1]), len(plh)),
+        ('pl21992_batch grid', lambda: grs.pl21992_batch(plh[:, 0], plh[:, 1], metoda = 'grid'), len(plh)),
+        ('pl22000_batch grid', lambda: grs.pl22000_batch(plh[:, 0], plh[:, 1], metoda = 'grid'), len(plh)),
+        ('pl19922plh_batch', lambda: grs.pl19922plh_batch(x92, y92), len(plh)),
+        ('pl20002plh_batch', lambda: grs.pl20002plh_batch(x00, y00), len(plh)),
+        ('xyz2neu_batch', lambda: wgs.xyz2neu_batch(xyz, *STACJA), len(xyz)),
+        ('xyzGRS2KRA_batch', lambda: grs.xyzGRS2KRA_batch(xyz), len(xyz)),
+        ('xyzKRA2GRS_batch', lambda: grs.xyzKRA2GRS_batch(xyz), len(xyz)),
+        ('xyz2plh', lambda: [wgs.xyz2plh(*p) for p in xyz_s], len(xyz_s)),
+        ('plh2xyz', lambda: [wgs.plh2xyz(*p) for p in plh_s], len(plh_s)),
+        ('pl21992', lambda: [grs.pl21992(p[0], p[1]) for p in plh_s], len(plh_s)),
+        ('pl22000', lambda: [grs.pl22000(p[0], p[1]) for p in plh_s], len(plh_s)),
+        ('pl19922plh', lambda: [grs.pl19922plh(p[0], p[1]) for p in pl_s], len(pl_s)),
+        ('pl20002plh', lambda: [grs.pl20002plh(p[2], p[3]) for p in pl_s], len(pl_s)),
+        ('xyz2neu', lambda: [wgs.xyz2neu(*p, *STACJA) for p in xyz_s], len(xyz_s)),
+        ('xyzGRS2KRA', lambda: [grs.xyzGRS2KRA(*p) for p in xyz_s], len(xyz_s)),
+        ('xyzKRA2GRS', lambda: [grs.xyzKRA2GRS(*p) for p in xyz_s], len(xyz_s)),
+    ]
+
+
+def dokladnosc_xyz2plh(n = 1000000, ziarno = ZIARNO):
+    '''
+    Błąd maksymalny metod xyz2plh_batch dla punktów rozłożonych równomiernie na
+    całej elipsoidzie GRS-80, przy |h| <= 10 km i przy h <= 1000 km. Punkty
+    (phi, lam, h) przeliczane są przez plh2xyz_batch i z powrotem; błąd szerokości
+    wyrażony jest w milimetrach na powierzchni, osobno podawany jest błąd wysokości
+    dla |phi| <= 89.9 stopnia i w otoczeniu biegunów.
+
+    Returns
+    -------
+    DICT
+        'metoda@h_max' -> {'phi_mm', 'h_mm', 'h_bieguny_mm'}
+    '''
+    rng = np.random.default_rng(ziarno)
+    grs = Transformacje(model = 'grs80')
+    wyniki = {}
+    for h_min, h_max in ((-1e4, 1e4), (-1e3, 1e6)):
+        phi = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+        phi[:3] = [0.0, 89.9999999, -89.9999999]
+        lam = rng.uniform(-180, 180, n)
+        h = rng.uniform(h_min, h_max, n)
+        xyz = grs.plh2xyz_batch(phi, lam, h)
+        bieguny = np.abs(phi) > 89.9
+        for metoda in METODY_XYZ2PLH:
+            phi_m, _, h_m = grs.xyz2plh_batch(xyz, metoda = metoda)
+            blad_h = np.abs(h_m - h) * 1000
+            wyniki[f'{metoda}@{h_max:.0f}'] = {
+                'phi_mm': float((np.abs(np.radians(phi_m - phi)) * (grs.a + np.abs(h))).max() * 1000),
+                'h_mm': float(blad_h[~bieguny].max()), 'h_bieguny_mm': float(blad_h[bieguny].max())}
+            print(f"{metoda:10s} h <= {h_max:9.0f} m   phi {wyniki[f'{metoda}@{h_max:.0f}']['phi_mm']:.1e} mm"
+                  f"   h {wyniki[f'{metoda}@{h_max:.0f}']['h_mm']:.1e} mm"
+                  f"   h (|phi| > 89.9) {wyniki[f'{metoda}@{h_max:.0f}']['h_bieguny_mm']:.1e} mm")
+    return wyniki
+
+
+def dokladnosc_siatki(n = 4000000, ziarno = ZIARNO, dokladnosci = (0.01, 0.001)):
+    '''
+    Błąd maksymalny odwzorowań 1992 i 2000 przez siatkę (metoda 'grid') względem
+    wzorów ścisłych, dla n losowych punktów obszaru siatki i każdej elipsoidy.
+
+    Returns
+    -------
+    DICT
+        'uklad model@dokladnosc' -> {'krok', 'blad_mm', 'blad_budowy_mm', 'ok'}
+    '''
+    rng = np.random.default_rng(ziarno)
+    phi = rng.uniform(ZASIEG_SIATKI[0], ZASIEG_SIATKI[1], n)
+    lam = rng.uniform(ZASIEG_SIATKI[2], ZASIEG_SIATKI[3], n)
+    lam[:4] = [16.5, 19.5, 22.5, ZASIEG_SIATKI[2]]      # granice stref układu 2000
+    wyniki = {}
+    for model in ('wgs84', 'grs80', 'krasowski'):
+        elip = Transformacje(model = model)
+        for uklad, odwzoruj in (('pl1992', elip.pl21992_batch), ('pl2000', elip.pl22000_batch)):
+            x, y = odwzoruj(phi, lam)
+            for dokladnosc in dokladnosci:
+                xs, ys = odwzoruj(phi, lam, metoda = 'grid', dokladnosc = dokladnosc)
+                blad = max(np.abs(xs - x).max(), np.abs(ys - y).max())
+                siatka = siatka_odwzorowania(model, uklad, dokladnosc)
+                wyniki[f'{uklad} {model}@{dokladnosc:g}'] = {
+                    'krok': siatka.krok, 'blad_mm': float(blad * 1000),
+                    'blad_budowy_mm': siatka.blad_maks * 1000, 'ok': bool(blad <= dokladnosc)}
+                print(f"{uklad} {model:10s} dopuszczalny {dokladnosc * 1000:6.1f} mm   krok {siatka.krok:.4f} deg"
+                      f"   błąd {blad * 1000:.4f} mm (przy budowie {siatka.blad_maks * 1000:.4f} mm)"
+                      f"{'' if blad <= dokladnosc else '   PRZEKROCZONY'}")
+    return wyniki
+
+
+def dokladnosc_odwzorowania_odwrotnego(n = 2000000, ziarno = ZIARNO, dopuszczalny = 0.00001):
+    '''
+    Błąd maksymalny odwzorowań odwrotnych pl19922plh_batch i pl20002plh_batch:
+    n losowych punktów z obszaru Polski (z zapasem 1 stopnia długości na krańcach
+    układu 1992) odwzorowanych wzorami ścisłymi i przeliczonych z powrotem, dla każdej
+    elipsoidy. Błąd w milimetrach na powierzchni, wydajność w mln punktów na sekundę;
+    dopuszczalny błąd w metrach (domyślnie 0.01 mm). Wykonywany przy każdym pomiarze
+    (PUNKTY_KONTROLI_ODWROTNEJ punktów) - przekroczenie kończy benchmark kodem 1.
+
+    Returns
+    -------
+    DICT
+        'uklad model' -> {'blad_mm', 'mpkt_na_s', 'ok'}
+    '''
+    rng = np.random.default_rng(ziarno)
+    phi = rng.uniform(*ZASIEG_POLSKI['phi'], n)
+    lam = rng.uniform(ZASIEG_POLSKI['lam'][0] - 1, ZASIEG_POLSKI['lam'][1] + 1, n)
+    wyniki = {}
+    for model in ('wgs84', 'grs80', 'krasowski'):
+        elip = Transformacje(model = model)
+        for uklad, odwzoruj, odwrotne in (('pl1992', elip.pl21992_batch, elip.pl19922plh_batch),
+                                          ('pl2000', elip.pl22000_batch, elip.pl20002plh_batch)):
+            x, y = odwzoruj(phi, lam)
+            t0 = time.perf_counter()
+            phi_o, lam_o = odwrotne(x, y)
+            czas = time.perf_counter() - t0
+            blad = np.hypot(np.radians(phi_o - phi) * elip.a,
+                            np.radians(lam_o - lam) * elip.a * np.cos(np.radians(phi))).max() * 1000
+            wyniki[f'{uklad} {model}'] = {'blad_mm': float(blad), 'mpkt_na_s': n / czas / 1e6,
+                                          'ok': bool(blad <= dopuszczalny * 1000)}
+            print(f"{uklad} {model:10s} odwrotne   błąd {blad:.5f} mm   {n / czas / 1e6:6.2f} mln pkt/s"
+                  f"{'' if blad <= dopuszczalny * 1000 else '   PRZEKROCZONY'}")
+    return wyniki
+
+
+def zadania_cli(sciezki):
+    '''
+    Lista (nazwa, argumenty, dane na standardowe wejście, plik wynikowy) dla trybów skrypt.py.
+    '''
+    xyz, plh, dms = sciezki['xyz'], sciezki['plh'], sciezki['dms']
+    x0, y0, z0 = [str(c) for c in STACJA]
+    return [
+        ('cli xyz2plh', ['--xyz2plh', '--header_lines', '1', '--model', 'wgs84', xyz], None, 'result_xyz2plh.txt'),
+        ('cli xyz2plh --dms', ['--xyz2plh', '--header_lines', '1', '--model', 'wgs84', '--dms', xyz], None, 'result_xyz2plh.txt'),
+        ('cli plh2xyz', ['--plh2xyz', '--header_lines', '1', '--model', 'wgs84', plh], 'dec_degrees\n', 'result_plh2xyz.txt'),
+        ('cli plh2xyz dms', ['--plh2xyz', '--header_lines', '1', '--model', 'wgs84', dms], 'dms\n', 'result_plh2xyz.txt'),
+        ('cli pl21992', ['--pl21992', '--header_lines', '1', '--model', 'grs80', plh], 'dec_degrees\n', 'result_pl21992.txt'),
+        ('cli pl22000', ['--pl22000', '--header_lines', '1', '--model', 'grs80', plh], 'dec_degrees\n', 'result_pl22000.txt'),
+        ('cli pl22000 dms', ['--pl22000', '--header_lines', '1', '--model', 'grs80', dms], 'dms\n', 'result_pl22000.txt'),
+        ('cli pl20002plh', ['--pl20002plh', '--header_lines', '1', '--model', 'grs80', sciezki['pl2000']], None,
+         'result_pl20002plh.txt'),
+        ('cli pl22000 krasowski', ['--pl22000', '--header_lines', '1', '--model', 'krasowski', plh], 'dec_degrees\n', 'result_pl22000.txt'),
+        ('cli xyz2neu', ['--xyz2neu', '--header_lines', '1', '--model', 'wgs84', x0, y0, z0, xyz], None, 'result_xyz2neu.txt'),
+        ('cli xyzGRS2KRA', ['--xyzGRS2KRA', '--header_lines', '1', xyz], None, 'result_xyzGRS2KRA.txt'),
+        ('cli xyzKRA2GRS', ['--xyzKRA2GRS', '--header_lines', '1', xyz], None, 'result_xyzKRA2GRS.txt'),
+        ('cli xyz2plh npy', ['--xyz2plh', '--model', 'wgs84', '--in-format', 'npy', '--out-format', 'npy',
+                             sciezki['xyz_npy']], None, 'result_xyz2plh.npy'),
+        ('cli xyz2plh passthrough', ['--xyz2plh', '--header_lines', '1', '--model', 'wgs84',
+                                      '--passthrough', '1:1', sciezki['xyz_id']], None, 'result_xyz2plh.txt'),
+        ('cli xyz2plh npy records', ['--xyz2plh', '--model', 'wgs84', '--in-format', 'npy', '--out-format', 'npy',
+                                     sciezki['xyz_rek']], None, 'result_xyz2plh.npy'),
+        ('cli xyz2plh+pl21992+pl22000', ['--xyz2plh', '--pl21992', '--pl22000', '--header_lines', '1',
+                                         '--model', 'grs80', '--one-file', xyz], None,
+         'result_xyz2plh_pl21992_pl22000.txt'),
+    ]
+
+
+CZESC_DOPISYWANA = 0.01         # tryb przyrostowy: dopisywana część pliku
+
+
+def przyrost_cli(sciezki, katalog):
+    '''
+    Tryb przyrostowy (--incremental): pełne przeliczenie pliku XYZ (niemierzone),
+    dopisanie CZESC_DOPISYWANA jego linii i pomiar uruchomienia przeliczającego
+    tylko dopisane linie.
+
+    Returns
+    -------
+    TUPLE
+        (liczba dopisanych punktów, czas [s], szczyt RSS [MB], kontrola)
+    '''
+    wejscie = os.path.join(katalog, 'przyrost_xyz.txt')
+    wynik = os.path.join(katalog, 'przyrost_wynik.txt')
+    shutil.copyfile(sciezki['xyz'], wejscie)
+    argumenty = ['--xyz2plh', '--header_lines', '1', '--model', 'wgs84', '--incremental', '--output', wynik, wejscie]
+    try:
+        uruchom_cli(argumenty, None, katalog)
+        with open(sciezki['xyz']) as f:
+            next(f)
+            linie = f.readlines()
+        dopisane = linie[:max(1, int(len(linie) * CZESC_DOPISYWANA))]
+        with open(wejscie, 'a') as f:
+            f.writelines(dopisane)
+        czas, rss = uruchom_cli(argumenty, None, katalog)
+        with open(wynik + '.checkpoint.json') as f:
+            if json.load(f)['mode'] != 'append':
+                raise RuntimeError('--incremental did not reuse the checkpoint')
+        return len(dopisane), czas, rss, _kontrola_pliku(wynik)
+    finally:
+        for sciezka in (wejscie, wynik, wynik + '.checkpoint.json'):
+            if os.path.exists(sciezka):
+                os.remove(sciezka)
+
+
+# uruchamia skrypt.py i na końcu wypisuje na stderr szczyt RSS własnego procesu;
+# ru_maxrss procesu potomnego w systemie Linux obejmuje pamięć rodzica z chwili fork,
+# dlatego odczytywane jest VmHWM z /proc/self/status (liczone od exec)
+_URUCHAMIACZ = '''
+import resource, runpy, sys
+sys.argv = sys.argv[1:]
+try:
+    runpy.run_path(sys.argv[0], run_name = "__main__")
+finally:
+    try:
+        with open("/proc/self/status") as f:
+            rss = [int(l.split()[1]) for l in f if l.startswith("VmHWM:")][0] / 1024
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == "darwin" else 1024)
+    sys.stderr.write("\\nPEAK_RSS_MB=%f\\n" % rss)
+'''
+
+
+def uruchom_cli(argumenty, wejscie, katalog):
+    '''
+    Uruchamia skrypt.py w osobnym procesie i zwraca (czas [s], szczyt RSS [MB]).
+    Szczyt RSS nie jest dostępny w systemie Windows - wtedy None.
+    '''
+    t0 = time.perf_counter()
+    proces = subprocess.run([sys.executable, '-c', _URUCHAMIACZ, SKRYPT] + argumenty, cwd = katalog,
+                            input = (wejscie or '').encode(), stdout = subprocess.DEVNULL, stderr = subprocess.PIPE)
+    czas = time.perf_counter() - t0
+    bledy = proces.stderr.decode()
+    if proces.returncode:
+        raise RuntimeError(f"skrypt.py {' '.join(argumenty)} failed:\n{bledy}")
+    rss = None
+    if 'PEAK_RSS_MB=' in bledy and sys.platform != 'win32':
+        rss = float(bledy.rsplit('PEAK_RSS_MB=', 1)[1])
+    return czas, rss
+
+
+# pojedyncze przeliczenie każdą funkcją skalarną - typowe wywołanie narzędzi polowych
+_ZIMNY_START = '''
+from skrypt import Transformacje, METODY_XYZ2PLH
+t = Transformacje(model = "grs80")
+t.xyz2plh(3664940.500, 1409153.590, 5009571.170)
+t.plh2xyz(52.097272, 21.031533, 141.399)
+t.pl21992(52.097272, 21.031533)
+t.pl22000(52.097272, 21.031533)
+'''
+
+
+def zimny_start(powtorzenia = 5):
+    '''
+    Mierzy czas uruchomienia nowego interpretera: import modułu skrypt
+    (python -X importtime, czas łączny z importowanymi modułami) oraz import
+    z pojedynczym przeliczeniem funkcjami skalarnymi. Zapisywany jest najlepszy
+    z kilku przebiegów; pierwszy przebieg tworzy plik .pyc, więc nie jest liczony.
+
+    Returns
+    -------
+    DICT
+        'nazwa@1' -> {czas, punkty_na_s, pamiec_mb, kontrola, numpy}, gdzie numpy
+        mówi, czy NumPy został zaimportowany
+    '''
+    katalog = os.path.dirname(SKRYPT)
+    srodowisko = {k: v for k, v in os.environ.items() if k != 'PYTHONDONTWRITEBYTECODE'}
+    wyniki = {}
+    for nazwa, kod in (('cold import', 'import skrypt'), ('cold scalar', _ZIMNY_START)):
+        czas = czas_importu = float('inf')
+        for i in range(powtorzenia + 1):
+            proces = subprocess.run([sys.executable, '-X', 'importtime', '-c', kod + '\nimport sys\n'
+                                     'print("numpy" in sys.modules)'],
+                                    cwd = katalog, env = srodowisko, capture_output = True, text = True)
+            if proces.returncode:
+                raise RuntimeError(f"cold start '{nazwa}' failed:\n{proces.stderr}")
+            import_us = [int(l.split('|')[1]) for l in proces.stderr.splitlines() if l.rstrip().endswith('| skrypt')]
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, '-c', kod], cwd = katalog, env = srodowisko, check = True)
+            dt = time.perf_counter() - t0
+            if i:
+                czas = min(czas, dt)
+                czas_importu = min(czas_importu, import_us[0] / 1e6)
+        wyniki[f'{nazwa}@1'] = {'punkty': 1, 'czas': czas, 'punkty_na_s': 1 / czas, 'pamiec_mb': None,
+                                'kontrola': None, 'import_s': czas_importu,
+                                'numpy': proces.stdout.strip() == 'True'}
+        _wypisz(nazwa, 1, wyniki[f'{nazwa}@1'])
+        print(f"{'':28s} import skrypt: {czas_importu * 1000:.1f} ms, NumPy imported: {wyniki[f'{nazwa}@1']['numpy']}")
+    return wyniki
+
+
+def _kontrola_pliku(sciezka):
+    '''Suma kontrolna kolumn liczbowych pliku wynikowego (patrz _kontrola_tablicy).'''
+    if sciezka.endswith('.npy'):
+        wynik = np.load(sciezka, mmap_mode = 'r')
+        if wynik.dtype.names is not None:
+            return _kontrola_tablicy(np.column_stack([wynik[nazwa] for nazwa in wynik.dtype.names
+                                                      if wynik[nazwa].dtype.kind == 'f']))
+        return _kontrola_tablicy(wynik)
+    with open(sciezka) as f:
+        next(f)
+        pierwsza = next(f, '')
+    if ':' in pierwsza:
+        return None
+    # kolumny tekstowe (np. przenoszone identyfikatory) są pomijane
+    liczbowe = []
+    rozdzielczosc = []
+    for i, pole in enumerate(pierwsza.strip().split(',')):
+        try:
+            float(pole)
+        except ValueError:
+            continue
+        liczbowe.append(i)
+        rozdzielczosc.append(10.0 ** -len(pole.partition('.')[2]) if '.' in pole and 'e' not in pole.lower() else 0.0)
+    return _kontrola_tablicy(np.loadtxt(sciezka, delimiter = ',', skiprows = 1, usecols = liczbowe, ndmin = 2),
+                             rozdzielczosc)
+
+
+def benchmark(rozmiary, katalog, cli = True):
+    '''
+    Wykonuje pomiary dla kolejnych liczb punktów.
+
+    Returns
+    -------
+    DICT
+        'nazwa@liczba_punktow' -> {czas, punkty_na_s, pamiec_mb, kontrola}
+    '''
+    wyniki = zimny_start()
+    for n in rozmiary:
+        sciezki = zapisz_dane(katalog, n)
+        xyz = np.load(sciezki['xyz_npy'])
+        plh = np.load(sciezki['plh_npy'])
+        for nazwa, funkcja, liczba in zadania_funkcji(xyz, plh):
+            wynik, czas, pamiec = _zmierz(funkcja)
+            wyniki[f'{nazwa}@{n}'] = {'punkty': liczba, 'czas': czas, 'punkty_na_s': liczba / czas,
+                                     'pamiec_mb': pamiec, 'kontrola': _kontrola(wynik)}
+            _wypisz(nazwa, n, wyniki[f'{nazwa}@{n}'])
+        del xyz, plh
+        if cli:
+            for nazwa, argumenty, wejscie, plik in zadania_cli(sciezki):
+                czas, rss = uruchom_cli(argumenty, wejscie, katalog)
+                wyniki[f'{nazwa}@{n}'] = {'punkty': n, 'czas': czas, 'punkty_na_s': n / czas, 'pamiec_mb': rss,
+                                         'kontrola': _kontrola_pliku(os.path.join(katalog, plik))}
+                _wypisz(nazwa, n, wyniki[f'{nazwa}@{n}'])
+            dopisane, czas, rss, kontrola = przyrost_cli(sciezki, katalog)
+            wyniki[f'cli xyz2plh --incremental@{n}'] = {'punkty': dopisane, 'czas': czas,
+                                                        'punkty_na_s': dopisane / czas, 'pamiec_mb': rss,
+                                                        'kontrola': kontrola}
+            _wypisz('cli xyz2plh --incremental', n, wyniki[f'cli xyz2plh --incremental@{n}'])
+        for sciezka in sciezki.values():
+            os.remove(sciezka)
+    return wyniki
+
+
+def _wypisz(nazwa, n, pomiar):
+    pamiec = '-' if pomiar['pamiec_mb'] is None else f"{pomiar['pamiec_mb']:10.1f}"
+    print(f"{nazwa:28s} {n:>11d} {pomiar['czas']:10.4f} s {pomiar['punkty_na_s']:14.0f} pkt/s {pamiec:>10s} MB")
+
+
+def wzorzec_wynikow(wyniki):
+    '''
+    Część pomiarów niezależna od komputera, zapisywana w benchmark_baseline.json:
+    kontrole wyników (_kontrola_tablicy) i informacja o imporcie NumPy przy starcie.
+    Czasy, wydajność i zużycie pamięci trafiają tylko do wzorca z --save-baseline.
+    '''
+    wzorzec = {}
+    for klucz, pomiar in wyniki.items():
+        wpis = {pole: pomiar[pole] for pole in ('kontrola', 'numpy') if pomiar.get(pole) is not None}
+        if wpis:
+            wzorzec[klucz] = wpis
+    return wzorzec
+
+
+def porownaj(wyniki, wzorzec, tolerancja, wydajnosc = True):
+    '''
+    Porównuje pomiary ze wzorcem. Zwraca listę opisów regresji: zmian wyników
+    (_roznica_kontroli), importu NumPy przy starcie oraz - z wydajnosc -
+    spadków wydajności większych niż tolerancja (część wzorca). Pomiary
+    krótsze niż MIN_CZAS_POROWNANIA są zbyt zaszumione, by porównywać ich wydajność,
+    a wzorzec bez czasów (wzorzec_wynikow) - wydajności nie zawiera.
+    '''
+    regresje = []
+    for klucz, pomiar in wyniki.items():
+        if klucz not in wzorzec:
+            continue
+        wzor = wzorzec[klucz]
+        if (wydajnosc and wzor.get('czas', 0) >= MIN_CZAS_POROWNANIA
+                and pomiar['punkty_na_s'] < wzor['punkty_na_s'] * (1 - tolerancja)):
+            regresje.append(f"{klucz}: {pomiar['punkty_na_s']:.0f} pkt/s, baseline {wzor['punkty_na_s']:.0f} pkt/s")
+        if pomiar.get('numpy') and wzor.get('numpy') is False:
+            regresje.append(f"{klucz}: NumPy is imported at startup")
+        if pomiar['kontrola'] is not None and isinstance(wzor.get('kontrola'), dict):
+            opis = _roznica_kontroli(pomiar['kontrola'], wzor['kontrola'])
+            if opis:
+                regresje.append(f"{klucz}: results changed - {opis}")
+    return regresje
+
+
+def _wartosc_flagi(flaga, domyslna = None):
+    if flaga not in sys.argv:
+        return domyslna
+    return sys.argv[sys.argv.index(flaga) + 1]
+
+
+if __name__ == "__main__":
+    if '--accuracy' in sys.argv:
+        dokladnosc_xyz2plh()
+        siatki = dokladnosc_siatki()
+        odwrotne = dokladnosc_odwzorowania_odwrotnego()
+        sys.exit(0 if all(w['ok'] for w in list(siatki.values()) + list(odwrotne.values())) else 1)
+    rozmiary = [int(float(n)) for n in _wartosc_flagi('--sizes', '1000,100000,1000000').split(',')]
+    tolerancja = float(_wartosc_flagi('--tolerance', 0.25))
+    katalog = tempfile.mkdtemp(prefix = 'benchmark_')
+    try:
+        print(f"{'funkcja':28s} {'punkty':>11s} {'czas':>12s} {'wydajność':>20s} {'pamięć':>13s}")
+        wyniki = benchmark(rozmiary, katalog, cli = '--no-cli' not in sys.argv)
+    finally:
+        shutil.rmtree(katalog, ignore_errors = True)
+
+    if '--json' in sys.argv:
+        with open(_wartosc_flagi('--json'), 'w') as f:
+            json.dump(wyniki, f, indent = 1)
+    if '--save-baseline' in sys.argv:
+        with open(_wartosc_flagi('--save-baseline'), 'w') as f:
+            json.dump(wyniki, f, indent = 1)
+    if '--save-reference' in sys.argv:
+        with open(WZORZEC, 'w') as f:
+            json.dump(wzorzec_wynikow(wyniki), f, indent = 1)
+    # przeliczenie tam i z powrotem przez układy 1992 i 2000 sprawdzane jest zawsze, także bez wzorca
+    print()
+    regresje = [f"{nazwa}: inverse projection round-trip error {w['blad_mm']:.5f} mm"
+                for nazwa, w in dokladnosc_odwzorowania_odwrotnego(n = PUNKTY_KONTROLI_ODWROTNEJ).items() if not w['ok']]
+    # wyniki porównywane są zawsze z wzorcem z repozytorium (benchmark_baseline.json), a wydajność -
+    # tylko ze wzorcem podanym przez --baseline, bo zależy od komputera
+    sciezka_wzorca = _wartosc_flagi('--baseline', WZORZEC)
+    if os.path.exists(sciezka_wzorca):
+        with open(sciezka_wzorca) as f:
+            regresje += porownaj(wyniki, json.load(f), tolerancja, wydajnosc = '--baseline' in sys.argv)
+    if regresje:
+        print('\nREGRESSIONS:')
+        for opis in regresje:
+            print('  ' + opis)
+        sys.exit(1)
+    if os.path.exists(sciezka_wzorca):
+        print(f'\nNo regressions against baseline {sciezka_wzorca}.')
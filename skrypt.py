@@ -1,9 +1,553 @@
-from math import sin, cos, sqrt, atan, atan2, degrees, radians, tan
+from math import sin, cos, sqrt, atan, atan2, degrees, radians, tan, copysign, floor
+import importlib
+import io
+import os
 import sys
-import numpy as np
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import lru_cache
+from itertools import islice
 
 o = object()
 
+
+class _LeniwyModul:
+    """
+    Moduł importowany dopiero przy pierwszym odwołaniu do jego atrybutu.
+    Import zastępuje następnie obiekt w przestrzeni nazw modułu, więc kolejne
+    odwołania (np.sin, np.array...) trafiają wprost do zaimportowanego modułu.
+    Dzięki temu funkcje skalarne działające na module math nie płacą za import NumPy.
+    """
+    def __init__(self, nazwa, alias):
+        self._nazwa = nazwa
+        self._alias = alias
+
+    def __getattr__(self, atrybut):
+        modul = importlib.import_module(self._nazwa)
+        globals()[self._alias] = modul
+        return getattr(modul, atrybut)
+
+
+np = _LeniwyModul('numpy', 'np')
+asyncio = _LeniwyModul('asyncio', 'asyncio')
+json = _LeniwyModul('json', 'json')
+
+
+# rejestr elipsoid: nazwa -> (a, b, układ odniesienia); WGS84 i GRS80 traktowane są jako ten sam układ
+_ELIPSOIDY = {'wgs84': (6378137.0, 6356752.31424518, 'grs80'),
+              'grs80': (6378137.0, 6356752.31414036, 'grs80'),
+              'krasowski': (6378245.0, 6356863.019, 'krasowski')}
+# rejestr transformacji między układami odniesienia: (z, do) -> (macierz M, wektor t, macierz odwrotna);
+# x_do = M x_z + t, a przejście odwrotne to x_z = M_odw (x_do - t) (bez M_odw - odwrotność M)
+_TRANSFORMACJE_DATUM = {}
+SEKUNDA = 1 / 206264.80624709636       # [rad] - sekunda łuku
+
+
+def _macierz_malych_katow(C):
+    """
+    Macierz I + C * 1e-6 (C w jednostkach 1e-6) jako krotka krotek.
+    """
+    return tuple(tuple(float(i == j) + C[i][j] * 10**(-6) for j in range(3)) for i in range(3))
+
+
+def zarejestruj_elipsoide(nazwa, a, b = None, odwrotnosc_splaszczenia = None, datum = None):
+    """
+    Dodaje elipsoidę do rejestru - odtąd nazwa może być modelem Transformacje,
+    LancuchTransformacji i flagi --model. Zarejestrowanej elipsoidy nie można
+    zmienić (ponowna rejestracja z innymi parametrami kończy się błędem).
+
+    Parameters
+    ----------
+    nazwa : STR
+        nazwa modelu (bez rozróżniania wielkości liter)
+    a : FLOAT
+        [m] - duża półoś
+    b : FLOAT - optional
+        [m] - mała półoś
+    odwrotnosc_splaszczenia : FLOAT - optional
+        1/f, gdy nie podano b
+    datum : STR - optional
+        nazwa układu odniesienia, domyślnie nazwa elipsoidy
+    """
+    nazwa = nazwa.lower()
+    if (b is None) == (odwrotnosc_splaszczenia is None):
+        raise ValueError(f'{nazwa} - exactly one of b and inverse flattening must be given')
+    if b is None:
+        b = a * (1 - 1 / odwrotnosc_splaszczenia)
+    parametry = (float(a), float(b), (datum or nazwa).lower())
+    if not 0 < parametry[1] <= parametry[0]:
+        raise ValueError(f'{nazwa} - semi-axes must satisfy 0 < b <= a')
+    if _ELIPSOIDY.setdefault(nazwa, parametry) != parametry:
+        raise ValueError(f'{nazwa} - ellipsoid already registered with different parameters')
+
+
+def zarejestruj_transformacje(z, do, T, macierz = None, macierz_odwrotna = None,
+                              rotacje = None, skala = 0.0, konwencja = 'position_vector'):
+    """
+    Dodaje do rejestru transformację współrzędnych geocentrycznych między dwoma
+    układami odniesienia: pełną macierzą lub 7 parametrami Helmerta. Przejście
+    odwrotne rejestrowane jest automatycznie, a transformacje między układami
+    bez bezpośredniego połączenia składane są przez transformacja_datum.
+
+    Parameters
+    ----------
+    z, do : STR
+        nazwy układów odniesienia (datum elipsoid w rejestrze)
+    T : LIST
+        [m] - wektor przesunięcia tx, ty, tz
+    macierz : LIST - optional
+        macierz 3x3 M: x_do = M x_z + T
+    macierz_odwrotna : LIST - optional
+        macierz przejścia odwrotnego: x_z = M_odw (x_do - T); domyślnie odwrotność M
+    rotacje : LIST - optional
+        ["] - obroty rx, ry, rz transformacji 7-parametrowej (zamiast macierzy)
+    skala : FLOAT - optional, default 0
+        [ppm] - zmiana skali transformacji 7-parametrowej
+    konwencja : STR - optional, default position_vector
+        znak obrotów: position_vector albo coordinate_frame
+    """
+    z, do = z.lower(), do.lower()
+    if (macierz is None) == (rotacje is None):
+        raise ValueError(f'{z} -> {do} - either a matrix or three rotations must be given')
+    if rotacje is not None:
+        if konwencja not in ('position_vector', 'coordinate_frame'):
+            raise NotImplementedError(f'{konwencja} - rotation convention not recognized')
+        rx, ry, rz = [r * SEKUNDA * (1 if konwencja == 'position_vector' else -1) for r in rotacje]
+        m = 1 + skala * 10**(-6)
+        macierz = ((m, -m * rz, m * ry), (m * rz, m, -m * rx), (-m * ry, m * rx, m))
+    wpis = (tuple(tuple(float(v) for v in wiersz) for wiersz in macierz), tuple(float(v) for v in T),
+            None if macierz_odwrotna is None else tuple(tuple(float(v) for v in w) for w in macierz_odwrotna))
+    if len(wpis[0]) != 3 or any(len(w) != 3 for w in wpis[0]) or len(wpis[1]) != 3:
+        raise ValueError(f'{z} -> {do} - expected a 3x3 matrix and a 3-element translation')
+    if z == do:
+        raise ValueError(f'{z} -> {do} - source and target datum are the same')
+    if (do, z) in _TRANSFORMACJE_DATUM:
+        raise ValueError(f'{z} -> {do} - transformation already registered in the opposite direction')
+    if _TRANSFORMACJE_DATUM.setdefault((z, do), wpis) != wpis:
+        raise ValueError(f'{z} -> {do} - transformation already registered with different parameters')
+    transformacja_datum.cache_clear()     # nowe połączenie może skrócić dotychczasowe łańcuchy
+
+
+def wczytaj_rejestr(sciezka):
+    """
+    Rejestruje elipsoidy i transformacje z pliku JSON:
+        {"ellipsoids": {"bessel": {"a": 6377397.155, "rf": 299.1528128, "datum": "dhdn"}},
+         "transformations": [{"from": "dhdn", "to": "grs80", "T": [...], "rotations": [...],
+                              "scale": ..., "convention": "coordinate_frame"},
+                             {"from": ..., "to": ..., "T": [...], "matrix": [[...]], "inverse_matrix": [[...]]}]}
+    Obroty podawane są w sekundach łuku, skala w ppm.
+    """
+    with open(sciezka) as f:
+        rejestr = json.load(f)
+    try:
+        for nazwa, p in rejestr.get('ellipsoids', {}).items():
+            zarejestruj_elipsoide(nazwa, p['a'], p.get('b'), p.get('rf'), p.get('datum'))
+        for p in rejestr.get('transformations', []):
+            zarejestruj_transformacje(p['from'], p['to'], p['T'], p.get('matrix'), p.get('inverse_matrix'),
+                                      p.get('rotations'), p.get('scale', 0.0), p.get('convention', 'position_vector'))
+    except (KeyError, TypeError) as e:
+        raise ValueError(f'{sciezka} - invalid registry entry: {e!r}')
+
+
+class TransformacjaDatum:
+    """
+    Transformacja afiniczna współrzędnych geocentrycznych x_do = M x_z + t
+    między dwoma układami odniesienia - pojedyncza z rejestru albo złożenie
+    kilku (droga - kolejne układy). Niezmienna: macierz i wektor są tablicami
+    tylko do odczytu, a nowe instancje tworzy transformacja_datum.
+    """
+    __slots__ = ('droga', 'M', 't')
+
+    def __init__(self, droga, M, t):
+        M = np.array(M, dtype = float)
+        t = np.array(t, dtype = float)
+        M.flags.writeable = False
+        t.flags.writeable = False
+        for nazwa, wartosc in (('droga', tuple(droga)), ('M', M), ('t', t)):
+            object.__setattr__(self, nazwa, wartosc)
+
+    def __setattr__(self, nazwa, wartosc):
+        raise AttributeError('TransformacjaDatum instances are immutable')
+
+    def __repr__(self):
+        return f"TransformacjaDatum({' -> '.join(self.droga)})"
+
+    def po(self, nastepna):
+        """
+        Złożenie: najpierw ta transformacja, potem nastepna.
+        """
+        return TransformacjaDatum(self.droga + nastepna.droga[1:], nastepna.M @ self.M,
+                                  nastepna.M @ self.t + nastepna.t)
+
+    def przelicz(self, xyz, out = None):
+        """
+        Przelicza tablicę (N,3) współrzędnych geocentrycznych (lub Punkty) jednym
+        mnożeniem macierzowym i dodaniem wektora; out może być tablicą xyz.
+        """
+        if isinstance(xyz, Punkty):
+            return xyz.z_wynikiem(self.przelicz(xyz.wsp, out), ('x', 'y', 'z'))
+        xyz = np.asarray(xyz, dtype = float)
+        out = np.matmul(xyz, self.M.T, out = out)
+        out += self.t
+        return out
+
+
+def _krok_datum(z, do):
+    """
+    Pojedyncza transformacja z rejestru (w kierunku zapisanym albo odwrotnym).
+    """
+    if (z, do) in _TRANSFORMACJE_DATUM:
+        M, t, _ = _TRANSFORMACJE_DATUM[(z, do)]
+        return TransformacjaDatum((z, do), M, t)
+    M, t, M_odw = _TRANSFORMACJE_DATUM[(do, z)]
+    M_odw = np.linalg.inv(M) if M_odw is None else np.array(M_odw)
+    return TransformacjaDatum((z, do), M_odw, -(M_odw @ np.array(t)))
+
+
+@lru_cache(maxsize = None)
+def transformacja_datum(z, do):
+    """
+    Transformacja między dowolnymi układami odniesienia z rejestru - najkrótsza
+    droga w grafie zarejestrowanych transformacji (przeszukiwanie wszerz),
+    złożona w jedną macierz i wektor. Wynik jest zapamiętywany dla pary układów.
+
+    Parameters
+    ----------
+    z, do : STR
+        nazwy układów odniesienia (np. 'grs80', 'krasowski')
+
+    Returns
+    -------
+    TransformacjaDatum
+    """
+    sasiedzi = {}
+    for a, b in _TRANSFORMACJE_DATUM:
+        sasiedzi.setdefault(a, []).append(b)
+        sasiedzi.setdefault(b, []).append(a)
+    poprzedni = {z: None}
+    kolejka = [z]
+    for uklad in kolejka:
+        if uklad == do:
+            break
+        for sasiad in sasiedzi.get(uklad, ()):
+            if sasiad not in poprzedni:
+                poprzedni[sasiad] = uklad
+                kolejka.append(sasiad)
+    if do not in poprzedni:
+        raise ValueError(f'no datum transformation from {z} to {do} in the registry')
+    droga = [do]
+    while poprzedni[droga[-1]] is not None:
+        droga.append(poprzedni[droga[-1]])
+    droga.reverse()
+    if len(droga) == 1:
+        return TransformacjaDatum(droga, np.eye(3), np.zeros(3))
+    wynik = _krok_datum(droga[0], droga[1])
+    for a, b in zip(droga[1:], droga[2:]):
+        wynik = wynik.po(_krok_datum(a, b))
+    return wynik
+
+
+@lru_cache(maxsize = None)
+def elipsoida(model):
+    """
+    Obiekt Transformacje elipsoidy z rejestru, tworzony raz dla każdego modelu -
+    ze wszystkimi stałymi pochodnymi (spłaszczenie, mimośród, stałe
+    odwzorowania Gaussa-Krugera). Obiekty Transformacje są niezmienne, więc
+    mogą być współdzielone.
+    """
+    return Transformacje(model = model)
+
+
+def _datum(model):
+    """
+    Układ odniesienia elipsoidy z rejestru.
+    """
+    if model not in _ELIPSOIDY:
+        raise NotImplementedError(f'{model} - reference ellipsoid  model not recognized.')
+    return _ELIPSOIDY[model][2]
+
+
+def _elipsoida_odwzorowan(model):
+    """
+    Elipsoida, na której liczone są współrzędne 1992 i 2000 dla danych z elipsoidy model:
+    ona sama, jeśli leży w układzie GRS-80, w przeciwnym razie GRS-80.
+    """
+    return model if _datum(model) == _datum('grs80') else 'grs80'
+
+
+zarejestruj_transformacje('grs80', 'krasowski', (-33.4297, 146.5746, 76.2865),
+                          macierz = _macierz_malych_katow([[0.84076440, 4.08960694, 0.25613907],
+                                                          [-4.08960650, 0.84076292, -1.73888787],
+                                                          [-0.25614618, 1.73888628, 0.84077125]]),
+                          macierz_odwrotna = _macierz_malych_katow([[-0.84078048, -4.08959962, -0.25614575],
+                                                                   [4.08960007, -0.84078196, 1.73888389],
+                                                                   [0.25613864, -1.73888494, -0.84077363]]))
+if os.environ.get('SKRYPT_REGISTRY'):
+    # rejestr z flagi --registry trafia przez zmienną środowiskową także do procesów roboczych
+    wczytaj_rejestr(os.environ['SKRYPT_REGISTRY'])
+
+
+def _kolumny(X, Y = None, Z = None):
+    """
+    Sprowadza dane wejściowe metod wsadowych do trzech tablic 1-D typu float64.
+    Akceptowana jest tablica (N,3) albo trzy tablice 1-D o tej samej długości.
+    """
+    if Y is None and Z is None:
+        xyz = np.asarray(X, dtype = float)
+        if xyz.ndim != 2 or xyz.shape[1] != 3:
+            raise ValueError(f"expected (N,3) array, got shape {xyz.shape}")
+        return xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    if Y is None or Z is None:
+        raise ValueError("either an (N,3) array or three 1-D arrays must be given")
+    return (np.asarray(X, dtype = float).ravel(),
+            np.asarray(Y, dtype = float).ravel(),
+            np.asarray(Z, dtype = float).ravel())
+
+
+def deg2dms_batch(deg):
+    """
+    Zamienia tablicę stopni dziesiętnych na stopnie, minuty i sekundy.
+    Wszystkie trzy składowe mają znak kąta, tak jak w Transformacje.deg2dms,
+    więc deg = d + m/60 + s/3600 także dla kątów ujemnych.
+
+    Parameters
+    ----------
+    deg : ARRAY
+        stopnie dziesiętne
+
+    Returns
+    -------
+    d, m : ARRAY
+        stopnie i minuty (liczby całkowite zapisane jako float64)
+    s : ARRAY
+        sekundy
+    """
+    deg = np.asarray(deg, dtype = float)
+    d = np.trunc(deg)
+    m = np.trunc(60 * (deg - d))
+    s = (deg - d - m/60) * 3600
+    return d, m, s
+
+
+def dms2deg(d, m, s):
+    """
+    Zamienia tablice stopni, minut i sekund na stopnie dziesiętne.
+    Znak kąta określa pole stopni (także '-0' dla kątów z przedziału (-1, 0)),
+    minuty i sekundy są traktowane jako wartości bezwzględne.
+
+    Parameters
+    ----------
+    d, m, s : ARRAY
+        stopnie, minuty, sekundy
+
+    Returns
+    -------
+    ARRAY
+        stopnie dziesiętne
+    """
+    d = np.asarray(d, dtype = float)
+    wartosc = np.abs(d) + np.abs(m)/60 + np.abs(s)/3600
+    return np.where(np.signbit(d), -wartosc, wartosc)
+
+
+def dms_tekst(deg, miejsca = 2):
+    """
+    Wersja formatuj_dms dla pojedynczego kąta (bez NumPy).
+    """
+    a = abs(deg)
+    d = int(a)
+    m = int(60 * (a - d))
+    s = (a - d - m/60) * 3600
+    if s >= 60 - 0.5 * 10**-miejsca:
+        s = 0.0
+        m += 1
+    if m >= 60:
+        m = 0
+        d += 1
+    znak = '-' if copysign(1.0, deg) < 0 else ''
+    return f"{znak}{d:02d}:{m:02d}:{s:.{miejsca}f}"
+
+
+def formatuj_dms(deg, miejsca = 2):
+    """
+    Formatuje tablicę stopni dziesiętnych jako napisy [-]dd:mm:ss.ss.
+    Sekundy zaokrąglone w górę do 60 przenoszone są do minut (i dalej do stopni).
+
+    Parameters
+    ----------
+    deg : ARRAY
+        stopnie dziesiętne
+    miejsca : INT - optional, default 2
+        liczba miejsc po przecinku sekund
+
+    Returns
+    -------
+    ARRAY
+        tablica napisów
+    """
+    deg = np.asarray(deg, dtype = float).ravel()
+    if not deg.size:
+        return np.array([], dtype = str)
+    d, m, s = deg2dms_batch(np.abs(deg))
+    przeniesienie = s >= 60 - 0.5 * 10**-miejsca
+    s[przeniesienie] = 0.0
+    m[przeniesienie] += 1
+    pelna = m >= 60
+    m[pelna] = 0.0
+    d[pelna] += 1
+    znak = np.where(np.signbit(deg), '-', '').tolist()
+    pola = [v for wiersz in zip(znak, d.astype(int).tolist(), m.astype(int).tolist(), s.tolist())
+            for v in wiersz]
+    tekst = (f'%s%02d:%02d:%.{miejsca}f\n' * deg.size) % tuple(pola)
+    return np.array(tekst.split('\n')[:-1])
+
+
+def _plh_dms(phi, lam, h):
+    """
+    Tablice napisów phi, lam [dd:mm:ss.ss] i h [m, 3 miejsca] - wynik
+    w stopniach, minutach, sekundach.
+    """
+    with _etap('dms'):
+        h = np.asarray(h, dtype = float).ravel()
+        h_str = np.array((('%.3f\n' * h.size) % tuple(h.tolist())).split('\n')[:-1])
+        return formatuj_dms(phi), formatuj_dms(lam), h_str
+
+
+class Punkty:
+    """
+    Zwarty zbiór punktów: tablica (N,k) współrzędnych i tablica strukturalna (N,)
+    atrybutów (identyfikatory, epoki, kody...), które metody wsadowe Transformacje
+    przenoszą do wyniku bez zmian. Wynik współdzieli tablicę atrybutów z danymi
+    wejściowymi - atrybuty nie są kopiowane ani zamieniane na obiekty Pythona.
+
+    Parameters
+    ----------
+    wsp : ARRAY
+        tablica (N,k) współrzędnych
+    atrybuty : ARRAY lub DICT - optional
+        tablica strukturalna (N,) albo słownik nazwa -> tablica (N,)
+    kolumny : TUPLE - optional, default ('x', 'y', 'z')
+        nazwy kolejnych kolumn wsp
+    """
+    __slots__ = ('wsp', 'atrybuty', 'kolumny')
+
+    def __init__(self, wsp, atrybuty = None, kolumny = ('x', 'y', 'z')):
+        wsp = np.asarray(wsp)
+        if wsp.ndim != 2 or wsp.shape[1] != len(kolumny):
+            raise ValueError(f"expected (N,{len(kolumny)}) array, got shape {wsp.shape}")
+        if atrybuty is None:
+            atrybuty = np.empty(len(wsp), dtype = [])
+        elif isinstance(atrybuty, dict):
+            pola = {nazwa: np.asarray(wartosci) for nazwa, wartosci in atrybuty.items()}
+            atrybuty = np.empty(len(wsp), dtype = [(nazwa, w.dtype) for nazwa, w in pola.items()])
+            for nazwa, w in pola.items():
+                atrybuty[nazwa] = w
+        elif atrybuty.dtype.names is None:
+            raise ValueError("attributes must be a structured array or a dict of arrays")
+        if len(atrybuty) != len(wsp):
+            raise ValueError(f"expected {len(wsp)} attribute records, got {len(atrybuty)}")
+        self.wsp = wsp
+        self.atrybuty = atrybuty
+        self.kolumny = tuple(kolumny)
+
+    @classmethod
+    def z_rekordow(cls, rekordy, kolumny = ('x', 'y', 'z')):
+        '''
+        Tworzy zbiór punktów z tablicy strukturalnej (np. pliku .npy mapowanego
+        w pamięci): pola kolumny stają się współrzędnymi, pozostałe - atrybutami
+        (bez kopiowania).
+        '''
+        nazwy = rekordy.dtype.names or ()
+        brak = [k for k in kolumny if k not in nazwy]
+        if brak:
+            raise ValueError(f"record array has no field(s) {', '.join(brak)}")
+        wsp = np.empty((len(rekordy), len(kolumny)))
+        for j, k in enumerate(kolumny):
+            wsp[:, j] = rekordy[k]
+        pozostale = [n for n in nazwy if n not in kolumny]
+        return cls(wsp, rekordy[pozostale] if pozostale else None, kolumny)
+
+    @staticmethod
+    def typ_rekordow(atrybuty, kolumny, typ = '<f8'):
+        '''
+        Typ tablicy strukturalnej z polami atrybutów (typ atrybuty) i kolumnami
+        współrzędnych typu typ.
+        '''
+        nazwy = atrybuty.names or ()
+        wspolne = set(nazwy) & set(kolumny)
+        if wspolne:
+            raise ValueError(f"attribute field(s) {', '.join(sorted(wspolne))} clash with coordinate columns")
+        return np.dtype([(n, atrybuty.fields[n][0]) for n in nazwy] + [(k, typ) for k in kolumny])
+
+    def rekordy(self, out = None):
+        '''
+        Atrybuty i współrzędne jako jedna tablica strukturalna (N,) - wpisywane
+        pole po polu do out (np. mapowanego pliku .npy) lub do nowej tablicy.
+        '''
+        if out is None:
+            out = np.empty(len(self), dtype = self.typ_rekordow(self.atrybuty.dtype, self.kolumny, self.wsp.dtype))
+        for nazwa in self.atrybuty.dtype.names:
+            out[nazwa] = self.atrybuty[nazwa]
+        for j, k in enumerate(self.kolumny):
+            out[k] = self.wsp[:, j]
+        return out
+
+    def z_wynikiem(self, wsp, kolumny):
+        '''
+        Zbiór punktów o współrzędnych wsp (wynik przeliczenia) i tych samych atrybutach.
+        '''
+        return Punkty(wsp, self.atrybuty, kolumny)
+
+    def __len__(self):
+        return len(self.wsp)
+
+    def __getitem__(self, klucz):
+        # nazwa - kolumna współrzędnych lub pole atrybutów; indeks, wycinek, maska - podzbiór punktów
+        if isinstance(klucz, str):
+            if klucz in self.kolumny:
+                return self.wsp[:, self.kolumny.index(klucz)]
+            return self.atrybuty[klucz]
+        if isinstance(klucz, (int, np.integer)):
+            klucz = [klucz]
+        return Punkty(self.wsp[klucz], self.atrybuty[klucz], self.kolumny)
+
+    def __repr__(self):
+        return f'Punkty(n={len(self)}, kolumny={self.kolumny}, atrybuty={self.atrybuty.dtype.names})'
+
+
+METODY_XYZ2PLH = ('hirvonen', 'warm', 'bowring', 'vermeille')
+TOLERANCJA_HIRVONENA = 0.000001/206265   # [rad] - 1e-6 sekundy łuku
+METODY_ODWZOROWANIA = ('exact', 'grid')
+DOKLADNOSC_SIATKI = 0.01                 # [m] - domyślny dopuszczalny błąd odwzorowania przez siatkę
+KROK_CIEPLEGO_STARTU = 64                # co który punkt metoda warm liczy od zera
+MAKS_ITERACJI_HIRVONENA = 50             # przy zbyt małej tolerancji szerokość może oscylować o 1 ulp
+MAKS_ITERACJI_GK = 10                    # iteracje Newtona szerokości punktu głównego (zwykle 3-4)
+ZASIEG_SZEREGU_GK = 100000               # [m] - |y| Gaussa-Krugera, do którego szereg odwrotny wystarcza (< 0.004 mm)
+
+
+class StanCieplegoStartu:
+    """
+    Stan metody warm przy przeliczaniu zbioru punktów kolejnymi porcjami
+    (patrz Transformacje.xyz2plh_batch). Punktami kotwicznymi są punkty
+    o numerze w całym zbiorze podzielnym przez KROK_CIEPLEGO_STARTU, więc
+    wynik nie zależy od podziału zbioru na porcje ani na procesy.
+
+    Attributes
+    ----------
+    wiersz : INT
+        numer (od zera) pierwszego punktu następnej porcji w całym zbiorze
+    kotwica : FLOAT
+        [rad] - szerokość ostatniego punktu kotwicznego przed następną porcją
+        (None - nieznana; wtedy kotwicą jest pierwszy punkt porcji)
+    """
+    def __init__(self, wiersz = 0, kotwica = None):
+        self.wiersz = wiersz
+        self.kotwica = kotwica
+
+    def __repr__(self):
+        return f'StanCieplegoStartu(wiersz={self.wiersz}, kotwica={self.kotwica})'
+
+
 class Transformacje:
     def __init__(self, model: str = "wgs84"):
         """
@@ -15,21 +559,31 @@ class Transformacje:
         + WGS84: https://en.wikipedia.org/wiki/World_Geodetic_System#WGS84
         + Inne powierzchnie odniesienia: https://en.wikibooks.org/wiki/PROJ.4#Spheroid
         + Parametry planet: https://nssdc.gsfc.nasa.gov/planetary/factsheet/index.html
+        Parametry pochodzą z rejestru elipsoid (wgs84, grs80, krasowski oraz
+        elipsoidy dodane przez zarejestruj_elipsoide lub wczytaj_rejestr).
+        Obiekt jest niezmienny; wspólne instancje dla modeli zwraca elipsoida(model).
         """
-        if model == "wgs84":
-            self.a = 6378137.0 # semimajor_axis
-            self.b = 6356752.31424518 # semiminor_axis
-        elif model == "grs80":
-            self.a = 6378137.0
-            self.b = 6356752.31414036
-        elif model == "krasowski":
-            self.a = 6378245.0
-            self.b = 6356863.019
-        else:
+        if model not in _ELIPSOIDY:
             raise NotImplementedError(f"{model} model not implemented")
+        self.a, self.b, self.datum = _ELIPSOIDY[model]   # półosie: równikowa (semimajor_axis) i biegunowa
+        self.model = model
         self.flat = (self.a - self.b) / self.a
         self.ecc = sqrt(2 * self.flat - self.flat ** 2) # eccentricity  WGS84:0.0818191910428 
         self.ecc2 = (2 * self.flat - self.flat ** 2) # eccentricity**2
+        # stałe odwzorowania Gaussa-Krugera - zależą tylko od elipsoidy
+        self.b2 = self.a**2 * (1 - self.ecc2)
+        self.e_prim2 = (self.a**2 - self.b2) / self.b2
+        self.A0 = 1 - (self.ecc2 / 4) - ((3 * (self.ecc2**2)) / 64) - ((5 * (self.ecc2**3)) / 256)
+        self.A2 = (3 / 8) * (self.ecc2 + (self.ecc2**2) / 4 + (15 * (self.ecc2**3)) / 128)
+        self.A4 = (15 / 256) * (self.ecc2**2 + (3 * (self.ecc2**3)) / 4)
+        self.A6 = (35 * (self.ecc2**3)) / 3072
+        self._zamrozone = True
+
+
+    def __setattr__(self, nazwa, wartosc):
+        if getattr(self, '_zamrozone', False):
+            raise AttributeError('Transformacje instances are immutable')
+        object.__setattr__(self, nazwa, wartosc)
         
     def deg2dms(self, deg):
         '''
@@ -57,6 +611,8 @@ class Transformacje:
         Algorytm Hirvonena - algorytm transformacji współrzędnych ortokartezjańskich (x, y, z)
         na współrzędne geodezyjne długość szerokość i wysokośc elipsoidalna (phi, lam, h). Jest to proces iteracyjny. 
         W wyniku 3-4-krotneej iteracji wyznaczenia wsp. phi można przeliczyć współrzędne z dokładnoscią ok 1 cm.     
+        Wersja dla pojedynczego punktu na module math (bez importu NumPy) - te same
+        iteracje co xyz2plh_batch (metoda hirvonen), ograniczone do MAKS_ITERACJI_HIRVONENA.
         Parameters
         ----------
         X, Y, Z : FLOAT
@@ -75,27 +631,211 @@ class Transformacje:
             dms - degree, minutes, sec
         """
         r   = sqrt(X**2 + Y**2)           # promień
-        lat_prev = atan(Z / (r * (1 - self.ecc2)))    # pierwsze przybliilizenie
+        lat_prev = atan(Z / (r * (1 - self.ecc2)))    # pierwsze przybliżenie
         lat = 0
-        while abs(lat_prev - lat) > 0.000001/206265:    
+        for _ in range(MAKS_ITERACJI_HIRVONENA):
+            if abs(lat_prev - lat) <= TOLERANCJA_HIRVONENA:
+                break
             lat_prev = lat
             N = self.a / sqrt(1 - self.ecc2 * sin(lat_prev)**2)
             h = r / cos(lat_prev) - N
             lat = atan((Z/r) * (((1 - self.ecc2 * N/(N + h))**(-1))))
-        lon = atan(Y/X)
-        N = self.a / sqrt(1 - self.ecc2 * (sin(lat))**2);
-        h = r / cos(lat) - N       
+        lon = atan(Y/X) if X > 0 else atan2(Y, X)
+        N = self.a / sqrt(1 - self.ecc2 * (sin(lat))**2)
+        h = r / cos(lat) - N
+        if output == "dec_degree":
+            return degrees(lat), degrees(lon), h
+        elif output == "dms":
+            return dms_tekst(degrees(lat)), dms_tekst(degrees(lon)), f"{h:.3f}"
+        else:
+            raise NotImplementedError(f"{output} - output format not defined")
+
+
+    def xyz2plh_batch(self, X, Y = None, Z = None, output = 'dec_degree', metoda = 'hirvonen',
+                      tolerancja = TOLERANCJA_HIRVONENA, phi0 = None, stan = None):
+        """
+        Przeliczenie xyz -> phi, lam, h dla wielu punktów jednocześnie. Domyślnie
+        algorytm Hirvonena: iteracje wykonywane są na całych tablicach NumPy, a punkty,
+        dla których szerokość już się ustaliła, są usuwane ze zbioru aktywnego - każdy
+        punkt przechodzi dokładnie tyle iteracji, co w wersji skalarnej. Długość
+        wyznaczana jest przez atan2, więc ćwiartka jest zawsze poprawna.
+
+        Metody (błąd maksymalny, python benchmark.py --accuracy; szybkość - patrz README):
+            hirvonen - iteracje od phi = 0, jak w wersji skalarnej; phi < 0.001 mm,
+                h < 0.1 mm (dla |phi| > 89.9 stopnia wzór na h daje do 1.6 m)
+            warm - iteracje startujące od szerokości poprzedniego punktu kotwicznego
+                (punktu o numerze podzielnym przez KROK_CIEPLEGO_STARTU, liczonego
+                od zera) lub od phi0;
+                dla szeregów czasowych stacji zwykle jedna iteracja; błąd jak hirvonen
+            bowring - wzór zamknięty Bowringa (1976), bez iteracji; h < 0.001 mm,
+                phi < 0.001 mm dla |h| <= 10 km i 6.7 mm dla h = 1000 km
+            vermeille - rozwiązanie ścisłe Vermeille'a (2002), bez iteracji; < 0.00001 mm
+
+        Parameters
+        ----------
+        X : ARRAY lub Punkty
+            tablica (N,3) ze współrzędnymi x, y, z, tablica 1-D współrzędnych x
+            albo Punkty z kolumnami x, y, z
+        Y, Z : ARRAY - optional
+            tablice 1-D współrzędnych y, z (gdy X jest tablicą 1-D)
+        output : STR - optional, default dec_degree
+            dec_degree - decimal degree
+            dms - degree, minutes, sec
+        metoda : STR - optional, default hirvonen
+            hirvonen, warm, bowring lub vermeille
+        tolerancja : FLOAT - optional
+            [rad] - warunek zakończenia iteracji (hirvonen, warm), domyślnie 1e-6";
+            0 - iteracje do ustalenia się szerokości (najwyżej MAKS_ITERACJI_HIRVONENA)
+        phi0 : FLOAT lub ARRAY - optional
+            [stopnie dziesiętne] - szerokość startowa iteracji (hirvonen, warm),
+            np. wynik poprzedniej epoki tych samych stacji
+        stan : StanCieplegoStartu - optional
+            (warm) numer pierwszego punktu X w całym zbiorze i kotwica poprzedniej
+            porcji; aktualizowany, więc kolejne porcje dają wynik taki jak cały
+            zbiór przeliczony naraz. Domyślnie X jest całym zbiorem
+
+        Returns
+        -------
+        lat, lon, h : ARRAY
+            [stopnie dziesiętne], [stopnie dziesiętne], [m] - tablice 1-D
+            (dla output = 'dms' - tablice napisów); dla X typu Punkty - Punkty
+            z kolumnami phi, lam, h i atrybutami X
+        """
+        if isinstance(X, Punkty):
+            wynik = self.xyz2plh_batch(X.wsp, output = output, metoda = metoda, tolerancja = tolerancja, phi0 = phi0,
+                                       stan = stan)
+            return X.z_wynikiem(np.column_stack(wynik), ('phi', 'lam', 'h'))
+        with _etap('xyz2plh'):
+            X, Y, Z = _kolumny(X, Y, Z)
+            r = np.sqrt(X**2 + Y**2)           # promień
+            h = None
+            if metoda in ('hirvonen', 'warm'):
+                if not tolerancja >= 0:
+                    raise ValueError(f"{tolerancja} - iteration tolerance must not be negative")
+                start = None
+                iteracje = None
+                if phi0 is not None:
+                    start = np.broadcast_to(np.radians(np.asarray(phi0, dtype = float)), r.shape)
+                elif metoda == 'warm' and r.size:
+                    # punkty kotwiczne (numer w całym zbiorze podzielny przez KROK_CIEPLEGO_STARTU) liczone
+                    # od zera, pozostałe startują od poprzedzającej kotwicy - także z poprzedniej porcji;
+                    # iteracje kotwic z obu przebiegów liczone są razem - jeden wpis histogramu na punkt
+                    wiersz0 = stan.wiersz if stan is not None else 0
+                    poprzednia = stan.kotwica if stan is not None else None
+                    indeksy = np.arange(-wiersz0 % KROK_CIEPLEGO_STARTU, r.size, KROK_CIEPLEGO_STARTU)
+                    if poprzednia is None and (not indeksy.size or indeksy[0]):
+                        indeksy = np.concatenate(([0], indeksy))
+                    iteracje_kotwic = None
+                    if _profil is not None:
+                        iteracje = np.zeros(r.shape, dtype = int)
+                        iteracje_kotwic = np.zeros(indeksy.shape, dtype = int)
+                    kotwice = self._hirvonen(r[indeksy], Z[indeksy], tolerancja, iteracje = iteracje_kotwic)
+                    if iteracje is not None:
+                        iteracje[indeksy] += iteracje_kotwic
+                    poczatek = indeksy[0] if indeksy.size else r.size
+                    start = np.empty_like(r)
+                    if poczatek:
+                        start[:poczatek] = poprzednia
+                    start[poczatek:] = np.repeat(kotwice, np.diff(np.append(indeksy, r.size)))
+                    if stan is not None and kotwice.size:
+                        stan.kotwica = float(kotwice[-1])
+                if stan is not None:
+                    stan.wiersz += r.size
+                lat = self._hirvonen(r, Z, tolerancja, start, iteracje)
+                if iteracje is not None:
+                    _profil.dodaj_iteracje(iteracje)
+            elif metoda == 'bowring':
+                lat, h = self._bowring(r, Z)
+            elif metoda == 'vermeille':
+                lat, h = self._vermeille(r, Z)
+            else:
+                raise NotImplementedError(f"{metoda} - xyz2plh method not implemented")
+            # dla X > 0 atan(Y/X) daje wynik identyczny z wcześniejszymi wersjami,
+            # pozostałe ćwiartki rozstrzyga atan2
+            with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                lon = np.where(X > 0, np.arctan(Y/X), np.arctan2(Y, X))
+            if h is None:
+                N = self.a / np.sqrt(1 - self.ecc2 * (np.sin(lat))**2)
+                h = r / np.cos(lat) - N
         if output == "dec_degree":
-            return degrees(lat), degrees(lon), h 
+            return np.degrees(lat), np.degrees(lon), h
         elif output == "dms":
-            lat = self.deg2dms(degrees(lat))
-            lon = self.deg2dms(degrees(lon))
-            return f"{lat[0]:02d}:{lat[1]:02d}:{lat[2]:.2f}", f"{lon[0]:02d}:{lon[1]:02d}:{lon[2]:.2f}", f"{h:.3f}"
-            #return f'{lat[0]:02d}{chr(176)}{abs(lat[1]):02d}\'{abs(lat[2]):.2f}\"', f'{lon[0]:02d}{chr(176)}{abs(lon[1]):02d}\'{abs(lon[2]):.2f}\"', f"{h:.3f}"
+            return _plh_dms(np.degrees(lat), np.degrees(lon), h)
         else:
             raise NotImplementedError(f"{output} - output format not defined")
             
             
+    def _hirvonen(self, r, Z, tolerancja = TOLERANCJA_HIRVONENA, start = None, iteracje = None):
+        """
+        Iteracje Hirvonena dla tablic promieni r i współrzędnych Z. Bez szerokości
+        startowej iteracje zaczynają się, jak w wersji skalarnej, od phi = 0.
+        Liczba iteracji jest ograniczona do MAKS_ITERACJI_HIRVONENA.
+        Przy profilowaniu liczby iteracji punktów trafiają do histogramu, a gdy
+        podano tablicę iteracje - są do niej doliczane (histogram uzupełnia wołający).
+        Zwraca szerokość [rad].
+        """
+        if start is None:
+            lat = np.zeros_like(r)
+            lat_prev = np.arctan(Z / (r * (1 - self.ecc2)))    # pierwsze przybliżenie
+            aktywne = np.flatnonzero(np.abs(lat_prev - lat) > tolerancja)
+        else:
+            lat = np.array(start, dtype = float)
+            aktywne = np.arange(r.size)
+        zapisz = iteracje is None and _profil is not None
+        if zapisz:
+            iteracje = np.zeros(r.shape, dtype = int)
+        for _ in range(MAKS_ITERACJI_HIRVONENA):
+            if not aktywne.size:
+                break
+            if iteracje is not None:
+                iteracje[aktywne] += 1
+            lat_prev = lat[aktywne]
+            r_a = r[aktywne]
+            N = self.a / np.sqrt(1 - self.ecc2 * np.sin(lat_prev)**2)
+            h = r_a / np.cos(lat_prev) - N
+            lat_a = np.arctan((Z[aktywne]/r_a) * (((1 - self.ecc2 * N/(N + h))**(-1))))
+            lat[aktywne] = lat_a
+            aktywne = aktywne[np.abs(lat_prev - lat_a) > tolerancja]
+        if zapisz:
+            _profil.dodaj_iteracje(iteracje)
+        return lat
+
+
+    def _bowring(self, r, Z):
+        """
+        Wzór zamknięty Bowringa (1976) - jeden krok od szerokości zredukowanej.
+        Zwraca szerokość [rad] i wysokość elipsoidalną [m].
+        """
+        b = sqrt(self.b2)
+        u = np.arctan2(Z * self.a, r * b)
+        lat = np.arctan2(Z + self.e_prim2 * b * np.sin(u)**3, r - self.ecc2 * self.a * np.cos(u)**3)
+        sin_lat = np.sin(lat)
+        h = r * np.cos(lat) + Z * sin_lat - self.a * np.sqrt(1 - self.ecc2 * sin_lat**2)
+        return lat, h
+
+
+    def _vermeille(self, r, Z):
+        """
+        Rozwiązanie ścisłe Vermeille'a (2002), poprawne dla punktów poza
+        najbliższym otoczeniem środka Ziemi. Zwraca szerokość [rad] i wysokość elipsoidalną [m].
+        """
+        e4 = self.ecc2**2
+        p = (r / self.a)**2
+        q = (1 - self.ecc2) * (Z / self.a)**2
+        rr = (p + q - e4) / 6
+        s = e4 * p * q / (4 * rr**3)
+        t = np.cbrt(1 + s + np.sqrt(s * (2 + s)))
+        u = rr * (1 + t + 1 / t)
+        v = np.sqrt(u**2 + e4 * q)
+        w = self.ecc2 * (u + v - q) / (2 * v)
+        k = np.sqrt(u + v + w**2) - w
+        D = k * r / (k + self.ecc2)
+        odl = np.sqrt(D**2 + Z**2)
+        lat = 2 * np.arctan2(Z, D + odl)
+        h = (k + self.ecc2 - 1) / k * odl
+        return lat, h
+
+
     def xyzGRS2KRA(self, x_grs, y_grs, z_grs):
         """
         Transformacja współrzędnych kartezjańskich - geocentrycznych
@@ -110,20 +850,32 @@ class Transformacje:
         x_kra, y_kra, z_kra : TUPLE
             [m] - współrzędne geocentryczne dla elipsoidy Krasowskiego
         """
-        R_g = np.array([[x_grs],
-                        [y_grs],
-                        [z_grs]])
-        I = np.eye(3)
-        C = np.array([[0.84076440, 4.08960694, 0.25613907],
-                      [-4.08960650, 0.84076292, -1.73888787],
-                      [-0.25614618, 1.73888628, 0.84077125]]) * 10**(-6)
-        T = np.array([[-33.4297],
-                      [146.5746],
-                      [76.2865]])
-        [[x_kra], [y_kra], [z_kra]] = (I + C) @ R_g + T
+        [x_kra, y_kra, z_kra] = self.xyzGRS2KRA_batch([[x_grs, y_grs, z_grs]])[0].tolist()
         return x_kra, y_kra, z_kra
     
     
+    def xyzGRS2KRA_batch(self, xyz, out = None):
+        """
+        Wersja xyzGRS2KRA dla tablicy punktów: jedno mnożenie macierzowe
+        przez (I+C) i dodanie wektora T (parametry z rejestru transformacji,
+        patrz transformacja_datum).
+
+        Parameters
+        ----------
+        xyz : ARRAY lub Punkty
+            [m] - tablica (N,3) współrzędnych geocentrycznych dla elipsoidy GRS-80
+        out : ARRAY - optional
+            tablica (N,3) float64 na wynik; może być tą samą tablicą co xyz
+
+        Returns
+        -------
+        ARRAY
+            [m] - tablica (N,3) współrzędnych geocentrycznych dla elipsoidy Krasowskiego
+            (dla xyz typu Punkty - Punkty z tymi samymi atrybutami)
+        """
+        return transformacja_datum('grs80', 'krasowski').przelicz(xyz, out)
+    
+    
     def xyzKRA2GRS(self, x_kra, y_kra, z_kra):
         '''
         Transformacja współrzędnych kartezjańskich - geocentrycznych
@@ -139,20 +891,32 @@ class Transformacje:
         x_grs, y_grs, z_grs : TUPLE
             [m] - współrzędne geocentryczne w układzie elipsoidy GRS-80
         '''
-        R_k = np.array([[x_kra],
-                        [y_kra],
-                        [z_kra]])
-        T = np.array([[-33.4297],
-                      [146.5746],
-                      [76.2865]])
-        I = np.eye(3)
-        D = np.array([[-0.84078048, -4.08959962, -0.25614575],
-                      [4.08960007, -0.84078196, 1.73888389],
-                      [0.25613864, -1.73888494, -0.84077363]]) * 10**(-6)
-        R = R_k - T
-        [[x_grs], [y_grs], [z_grs]] = (I + D) @ R
+        [x_grs, y_grs, z_grs] = self.xyzKRA2GRS_batch([[x_kra, y_kra, z_kra]])[0].tolist()
         return x_grs, y_grs, z_grs
     
+    
+    def xyzKRA2GRS_batch(self, xyz, out = None):
+        '''
+        Wersja xyzKRA2GRS dla tablicy punktów. Zamiast (I+D) @ (R - T) liczone
+        jest (I+D) @ R - (I+D) @ T, gdzie (I+D) @ T wyznaczone jest raz, przy
+        tworzeniu transformacji (transformacja_datum) - dzięki temu wystarcza
+        jedno mnożenie macierzowe i jedno dodawanie.
+
+        Parameters
+        ----------
+        xyz : ARRAY lub Punkty
+            [m] - tablica (N,3) współrzędnych geocentrycznych w układzie elipsoidy Krasowskiego
+        out : ARRAY - optional
+            tablica (N,3) float64 na wynik; może być tą samą tablicą co xyz
+
+        Returns
+        -------
+        ARRAY
+            [m] - tablica (N,3) współrzędnych geocentrycznych w układzie elipsoidy GRS-80
+            (dla xyz typu Punkty - Punkty z tymi samymi atrybutami)
+        '''
+        return transformacja_datum('krasowski', 'grs80').przelicz(xyz, out)
+    
 
     def plh2xyz(self, phi, lam, h):
         '''
@@ -182,6 +946,39 @@ class Transformacje:
         return x,y,z
     
     
+    def plh2xyz_batch(self, phi, lam = None, h = None):
+        '''
+        Wersja plh2xyz dla tablic punktów.
+
+        Parameters
+        ----------
+        phi, lam : ARRAY
+            [stopnie dziesiętne] - szerokość i długość geodezyjna; phi może też
+            być zbiorem Punkty z kolumnami phi, lam, h (wtedy lam i h pomijane)
+        h : ARRAY
+            [m] - wysokość elipsoidalna
+
+        Returns
+        -------
+        ARRAY
+            [m] - tablica (N,3) współrzędnych w układzie orto-kartezjańskim
+            (dla Punkty - Punkty z kolumnami x, y, z i tymi samymi atrybutami)
+        '''
+        if isinstance(phi, Punkty):
+            return phi.z_wynikiem(self.plh2xyz_batch(phi['phi'], phi['lam'], phi['h']), ('x', 'y', 'z'))
+        phi = np.radians(np.asarray(phi, dtype = float))
+        lam = np.radians(np.asarray(lam, dtype = float))
+        h = np.asarray(h, dtype = float)
+        sin_phi = np.sin(phi)
+        Rn = self.a / np.sqrt(1 - self.ecc2 * sin_phi**2)
+        q = Rn * self.ecc2 * sin_phi
+        xyz = np.empty((phi.size, 3))
+        xyz[:, 0] = (Rn + h) * np.cos(phi) * np.cos(lam)
+        xyz[:, 1] = (Rn + h) * np.cos(phi) * np.sin(lam)
+        xyz[:, 2] = (Rn + h) * sin_phi - q
+        return xyz
+    
+    
     def pl21992(self, phi, lam):
         '''
         Aplikacja odwzorowania Gaussa-Krugera dla układu 1992,
@@ -204,19 +1001,7 @@ class Transformacje:
         '''
         phi = radians(phi)
         lam = radians(lam)
-        b2 = self.a**2 * (1 - self.ecc2)
-        e_prim2 = (self.a**2 - b2) / b2
-        deltal = lam - radians(19)
-        t = tan(phi)
-        eta2 = e_prim2 * (cos(phi)**2) 
-        N = self.a / sqrt(1 - self.ecc2 * sin(phi)**2)
-        A0 = 1 - (self.ecc2 / 4) - ((3 * (self.ecc2**2)) / 64) - ((5 * (self.ecc2**3)) / 256)
-        A2 = (3 / 8) * (self.ecc2 + (self.ecc2**2) / 4 + (15 * (self.ecc2**3)) / 128)
-        A4 = (15 / 256) * (self.ecc2**2 + (3 * (self.ecc2**3)) / 4)
-        A6 = (35 * (self.ecc2**3)) / 3072
-        sigma = self.a * (A0 * phi - A2 * sin(2 * phi) + A4 * sin(4 * phi) - A6 * sin(6*phi))
-        xgk = sigma + ((deltal)**2)/2 * N * sin(phi) * cos(phi) * (1 + ((deltal)**2)/12 * (cos(phi))**2 * (5 - t**2 + 9 * eta2 + 4 * (eta2)**2) + ((deltal)**4)/360 * (cos(phi))**4 * (61 - 58*t**2 + t**4 + 270*eta2 - 330*eta2*t**2))
-        ygk = deltal * N * cos(phi) * (1 + ((deltal)**2)/6 * (cos(phi))**2 * (1 - t**2 + eta2) + ((deltal)**4)/120 * (cos(phi))**4 * (5 - 18 * t**2 + t**4 + 14 * eta2 - 58 * eta2 * t**2))
+        xgk, ygk = self._gauss_kruger(phi, lam, radians(19))
         x1992 = xgk * 0.9993 - 5300000
         y1992 = ygk * 0.9993 + 500000
         return x1992, y1992
@@ -252,302 +1037,2825 @@ class Transformacje:
             lam0 = radians(24)
         phi = radians(phi)
         lam = radians(lam)
-        b2 = self.a**2 * (1 - self.ecc2)
-        e_prim2 = (self.a**2 - b2) / b2
+        xgk, ygk = self._gauss_kruger(phi, lam, lam0)
+        x2000 = xgk * 0.999923
+        y2000 = ygk * 0.999923 + degrees(lam0)/3 * 1000000 + 500000
+        return x2000, y2000
+    
+    
+    def _gauss_kruger(self, phi, lam, lam0):
+        '''
+        Odwzorowanie Gaussa-Krugera jednego punktu, wspólne dla układów 1992 i 2000
+        (phi, lam, lam0 w radianach). Zwraca xgk, ygk [m].
+        '''
         deltal = lam - lam0
         t = tan(phi)
-        eta2 = e_prim2 * (cos(phi)**2) 
+        eta2 = self.e_prim2 * (cos(phi)**2)
         N = self.a / sqrt(1 - self.ecc2 * sin(phi)**2)
-        A0 = 1 - (self.ecc2 / 4) - ((3 * (self.ecc2**2)) / 64) - ((5 * (self.ecc2**3)) / 256)
-        A2 = (3 / 8) * (self.ecc2 + (self.ecc2**2) / 4 + (15 * (self.ecc2**3)) / 128)
-        A4 = (15 / 256) * (self.ecc2**2 + (3 * (self.ecc2**3)) / 4)
-        A6 = (35 * (self.ecc2**3)) / 3072
-        sigma = self.a * (A0 * phi - A2 * sin(2 * phi) + A4 * sin(4 * phi) - A6 * sin(6*phi))
+        sigma = self.a * (self.A0 * phi - self.A2 * sin(2 * phi) + self.A4 * sin(4 * phi) - self.A6 * sin(6*phi))
         xgk = sigma + ((deltal)**2)/2 * N * sin(phi) * cos(phi) * (1 + ((deltal)**2)/12 * (cos(phi))**2 * (5 - t**2 + 9 * eta2 + 4 * (eta2)**2) + ((deltal)**4)/360 * (cos(phi))**4 * (61 - 58*t**2 + t**4 + 270*eta2 - 330*eta2*t**2))
         ygk = deltal * N * cos(phi) * (1 + ((deltal)**2)/6 * (cos(phi))**2 * (1 - t**2 + eta2) + ((deltal)**4)/120 * (cos(phi))**4 * (5 - 18 * t**2 + t**4 + 14 * eta2 - 58 * eta2 * t**2))
+        return xgk, ygk
+
+
+    def _gauss_kruger_odwrotne(self, xgk, ygk, lam0):
+        '''
+        Odwrotne odwzorowanie Gaussa-Krugera jednego punktu - te same szeregi
+        i poprawka co w _gauss_kruger_odwrotne_batch. Zwraca phi, lam [rad].
+        '''
+        phi, lam = self._szereg_odwrotny_punktu(xgk, ygk, lam0)
+        if abs(ygk) > ZASIEG_SZEREGU_GK:
+            phi_z, lam_z = self._szereg_odwrotny_punktu(*self._gauss_kruger(phi, lam, lam0), lam0)
+            phi, lam = 2 * phi - phi_z, 2 * lam - lam_z
+        return phi, lam
+
+
+    def _szereg_odwrotny_punktu(self, xgk, ygk, lam0):
+        '''
+        Szeregi odwrotnego odwzorowania Gaussa-Krugera dla jednego punktu (patrz _szereg_odwrotny).
+        '''
+        phi1 = xgk / (self.a * self.A0)
+        phi1 = phi1 + self.A2 / self.A0 * sin(2 * phi1)
+        for _ in range(MAKS_ITERACJI_GK):
+            sigma = self.a * (self.A0 * phi1 - self.A2 * sin(2 * phi1) + self.A4 * sin(4 * phi1) - self.A6 * sin(6 * phi1))
+            pochodna = self.a * (self.A0 - 2 * self.A2 * cos(2 * phi1) + 4 * self.A4 * cos(4 * phi1) - 6 * self.A6 * cos(6 * phi1))
+            poprawka = (xgk - sigma) / pochodna
+            phi1 = phi1 + poprawka
+            if abs(poprawka) < 1e-14:
+                break
+        t = tan(phi1)
+        eta2 = self.e_prim2 * (cos(phi1)**2)
+        w = 1 - self.ecc2 * sin(phi1)**2
+        N = self.a / sqrt(w)
+        M = self.a * (1 - self.ecc2) / (w * sqrt(w))
+        u2 = (ygk / N)**2
+        phi = phi1 - ygk**2 * t / (2 * M * N) * (1 - u2/12 * (5 + 3 * t**2 + eta2 - 9 * eta2 * t**2) + u2**2/360 * (61 + 90 * t**2 + 45 * t**4))
+        lam = lam0 + ygk / (N * cos(phi1)) * (1 - u2/6 * (1 + 2 * t**2 + eta2) + u2**2/120 * (5 + 28 * t**2 + 24 * t**4 + 6 * eta2 + 8 * eta2 * t**2))
+        return phi, lam
+
+
+    def _gauss_kruger_batch(self, phi, lam, lam0):
+        '''
+        Odwzorowanie Gaussa-Krugera dla tablic punktów, wspólne dla układów 1992 i 2000.
+
+        Parameters
+        ----------
+        phi, lam : ARRAY
+            [radiany] - szerokość i długość geodezyjna
+        lam0 : FLOAT or ARRAY
+            [radiany] - południk osiowy (dla układu 2000 - osobny dla każdego punktu)
+
+        Returns
+        -------
+        xgk, ygk : ARRAY
+            [m] - współrzędne w odwzorowaniu Gaussa-Krugera
+        '''
+        with _etap('projection'):
+            deltal = lam - lam0
+            t = np.tan(phi)
+            cos_phi = np.cos(phi)
+            sin_phi = np.sin(phi)
+            eta2 = self.e_prim2 * (cos_phi**2)
+            N = self.a / np.sqrt(1 - self.ecc2 * sin_phi**2)
+            sigma = self.a * (self.A0 * phi - self.A2 * np.sin(2 * phi) + self.A4 * np.sin(4 * phi) - self.A6 * np.sin(6*phi))
+            xgk = sigma + ((deltal)**2)/2 * N * sin_phi * cos_phi * (1 + ((deltal)**2)/12 * (cos_phi)**2 * (5 - t**2 + 9 * eta2 + 4 * (eta2)**2) + ((deltal)**4)/360 * (cos_phi)**4 * (61 - 58*t**2 + t**4 + 270*eta2 - 330*eta2*t**2))
+            ygk = deltal * N * cos_phi * (1 + ((deltal)**2)/6 * (cos_phi)**2 * (1 - t**2 + eta2) + ((deltal)**4)/120 * (cos_phi)**4 * (5 - 18 * t**2 + t**4 + 14 * eta2 - 58 * eta2 * t**2))
+        return xgk, ygk
+
+
+    def pl21992_batch(self, phi, lam = None, metoda = 'exact', dokladnosc = DOKLADNOSC_SIATKI):
+        '''
+        Wersja pl21992 dla tablic punktów.
+
+        Parameters
+        ----------
+        phi, lam : ARRAY
+            [stopnie dziesiętne] - szerokość i długość geodezyjna; phi może też
+            być zbiorem Punkty z kolumnami phi, lam (i ewentualnie h)
+        metoda : STR - optional
+            'exact' (domyślnie) - wzory odwzorowania Gaussa-Krugera,
+            'grid' - interpolacja w siatce obszaru Polski (patrz SiatkaOdwzorowania)
+        dokladnosc : FLOAT - optional
+            [m] - dopuszczalny błąd metody 'grid'
+
+        Returns
+        -------
+        x1992, y1992 : ARRAY
+            [m] - współrzędne w układzie 1992 (dla Punkty - Punkty z kolumnami x, y)
+        '''
+        if isinstance(phi, Punkty):
+            wynik = self.pl21992_batch(phi['phi'], phi['lam'], metoda, dokladnosc)
+            return phi.z_wynikiem(np.column_stack(wynik), ('x', 'y'))
+        if metoda != 'exact':
+            return self._odwzoruj_siatka('pl1992', phi, lam, metoda, dokladnosc)
+        phi = np.radians(np.asarray(phi, dtype = float))
+        lam = np.radians(np.asarray(lam, dtype = float))
+        xgk, ygk = self._gauss_kruger_batch(phi, lam, radians(19))
+        x1992 = xgk * 0.9993 - 5300000
+        y1992 = ygk * 0.9993 + 500000
+        return x1992, y1992
+
+
+    def pl22000_batch(self, phi, lam = None, metoda = 'exact', dokladnosc = DOKLADNOSC_SIATKI):
+        '''
+        Wersja pl22000 dla tablic punktów. Strefa (południk osiowy 15, 18, 21
+        lub 24 stopnie) wybierana jest osobno dla każdego punktu.
+
+        Parameters
+        ----------
+        phi, lam : ARRAY lub Punkty
+            jak w pl21992_batch
+        metoda, dokladnosc : optional
+            jak w pl21992_batch
+
+        Returns
+        -------
+        x2000, y2000 : ARRAY
+            [m] - współrzędne w układzie 2000 (dla Punkty - Punkty z kolumnami x, y)
+        '''
+        if isinstance(phi, Punkty):
+            wynik = self.pl22000_batch(phi['phi'], phi['lam'], metoda, dokladnosc)
+            return phi.z_wynikiem(np.column_stack(wynik), ('x', 'y'))
+        if metoda != 'exact':
+            return self._odwzoruj_siatka('pl2000', phi, lam, metoda, dokladnosc)
+        lam = np.asarray(lam, dtype = float)
+        lam0_deg = np.select([lam < 16.5, lam < 19.5, lam < 22.5], [15.0, 18.0, 21.0], 24.0)
+        return self._pl22000_strefa(phi, lam, lam0_deg)
+
+
+    def _pl22000_strefa(self, phi, lam, lam0_deg):
+        '''
+        Układ 2000 dla zadanego południka osiowego lam0_deg [stopnie] - także
+        poza granicami jego strefy (węzły brzegowe siatki odwzorowania).
+        '''
+        lam0 = np.radians(lam0_deg)
+        xgk, ygk = self._gauss_kruger_batch(np.radians(np.asarray(phi, dtype = float)),
+                                            np.radians(np.asarray(lam, dtype = float)), lam0)
         x2000 = xgk * 0.999923
-        y2000 = ygk * 0.999923 + degrees(lam0)/3 * 1000000 + 500000
+        y2000 = ygk * 0.999923 + np.degrees(lam0)/3 * 1000000 + 500000
         return x2000, y2000
-    
-    
-    def xyz2neu(self, x, y, z, x0, y0, z0):
+
+
+    def _odwzoruj_siatka(self, uklad, phi, lam, metoda, dokladnosc):
         '''
-        Transformacja współrzędnych geocentrycznych do układu topocentrycznego 
-        NEU (NORTHING, EASTING, UP). Następuje ona przez przesunięcie początku
-        układu współrzędnych do nowego punktu centrum (x0, y0, z0) i rotację.
+        Odwzorowanie 1992 lub 2000 przez siatkę interpolacyjną. Punkty poza
+        siatką (poza obszarem ZASIEG_SIATKI) liczone są wzorami ścisłymi.
+        '''
+        if metoda not in METODY_ODWZOROWANIA:
+            raise NotImplementedError(f'{metoda} - projection method not implemented')
+        phi, lam = np.broadcast_arrays(np.asarray(phi, dtype = float), np.asarray(lam, dtype = float))
+        ksztalt = phi.shape
+        phi, lam = phi.ravel(), lam.ravel()
+        with _etap('projection'):
+            x, y, poza = siatka_odwzorowania(self.model, uklad, dokladnosc).przelicz(phi, lam)
+        if poza is not None:
+            odwzoruj = self.pl21992_batch if uklad == 'pl1992' else self.pl22000_batch
+            x[poza], y[poza] = odwzoruj(phi[poza], lam[poza])
+        return x.reshape(ksztalt), y.reshape(ksztalt)
+
+
+    def _gauss_kruger_odwrotne_batch(self, xgk, ygk, lam0):
+        '''
+        Odwrotne odwzorowanie Gaussa-Krugera dla tablic punktów, wspólne dla
+        układów 1992 i 2000. Szerokość punktu głównego phi1 (długość łuku
+        południka równa xgk) wyznaczana jest metodą Newtona na tym samym szeregu
+        A0..A6 co w _gauss_kruger_batch, a poprawki szerokości i długości -
+        szeregami do y^6 (rzędu wzorów odwzorowania wprost). Obcięte szeregi
+        wprost i odwrotny rozchodzą się z odległością od południka osiowego
+        (do 26 mm na krańcach układu 1992), dlatego punkty dalsze niż
+        ZASIEG_SZEREGU_GK otrzymują poprawkę: phi += phi - odwrotne(wprost(phi)) -
+        złożenie z _gauss_kruger_batch zgadza się wtedy wszędzie co do 0.004 mm.
 
         Parameters
         ----------
-        x, y, z : FLOAT
-            [m] - współrzędne geocentryczne 
-        x0, y0, z0 : FOAT
-            [m] - współrzędne geocentryczne nowego srodka układu
+        xgk, ygk : ARRAY
+            [m] - współrzędne w odwzorowaniu Gaussa-Krugera
+        lam0 : FLOAT or ARRAY
+            [radiany] - południk osiowy
 
         Returns
         -------
-        n, e, u : TUPLE
-            [m] - współrzędne topocentryczne 
+        phi, lam : ARRAY
+            [radiany] - szerokość i długość geodezyjna, w kształcie xgk, ygk
+            (dla liczb - tablice 0-wymiarowe)
+        '''
+        ksztalt = np.broadcast(xgk, ygk).shape
+        xgk, ygk = np.broadcast_arrays(np.atleast_1d(xgk), np.atleast_1d(ygk))
+        phi, lam = self._szereg_odwrotny(xgk, ygk, lam0)
+        daleko = np.abs(ygk) > ZASIEG_SZEREGU_GK
+        if daleko.any():
+            lam0 = lam0[daleko] if np.ndim(lam0) else lam0
+            phi_d, lam_d = phi[daleko], lam[daleko]
+            phi_z, lam_z = self._szereg_odwrotny(*self._gauss_kruger_batch(phi_d, lam_d, lam0), lam0)
+            phi[daleko] = 2 * phi_d - phi_z
+            lam[daleko] = 2 * lam_d - lam_z
+        return phi.reshape(ksztalt), lam.reshape(ksztalt)
 
+
+    def _szereg_odwrotny(self, xgk, ygk, lam0):
         '''
-        phi, lam, _ = [radians(coord) for coord in self.xyz2plh(x, y, z)]
-        R = np.array([[-sin(phi) * cos(lam), -sin(lam), cos(phi) * cos(lam)],
-                      [-sin(phi) * sin(lam), cos(lam), cos(phi) * sin(lam)],
-                      [cos(phi), 0, sin(phi)]])
-        #translacjA
-        XYZT = np.array([[x - x0],
-                         [y - y0],
-                         [z - z0]])
-        #rotacja
-        [[n], [e], [u]] = R.T @ XYZT
-        return n, e, u
-            
-    
-if __name__ == "__main__":
-    # utworzenie obiektu
-    geo = Transformacje(model = "wgs84")
-    grs = Transformacje(model = 'grs80')
-    kras = Transformacje(model = 'krasowski')
-    print(sys.argv)
-    # dane XYZ geocentryczne
-    # X = 3664940.500; Y = 1409153.590; Z = 5009571.170
-    # phi, lam, h = geo.xyz2plh(X, Y, Z)
-    # print(phi, lam, h)
-    # phi, lam, h = geo.xyz2plh2(X, Y, Z)
-    # print(phi, lam, h)
-    input_file_path = sys.argv[-1]
-    
-    if '--header_lines' in sys.argv:
-        header_lines = int(sys.argv[3])
-        
-    if '--model' in sys.argv:
-        model_inp = sys.argv[5]
-        model_elip = model_inp.lower()
-        if model_elip != 'grs80' and model_elip != 'wgs84' and model_elip != 'krasowski':
-            raise NotImplementedError(f'{model_elip} - reference ellipsoid  model not recognized.')
-            
-    
-    if '--flags' in sys.argv:  #displays all callable flags
-        print('\n --xyz2plh \n --plh2xyz \n --pl21992 \n --pl22000 \n --xyz2neu \n --xyzGRS2KRA \n --xyzKRA2GRS \n --header_lines \n --model \n --dms') 
-            
-    
-    if '--xyz2plh' in sys.argv and '--plh2xyz' in sys.argv:
-        print('Możesz podać tylko jedną flagę.')
-        
-    elif '--xyz2plh' in sys.argv:
-        with open(input_file_path, 'r') as f:
-            lines = f.readlines()
-            lines = lines[header_lines:]
-        
-            coords_plh = []
-            for line in lines: 
-                line = line.strip()
-                x_str,y_str,z_str = line.split(',')
-                x,y,z = float(x_str),float(y_str),float(z_str)
-                if '--dms' in sys.argv:
-                    if model_elip == 'wgs84':
-                        p,l,h = geo.xyz2plh(x,y,z, output = 'dms')
-                    elif model_elip == 'grs80':
-                        p,l,h = grs.xyz2plh(x,y,z, output = 'dms')
-                    elif model_elip == 'krasowski':
-                        p,l,h = kras.xyz2plh(x,y,z, output = 'dms')
-                else:
-                    if model_elip == 'wgs84':
-                        p,l,h = geo.xyz2plh(x,y,z)
-                    elif model_elip == 'grs80':
-                        p,l,h = grs.xyz2plh(x,y,z)
-                    elif model_elip == 'krasowski':
-                        p,l,h = kras.xyz2plh(x,y,z)
-                coords_plh.append([p,l,h])
-    
-        with open('result_xyz2plh.txt','w+') as f:
-            f.write('phi[deg], lam[deg], h[m] \n')
-            for coords in coords_plh:
-                coords_plh_line = ','.join([str(coord) for coord in coords])
-                f.write(coords_plh_line + '\n')
-                
-                
-    elif '--xyzGRS2KRA' in sys.argv:
-        with open(input_file_path, 'r') as f:
-            lines = f.readlines()
-            lines = lines[header_lines:]
-        
-            coords_xyz_kra = []
-            for line in lines: 
-                line = line.strip()
-                x_str,y_str,z_str = line.split(',')
-                x_grs,y_grs,z_grs = float(x_str),float(y_str),float(z_str)
-                x_kra,y_kra,z_kra = grs.xyzGRS2KRA(x_grs,y_grs,z_grs)
-                coords_xyz_kra.append([x_kra,y_kra,z_kra])
-    
-        with open('result_xyzGRS2KRA.txt','w+') as f:
-            f.write('x[m], y[m], z[m] \n')
-            for coords in coords_xyz_kra:
-                coords_xyz_kra_line = ','.join([f'{coord:11.3f}' for coord in coords])
-                f.write(coords_xyz_kra_line + '\n')
-    
-   
-    elif '--xyzKRA2GRS' in sys.argv:
-        with open(input_file_path, 'r') as f:
-            lines = f.readlines()
-            lines = lines[header_lines:]
-        
-            coords_xyz_grs = []
-            for line in lines: 
-                line = line.strip()
-                x_str,y_str,z_str = line.split(',')
-                x_kra,y_kra,z_kra = float(x_str),float(y_str),float(z_str)
-                x_grs,y_grs,z_grs = grs.xyzKRA2GRS(x_kra,y_kra,z_kra)
-                coords_xyz_grs.append([x_grs,y_grs,z_grs])
-    
-        with open('result_xyzKRA2GRS.txt','w+') as f:
-            f.write('x[m], y[m], z[m] \n')
-            for coords in coords_xyz_grs:
-                coords_xyz_grs_line = ','.join([f'{coord:11.3f}' for coord in coords])
-                f.write(coords_xyz_grs_line + '\n')
-            
-            
-    elif '--plh2xyz' in sys.argv: 
-        input_format = input("Enter input format (dec_degrees/dms): ")
-            
-        with open(input_file_path, 'r') as f:
-            lines = f.readlines()
-            lines = lines[header_lines:]
-            
-            coords_xyz = []
-            for line in lines: 
-                line = line.strip().replace(" ", "")
-                if input_format == 'dec_degrees':
-                    phi_str, lam_str, h_str = line.split(',')
-                    phi, lam, h = float(phi_str), float(lam_str), float(h_str)
-                elif input_format == 'dms':
-                    phi_dms, lam_dms, h = line.split(',')
-                    phi_l = phi_dms.split(':')
-                    lam_l = lam_dms.split(":")
-                    phi = float(phi_l[0]) + float(phi_l[1])/60 + float(phi_l[2])/3600
-                    lam = float(lam_l[0]) + float(lam_l[1])/60 + float(lam_l[2])/3600
-                    h = float(h)
+        Szeregi odwrotnego odwzorowania Gaussa-Krugera (patrz _gauss_kruger_odwrotne_batch).
+        '''
+        with _etap('projection'):
+            phi1 = xgk / (self.a * self.A0)
+            phi1 = phi1 + self.A2 / self.A0 * np.sin(2 * phi1)
+            for _ in range(MAKS_ITERACJI_GK):
+                # sin, cos 4phi i 6phi z wartości dla 2phi - dwie funkcje trygonometryczne na iterację
+                s2, c2 = np.sin(2 * phi1), np.cos(2 * phi1)
+                s4, c4 = 2 * s2 * c2, 1 - 2 * s2**2
+                s6, c6 = s4 * c2 + c4 * s2, c4 * c2 - s4 * s2
+                sigma = self.a * (self.A0 * phi1 - self.A2 * s2 + self.A4 * s4 - self.A6 * s6)
+                pochodna = self.a * (self.A0 - 2 * self.A2 * c2 + 4 * self.A4 * c4 - 6 * self.A6 * c6)
+                poprawka = (xgk - sigma) / pochodna
+                phi1 = phi1 + poprawka
+                if not poprawka.size or np.abs(poprawka).max() < 1e-14:
+                    break
+            t = np.tan(phi1)
+            cos_phi = np.cos(phi1)
+            eta2 = self.e_prim2 * (cos_phi**2)
+            w = 1 - self.ecc2 * np.sin(phi1)**2
+            N = self.a / np.sqrt(w)
+            M = self.a * (1 - self.ecc2) / (w * np.sqrt(w))
+            u2 = (ygk / N)**2
+            phi = phi1 - ygk**2 * t / (2 * M * N) * (1 - u2/12 * (5 + 3 * t**2 + eta2 - 9 * eta2 * t**2) + u2**2/360 * (61 + 90 * t**2 + 45 * t**4))
+            lam = lam0 + ygk / (N * cos_phi) * (1 - u2/6 * (1 + 2 * t**2 + eta2) + u2**2/120 * (5 + 28 * t**2 + 24 * t**4 + 6 * eta2 + 8 * eta2 * t**2))
+        return phi, lam
+
+
+    def pl19922plh_batch(self, x, y = None):
+        '''
+        Odwrotność pl21992_batch: współrzędne w układzie 1992 -> phi, lam.
+
+        Parameters
+        ----------
+        x, y : ARRAY
+            [m] - współrzędne w układzie 1992; x może też być zbiorem Punkty
+            z kolumnami x, y (i ewentualnie h, przepisywaną do wyniku)
+
+        Returns
+        -------
+        phi, lam : ARRAY
+            [stopnie dziesiętne] - szerokość i długość geodezyjna (dla Punkty -
+            Punkty z kolumnami phi, lam[, h])
+        '''
+        if isinstance(x, Punkty):
+            return self._punkty_odwrotne(x, self.pl19922plh_batch)
+        xgk = (np.asarray(x, dtype = float) + 5300000) / 0.9993
+        ygk = (np.asarray(y, dtype = float) - 500000) / 0.9993
+        phi, lam = self._gauss_kruger_odwrotne_batch(xgk, ygk, radians(19))
+        return np.degrees(phi), np.degrees(lam)
+
+
+    def pl20002plh_batch(self, x, y = None):
+        '''
+        Odwrotność pl22000_batch: współrzędne w układzie 2000 -> phi, lam.
+        Strefa (5, 6, 7 lub 8 - południk osiowy 15, 18, 21 lub 24 stopnie)
+        odczytywana jest osobno dla każdego punktu z pierwszej cyfry współrzędnej y.
+
+        Parameters
+        ----------
+        x, y : ARRAY lub Punkty
+            jak w pl19922plh_batch, w układzie 2000
+
+        Returns
+        -------
+        phi, lam : ARRAY
+            [stopnie dziesiętne] - szerokość i długość geodezyjna
+        '''
+        if isinstance(x, Punkty):
+            return self._punkty_odwrotne(x, self.pl20002plh_batch)
+        y = np.asarray(y, dtype = float)
+        strefa = np.floor(y / 1000000)
+        if strefa.size and (strefa.min() < 5 or strefa.max() > 8):
+            zle = y[(strefa < 5) | (strefa > 8)].ravel()[0]
+            raise ValueError(f"y = {zle} - easting outside PL-2000 zones 5-8")
+        xgk = np.asarray(x, dtype = float) / 0.999923
+        ygk = (y - strefa * 1000000 - 500000) / 0.999923
+        phi, lam = self._gauss_kruger_odwrotne_batch(xgk, ygk, np.radians(3 * strefa))
+        return np.degrees(phi), np.degrees(lam)
+
+
+    def _punkty_odwrotne(self, punkty, odwzoruj):
+        '''
+        Odwzorowanie odwrotne zbioru Punkty z kolumnami x, y[, h] - wysokość
+        przepisywana jest do wyniku.
+        '''
+        phi, lam = odwzoruj(punkty['x'], punkty['y'])
+        if 'h' in punkty.kolumny:
+            return punkty.z_wynikiem(np.column_stack((phi, lam, punkty['h'])), ('phi', 'lam', 'h'))
+        return punkty.z_wynikiem(np.column_stack((phi, lam)), ('phi', 'lam'))
+
+
+    def pl19922plh(self, x, y):
+        '''
+        Odwrotność pl21992 - współrzędne w układzie 1992 na phi, lam.
+
+        Parameters
+        ----------
+        x, y : FLOAT
+            [m] - współrzędne w układzie 1992
+
+        Returns
+        -------
+        phi, lam : FLOAT
+            [stopnie dziesiętne] - szerokość i długość geodezyjna
+        '''
+        phi, lam = self._gauss_kruger_odwrotne((x + 5300000) / 0.9993, (y - 500000) / 0.9993, radians(19))
+        return degrees(phi), degrees(lam)
+
+
+    def pl20002plh(self, x, y):
+        '''
+        Odwrotność pl22000 - współrzędne w układzie 2000 na phi, lam
+        (strefa z pierwszej cyfry y).
+
+        Parameters
+        ----------
+        x, y : FLOAT
+            [m] - współrzędne w układzie 2000
+
+        Returns
+        -------
+        phi, lam : FLOAT
+            [stopnie dziesiętne] - szerokość i długość geodezyjna
+        '''
+        strefa = floor(y / 1000000)
+        if not 5 <= strefa <= 8:
+            raise ValueError(f"y = {y} - easting outside PL-2000 zones 5-8")
+        phi, lam = self._gauss_kruger_odwrotne(x / 0.999923, (y - strefa * 1000000 - 500000) / 0.999923,
+                                               radians(3 * strefa))
+        return degrees(phi), degrees(lam)
+
+
+    def _macierz_neu(self, x0, y0, z0):
+        '''
+        Macierz obrotu układu topocentrycznego o środku (x0, y0, z0) - patrz _macierz_neu_srodka.
+        '''
+        return _macierz_neu_srodka(self.model, float(x0), float(y0), float(z0))
+
+
+    def xyz2neu(self, x, y, z, x0, y0, z0):
+        '''
+        Transformacja współrzędnych geocentrycznych do układu topocentrycznego 
+        NEU (NORTHING, EASTING, UP). Następuje ona przez przesunięcie początku
+        układu współrzędnych do nowego punktu centrum (x0, y0, z0) i rotację
+        o kąty (phi, lam) punktu centrum.
+
+        Parameters
+        ----------
+        x, y, z : FLOAT
+            [m] - współrzędne geocentryczne 
+        x0, y0, z0 : FOAT
+            [m] - współrzędne geocentryczne nowego srodka układu
+
+        Returns
+        -------
+        n, e, u : TUPLE
+            [m] - współrzędne topocentryczne 
+
+        '''
+        [[n, e, u]] = self.xyz2neu_batch([[x, y, z]], x0, y0, z0).tolist()
+        return n, e, u
+
+
+    def xyz2neu_batch(self, xyz, x0, y0, z0):
+        '''
+        Wersja xyz2neu dla tablicy punktów: przesunięcie wszystkich punktów
+        i jedno mnożenie przez zapamiętaną macierz obrotu środka układu.
+
+        Parameters
+        ----------
+        xyz : ARRAY lub Punkty
+            [m] - tablica (N,3) współrzędnych geocentrycznych
+        x0, y0, z0 : FLOAT
+            [m] - współrzędne geocentryczne nowego srodka układu
+
+        Returns
+        -------
+        ARRAY
+            [m] - tablica (N,3) współrzędnych topocentrycznych n, e, u
+            (dla Punkty - Punkty z kolumnami n, e, u i tymi samymi atrybutami)
+        '''
+        if isinstance(xyz, Punkty):
+            return xyz.z_wynikiem(self.xyz2neu_batch(xyz.wsp, x0, y0, z0), ('n', 'e', 'u'))
+        R = self._macierz_neu(x0, y0, z0)
+        return (np.asarray(xyz, dtype = float) - [x0, y0, z0]) @ R
+
+
+    def xyz2neu_stacje(self, xyz, id_stacji, stacje):
+        '''
+        Transformacja do układów topocentrycznych wielu stacji jednocześnie.
+        Punkty grupowane są według identyfikatora stacji, a każda grupa
+        przeliczana jest jednym mnożeniem przez macierz obrotu swojej stacji.
+
+        Parameters
+        ----------
+        xyz : ARRAY lub Punkty
+            [m] - tablica (N,3) współrzędnych geocentrycznych
+        id_stacji : ARRAY lub STR
+            tablica (N,) identyfikatorów stacji odniesienia dla kolejnych punktów;
+            dla xyz typu Punkty także nazwa pola atrybutów z identyfikatorem
+        stacje : DICT
+            identyfikator stacji -> (x0, y0, z0) [m]
+
+        Returns
+        -------
+        ARRAY
+            [m] - tablica (N,3) współrzędnych topocentrycznych n, e, u
+            (dla Punkty - Punkty z kolumnami n, e, u i tymi samymi atrybutami)
+        '''
+        if isinstance(xyz, Punkty):
+            if isinstance(id_stacji, str):
+                id_stacji = xyz[id_stacji]
+            return xyz.z_wynikiem(self.xyz2neu_stacje(xyz.wsp, id_stacji, stacje), ('n', 'e', 'u'))
+        xyz = np.asarray(xyz, dtype = float)
+        identyfikatory, numery = np.unique(np.asarray(id_stacji), return_inverse = True)
+        neu = np.empty_like(xyz)
+        kolejnosc = np.argsort(numery, kind = 'stable')
+        granice = np.searchsorted(numery[kolejnosc], np.arange(1, len(identyfikatory)))
+        for id_st, indeksy in zip(identyfikatory.tolist(), np.split(kolejnosc, granice)):
+            if id_st not in stacje:
+                raise ValueError(f"{id_st} - reference station not defined")
+            x0, y0, z0 = stacje[id_st]
+            neu[indeksy] = self.xyz2neu_batch(xyz[indeksy], x0, y0, z0)
+        return neu
+
+
+MAKS_MACIERZY_NEU = 4096       # liczba zapamiętanych środków układów NEU (stacji)
+
+
+@lru_cache(maxsize = MAKS_MACIERZY_NEU)
+def _macierz_neu_srodka(model, x0, y0, z0):
+    '''
+    Macierz obrotu układu topocentrycznego o środku (x0, y0, z0) na elipsoidzie
+    model. Zależy tylko od środka układu i elipsoidy (parametrów zarejestrowanej
+    elipsoidy nie można zmienić), więc jest wyznaczana raz. Pamięć podręczna jest
+    wspólna dla wszystkich obiektów Transformacje i ograniczona do MAKS_MACIERZY_NEU
+    ostatnio używanych środków; zwracana macierz jest tylko do odczytu.
+    '''
+    phi, lam, _ = [radians(coord) for coord in elipsoida(model).xyz2plh(x0, y0, z0)]
+    R = np.array([[-sin(phi) * cos(lam), -sin(lam), cos(phi) * cos(lam)],
+                  [-sin(phi) * sin(lam), cos(lam), cos(phi) * sin(lam)],
+                  [cos(phi), 0, sin(phi)]])
+    R.flags.writeable = False
+    return R
+
+
+class Profil:
+    def __init__(self):
+        '''
+        Pomiar czasu poszczególnych etapów przetwarzania (odczyt, parsowanie,
+        obsługa DMS, xyz2plh, odwzorowanie, pozostałe przeliczenia, formatowanie,
+        zapis) oraz licznik iteracji algorytmu Hirvonena. Czasy etapów są
+        rozłączne - czas etapu zagnieżdżonego nie jest doliczany do etapu nadrzędnego.
+        '''
+        self.etapy = {}          # nazwa -> [czas rzeczywisty, czas procesora]
+        self.iteracje = {}       # liczba iteracji -> liczba punktów
+        self._stos = []
+
+
+    @contextmanager
+    def etap(self, nazwa):
+        teraz = (time.perf_counter(), time.process_time())
+        if self._stos:
+            self._dolicz(self._stos[-1], teraz)
+        self._stos.append([nazwa, teraz])
+        try:
+            yield
+        finally:
+            koniec = (time.perf_counter(), time.process_time())
+            self._dolicz(self._stos.pop(), koniec)
+            if self._stos:
+                self._stos[-1][1] = koniec
+
+
+    def _dolicz(self, wpis, koniec):
+        nazwa, (start_wall, start_cpu) = wpis
+        czasy = self.etapy.setdefault(nazwa, [0.0, 0.0])
+        czasy[0] += koniec[0] - start_wall
+        czasy[1] += koniec[1] - start_cpu
+
+
+    def dodaj_iteracje(self, liczby):
+        '''
+        Dolicza do histogramu liczby iteracji Hirvonena kolejnych punktów.
+        '''
+        for k, ile in enumerate(np.bincount(liczby).tolist()):
+            if ile:
+                self.iteracje[k] = self.iteracje.get(k, 0) + ile
+
+
+    def dolacz(self, raport):
+        '''
+        Dolicza pomiary z innego procesu (słownik zwrócony przez raport).
+        '''
+        for nazwa, czasy in raport['stages'].items():
+            suma = self.etapy.setdefault(nazwa, [0.0, 0.0])
+            suma[0] += czasy['wall_s']
+            suma[1] += czasy['cpu_s']
+        for k, ile in raport['hirvonen_iterations'].items():
+            self.iteracje[int(k)] = self.iteracje.get(int(k), 0) + ile
+
+
+    def raport(self):
+        return {'stages': {nazwa: {'wall_s': w, 'cpu_s': c} for nazwa, (w, c) in self.etapy.items()},
+                'hirvonen_iterations': {str(k): self.iteracje[k] for k in sorted(self.iteracje)}}
+
+
+_profil = None                     # aktywny obiekt Profil (tylko przy --profile)
+_BEZ_PROFILU = nullcontext()
+
+
+def _etap(nazwa):
+    '''
+    Kontekst mierzący czas etapu nazwa, jeśli włączone jest profilowanie.
+    '''
+    if _profil is None:
+        return _BEZ_PROFILU
+    return _profil.etap(nazwa)
+
+
+def _szczyt_rss():
+    '''
+    Szczyt zużycia pamięci [MB] bieżącego procesu i zakończonych procesów potomnych
+    (None, jeśli moduł resource nie jest dostępny - np. w systemie Windows).
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+    dzielnik = 2**20 if sys.platform == 'darwin' else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / dzielnik
+
+
+_RODZAJE = ('xyz', 'plh', 'pl1992', 'pl2000')
+
+
+def _uklad(nazwa):
+    '''
+    Rozkłada nazwę układu współrzędnych postaci 'rodzaj:model' (np. 'plh:krasowski',
+    'pl2000:grs80') na parę (rodzaj, model).
+    '''
+    rodzaj, _, model = nazwa.partition(':')
+    model = model.lower()
+    if rodzaj not in _RODZAJE:
+        raise NotImplementedError(f'{rodzaj} - coordinate type not recognized, expected one of {_RODZAJE}')
+    _datum(model)
+    return rodzaj, model
+
+
+ZASIEG_SIATKI = (49.0, 55.0, 14.0, 24.5)   # [stopnie] - phi od, phi do, lam od, lam do: obszar Polski
+STREFY_SIATKI = {'pl1992': ((14.0, 24.5, 19.0),),
+                 'pl2000': ((14.0, 16.5, 15.0), (16.5, 19.5, 18.0), (19.5, 22.5, 21.0), (22.5, 24.5, 24.0))}
+_WERSJA_SIATKI = 1
+# punkty kontroli błędu w każdej komórce - w tym 1/2 -+ 1/(2 sqrt 3), ekstrema
+# składnika s (s - 1/2) (s - 1) błędu interpolacji kwadratowej
+_PUNKTY_KONTROLI = (0.1, 0.21132486540518713, 0.35, 0.65, 0.7886751345948129, 0.9)
+
+
+class SiatkaOdwzorowania:
+    """
+    Siatka interpolacyjna odwzorowania 1992 lub 2000 dla jednej elipsoidy.
+
+    Obszar ZASIEG_SIATKI podzielony jest na kwadratowe komórki o boku krok
+    stopni (0.5 / 2^k, więc granice stref układu 2000 są granicami komórek).
+    W każdej komórce x i y są wielomianami stopnia 2 względem obu współrzędnych
+    (interpolacja Lagrange'a w 3 x 3 węzłach), zapisanymi jako współczynniki
+    wsp[wyjście, potęga u, potęga v, komórka] - przeliczenie punktu to odczyt
+    współczynników jego komórki i schemat Hornera.
+    """
+    def __init__(self, uklad, model, krok, wsp, blad_maks):
+        self.uklad = uklad
+        self.model = model
+        self.krok = krok
+        self.wsp = wsp
+        self.blad_maks = blad_maks     # [m] - największy błąd stwierdzony przy budowie siatki
+        self.wiersze = int(round((ZASIEG_SIATKI[1] - ZASIEG_SIATKI[0]) / krok))
+        self.kolumny = int(round((ZASIEG_SIATKI[3] - ZASIEG_SIATKI[2]) / krok))
+
+
+    @classmethod
+    def zbuduj(cls, elip, uklad, dokladnosc = DOKLADNOSC_SIATKI, krok_min = 0.5 / 2**6):
+        '''
+        Buduje siatkę o największym kroku, dla którego błąd względem wzorów
+        ścisłych w punktach kontrolnych każdej komórki (_PUNKTY_KONTROLI
+        w obu kierunkach) nie przekracza połowy dopuszczalnego błędu.
+
+        Parameters
+        ----------
+        elip : Transformacje
+            elipsoida odwzorowania
+        uklad : STR
+            'pl1992' lub 'pl2000'
+        dokladnosc : FLOAT - optional
+            [m] - dopuszczalny błąd
+        krok_min : FLOAT - optional
+            [stopnie] - najmniejszy dopuszczalny krok siatki
+
+        Returns
+        -------
+        SiatkaOdwzorowania
+        '''
+        if uklad not in STREFY_SIATKI:
+            raise NotImplementedError(f'{uklad} - projection grid not implemented, expected pl1992 or pl2000')
+        if not dokladnosc > 0:
+            raise ValueError(f'{dokladnosc} - grid accuracy must be positive')
+        krok = 0.5
+        while True:
+            siatka = cls(uklad, elip.model, krok, cls._wspolczynniki(elip, uklad, krok), None)
+            siatka.blad_maks = siatka._sprawdz(elip)
+            if siatka.blad_maks <= dokladnosc / 2:
+                return siatka
+            # błąd maleje jak krok^3 - przy krok_min byłby większy od dopuszczalnego
+            if krok / 2 < krok_min or siatka.blad_maks * (krok_min / krok)**3 > dokladnosc:
+                raise ValueError(f'{dokladnosc} m - grid accuracy not attainable with step {krok_min} deg')
+            krok /= 2
+
+
+    @staticmethod
+    def _wspolczynniki(elip, uklad, krok):
+        phi0, phi1, lam0, _ = ZASIEG_SIATKI
+        wiersze = int(round((phi1 - phi0) / krok))
+        phi = phi0 + np.arange(2 * wiersze + 1) * (krok / 2)
+        bloki = []
+        for lam_od, lam_do, poludnik in STREFY_SIATKI[uklad]:
+            # węzły strefy (z brzegowymi) liczone względem jej południka osiowego
+            kolumny = int(round((lam_do - lam_od) / krok))
+            lam = lam_od + np.arange(2 * kolumny + 1) * (krok / 2)
+            P, L = np.meshgrid(phi, lam, indexing = 'ij')
+            if uklad == 'pl1992':
+                x, y = elip.pl21992_batch(P, L)
+            else:
+                x, y = elip._pl22000_strefa(P, L, poludnik)
+            F = np.stack([x, y])
+            # wielomiany Lagrange'a w węzłach 0, 1/2, 1: najpierw względem v, potem u
+            V = np.stack(_kwadratowa(F[:, :, 0:-1:2], F[:, :, 1::2], F[:, :, 2::2]), axis = 1)
+            bloki.append(np.stack(_kwadratowa(V[:, :, 0:-1:2], V[:, :, 1::2], V[:, :, 2::2]), axis = 1))
+        wsp = np.concatenate(bloki, axis = -1)          # (2, 3, 3, wiersze, kolumny)
+        return np.ascontiguousarray(wsp.reshape(2, 3, 3, -1))
+
+
+    def _sprawdz(self, elip):
+        '''
+        Największy błąd [m] siatki w punktach kontrolnych wszystkich komórek.
+        '''
+        s = np.array(_PUNKTY_KONTROLI)
+        lam = ZASIEG_SIATKI[2] + (np.arange(self.kolumny)[:, None] + s).ravel() * self.krok
+        odwzoruj = elip.pl21992_batch if self.uklad == 'pl1992' else elip.pl22000_batch
+        blad = 0.0
+        # po kilka wierszy komórek - najwyżej ok. miliona punktów naraz
+        krok_wierszy = max(1, 2**20 // (len(s)**2 * self.kolumny))
+        for w in range(0, self.wiersze, krok_wierszy):
+            wiersze = np.arange(w, min(w + krok_wierszy, self.wiersze))
+            phi = ZASIEG_SIATKI[0] + (wiersze[:, None] + s).ravel() * self.krok
+            P, L = [t.ravel() for t in np.meshgrid(phi, lam, indexing = 'ij')]
+            x, y, _ = self.przelicz(P, L)
+            xs, ys = odwzoruj(P, L)
+            blad = max(blad, np.abs(x - xs).max(), np.abs(y - ys).max())
+        return float(blad)
+
+
+    def przelicz(self, phi, lam):
+        '''
+        Interpolacja współrzędnych x, y dla tablic (N,) phi, lam [stopnie dziesiętne].
+
+        Returns
+        -------
+        x, y : ARRAY
+            [m] - współrzędne w układzie 1992 lub 2000
+        poza : ARRAY or None
+            maska punktów poza siatką (ich x, y są nieokreślone) albo None
+        '''
+        # krok jest potęgą 2, więc u i v wyznaczane są bez błędu zaokrąglenia
+        # i punkt na granicy stref 2000 trafia do komórki swojej strefy
+        u = phi - ZASIEG_SIATKI[0]
+        u /= self.krok
+        v = lam - ZASIEG_SIATKI[2]
+        v /= self.krok
+        w = np.floor(u)
+        k = np.floor(v)
+        poza = ~((w >= 0) & (w < self.wiersze) & (k >= 0) & (k < self.kolumny))
+        if poza.any():
+            w[poza] = 0
+            k[poza] = 0
+            u[poza] = 0
+            v[poza] = 0
+        else:
+            poza = None
+        u -= w
+        v -= k
+        w *= self.kolumny
+        w += k
+        komorka = w.astype(np.intp)
+        wyniki = []
+        for wsp in self.wsp:
+            f = _horner(wsp[2], komorka, v)
+            f *= u
+            f += _horner(wsp[1], komorka, v)
+            f *= u
+            f += _horner(wsp[0], komorka, v)
+            wyniki.append(f)
+        return wyniki[0], wyniki[1], poza
+
+
+    def zapisz(self, sciezka):
+        '''
+        Zapisuje siatkę do pliku .npz (zapis do pliku tymczasowego i zamiana,
+        więc równoległe procesy nie odczytają niepełnego pliku).
+        '''
+        import tempfile
+        katalog = os.path.dirname(os.path.abspath(sciezka))
+        os.makedirs(katalog, exist_ok = True)
+        uchwyt, tymczasowy = tempfile.mkstemp(suffix = '.npz', dir = katalog)
+        try:
+            with os.fdopen(uchwyt, 'wb') as f:
+                np.savez(f, wsp = self.wsp, meta = np.array([_WERSJA_SIATKI, self.krok, self.blad_maks]),
+                         uklad = self.uklad, model = self.model, elipsoida = np.array(_ELIPSOIDY[self.model][:2]))
+            os.replace(tymczasowy, sciezka)
+        except BaseException:
+            os.remove(tymczasowy)
+            raise
+
+
+    @classmethod
+    def wczytaj(cls, sciezka, uklad, model):
+        '''
+        Wczytuje siatkę zapisaną metodą zapisz; zwraca None, jeśli plik nie
+        istnieje, jest uszkodzony albo opisuje inną siatkę lub wersję (także
+        elipsoidę o tej samej nazwie, ale innych półosiach z innego rejestru).
+        '''
+        try:
+            with np.load(sciezka) as dane:
+                wersja, krok, blad_maks = dane['meta']
+                if wersja != _WERSJA_SIATKI or str(dane['uklad']) != uklad or str(dane['model']) != model:
+                    return None
+                if tuple(dane['elipsoida'].tolist()) != _ELIPSOIDY[model][:2]:
+                    return None
+                siatka = cls(uklad, model, float(krok), dane['wsp'], float(blad_maks))
+        except (OSError, KeyError, ValueError):
+            return None
+        if siatka.wsp.shape != (2, 3, 3, siatka.wiersze * siatka.kolumny):
+            return None
+        return siatka
+
+
+def _kwadratowa(f0, f_pol, f1):
+    '''
+    Współczynniki (c0, c1, c2) wielomianu c0 + c1 s + c2 s^2 o wartościach f0, f_pol, f1 w s = 0, 1/2, 1.
+    '''
+    return f0, 4 * f_pol - 3 * f0 - f1, 2 * f0 + 2 * f1 - 4 * f_pol
+
+
+def _horner(wsp, komorka, v):
+    # wsp[0] + wsp[1] v + wsp[2] v^2 dla współczynników komórek punktów
+    f = wsp[2].take(komorka)
+    f *= v
+    f += wsp[1].take(komorka)
+    f *= v
+    f += wsp[0].take(komorka)
+    return f
+
+
+@lru_cache(maxsize = None)
+def siatka_odwzorowania(model, uklad, dokladnosc = DOKLADNOSC_SIATKI, katalog = None):
+    '''
+    Siatka odwzorowania uklad ('pl1992', 'pl2000') dla elipsoidy model, zapamiętywana
+    w pamięci oraz w pliku <katalog>/<uklad>_<model>_<dokladnosc>.npz, odczytywanym przy
+    kolejnych uruchomieniach. Domyślny katalog to zmienna środowiskowa SKRYPT_GRID_CACHE
+    albo ~/.cache/skrypt; pusty napis wyłącza zapis na dysku.
+    '''
+    if katalog is None:
+        katalog = os.environ.get('SKRYPT_GRID_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'skrypt'))
+    sciezka = os.path.join(katalog, f'{uklad}_{model}_{dokladnosc:g}.npz') if katalog else None
+    siatka = SiatkaOdwzorowania.wczytaj(sciezka, uklad, model) if sciezka else None
+    if siatka is None:
+        siatka = SiatkaOdwzorowania.zbuduj(elipsoida(model), uklad, dokladnosc)
+        if sciezka:
+            try:
+                siatka.zapisz(sciezka)
+            except OSError:
+                pass           # katalog tylko do odczytu - siatka pozostaje w pamięci
+    return siatka
+
+
+class LancuchTransformacji:
+    def __init__(self, zrodlo, cel, rozmiar_bloku = 65536, metoda = 'hirvonen', tolerancja = TOLERANCJA_HIRVONENA,
+                 odwzorowanie = 'exact', dokladnosc = DOKLADNOSC_SIATKI, stan = None):
+        '''
+        Złożona transformacja pomiędzy dwoma układami współrzędnych, budowana raz
+        i wielokrotnie stosowana do tablic punktów. Przy tworzeniu łańcucha
+        ustalana jest lista etapów (plh2xyz, transformacja Helmerta, xyz2plh,
+        odwzorowanie) wraz z obiektami Transformacje i ich stałymi. Metoda
+        przelicz wykonuje wszystkie etapy kolejno dla porcji po rozmiar_bloku
+        punktów, więc wyniki pośrednie nigdy nie istnieją dla całego zbioru naraz.
+
+        Parameters
+        ----------
+        zrodlo, cel : STR
+            układ wejściowy i wyjściowy w postaci 'rodzaj:model', gdzie rodzaj to
+            xyz, plh, pl1992 lub pl2000, a model to wgs84, grs80, krasowski lub
+            elipsoida z rejestru (zmiana układu odniesienia - patrz transformacja_datum);
+            dla pl1992 i pl2000 na wejściu tablica zawiera x, y i wysokość h,
+            przenoszoną do etapów plh
+        rozmiar_bloku : INT - optional
+            liczba punktów przetwarzanych przez wszystkie etapy jednocześnie
+        metoda, tolerancja, stan : optional
+            metoda, tolerancja i stan metody warm etapu xyz2plh (patrz Transformacje.xyz2plh_batch)
+        odwzorowanie, dokladnosc : optional
+            metoda ('exact' lub 'grid') i dopuszczalny błąd [m] etapu pl1992/pl2000
+            (patrz Transformacje.pl21992_batch)
+        '''
+        rodzaj_z, model_z = _uklad(zrodlo)
+        rodzaj_c, model_c = _uklad(cel)
+        self.zrodlo = zrodlo
+        self.cel = cel
+        self.rozmiar_bloku = rozmiar_bloku
+        self.wymiar = 2 if rodzaj_c in ('pl1992', 'pl2000') else 3
+        elip_z = elipsoida(model_z)
+        elip_c = elipsoida(model_c)
+        zmiana_datum = _datum(model_z) != _datum(model_c)
+
+        self.etapy = []
+        rodzaj = rodzaj_z
+        if rodzaj in ('pl1992', 'pl2000'):
+            odwrotne = elip_z.pl19922plh_batch if rodzaj == 'pl1992' else elip_z.pl20002plh_batch
+            self.etapy.append(lambda blok: np.column_stack(odwrotne(blok[:, 0], blok[:, 1]) + (blok[:, 2],)))
+            rodzaj = 'plh'
+        if rodzaj == 'plh' and (zmiana_datum or model_z != model_c or rodzaj_c == 'xyz'):
+            self.etapy.append(lambda blok: elip_z.plh2xyz_batch(blok[:, 0], blok[:, 1], blok[:, 2]))
+            rodzaj = 'xyz'
+        if rodzaj == 'xyz' and zmiana_datum:
+            # przez układy pośrednie z rejestru - jedna złożona macierz
+            helmert = transformacja_datum(_datum(model_z), _datum(model_c)).przelicz
+            # wynik plh2xyz jest nową tablicą - można go nadpisać; danych wejściowych - nie
+            if self.etapy:
+                self.etapy.append(lambda blok: helmert(blok, out = blok))
+            else:
+                self.etapy.append(helmert)
+        if rodzaj == 'xyz' and rodzaj_c != 'xyz':
+            self.etapy.append(lambda blok: np.column_stack(elip_c.xyz2plh_batch(blok, metoda = metoda,
+                                                                               tolerancja = tolerancja,
+                                                                               stan = stan)))
+            rodzaj = 'plh'
+        if rodzaj_c in ('pl1992', 'pl2000'):
+            odwzoruj = elip_c.pl21992_batch if rodzaj_c == 'pl1992' else elip_c.pl22000_batch
+            self.etapy.append(lambda blok: np.column_stack(odwzoruj(blok[:, 0], blok[:, 1], metoda = odwzorowanie,
+                                                                    dokladnosc = dokladnosc)))
+
+
+    def przelicz(self, wsp, out = None):
+        '''
+        Przelicza tablicę punktów z układu zrodlo do układu cel.
+
+        Parameters
+        ----------
+        wsp : ARRAY
+            tablica (N,3) - x, y, z [m], phi, lam [stopnie dziesiętne], h [m]
+            lub x, y [m] w układzie 1992/2000 i h [m]
+        out : ARRAY - optional
+            tablica (N,3) lub (N,2) float64 na wynik
+
+        Returns
+        -------
+        ARRAY
+            tablica (N,3) - xyz lub plh, albo (N,2) - x, y w układzie 1992/2000
+        '''
+        wsp = np.asarray(wsp, dtype = float)
+        if wsp.ndim != 2 or wsp.shape[1] != 3:
+            raise ValueError(f"expected (N,3) array, got shape {wsp.shape}")
+        if out is None:
+            out = np.empty((len(wsp), self.wymiar))
+        for i in range(0, len(wsp), self.rozmiar_bloku):
+            blok = wsp[i:i + self.rozmiar_bloku]
+            for etap in self.etapy:
+                blok = etap(blok)
+            out[i:i + self.rozmiar_bloku] = blok
+        return out
+
+
+ROZMIAR_BLOKU = 100000   # liczba wierszy pliku wejściowego przetwarzanych jednocześnie
+
+
+def _czytaj_bloki(f, rozmiar_bloku = ROZMIAR_BLOKU):
+    '''
+    Generator zwracający kolejne porcje (listy) co najwyżej rozmiar_bloku linii
+    z otwartego pliku - w pamięci znajduje się tylko jedna porcja naraz.
+    '''
+    while True:
+        with _etap('read'):
+            linie = list(islice(f, rozmiar_bloku))
+        if not linie:
+            return
+        yield linie
+
+
+def _wczytaj_blok(linie, input_format = 'dec_degrees', etykiety = 0, koncowe = 0, kolumny = ('x', 'y', 'z')):
+    '''
+    Zamienia listę linii pliku wejściowego na tablicę (N,3) float64.
+    Puste linie są pomijane. Jeśli etykiety lub koncowe > 0, początkowe
+    i końcowe kolumny każdej linii traktowane są jako tekst (np. identyfikator
+    punktu lub stacji, epoka, kod) i zwracane jako atrybuty atr1, atr2...
+    zbioru Punkty.
+
+    Parameters
+    ----------
+    linie : LIST
+        linie tekstu z wartościami rozdzielonymi przecinkiem
+    input_format : STR - optional, default dec_degrees
+        dec_degrees - stopnie dziesiętne lub metry
+        dms - phi i lam w postaci stopnie:minuty:sekundy
+    etykiety, koncowe : INT - optional, default 0
+        liczba początkowych i końcowych kolumn tekstowych
+    kolumny : TUPLE - optional
+        nazwy kolumn współrzędnych zwracanego zbioru Punkty
+
+    Returns
+    -------
+    ARRAY lub Punkty
+        tablica (N,3) float64 lub - gdy są kolumny tekstowe - Punkty
+    '''
+    if etykiety or koncowe:
+        linie = [line for line in linie if line.strip()]
+        if not linie:
+            return Punkty(np.empty((0, 3)), {f'atr{i + 1}': np.array([], dtype = str)
+                                             for i in range(etykiety + koncowe)}, kolumny)
+        # liczba kolumn z pierwszej linii - współrzędne (także dms) zajmują trzy środkowe
+        n = linie[0].count(',') + 1
+        tekstowe = list(range(etykiety)) + list(range(n - koncowe, n))
+        teksty = np.char.strip(np.loadtxt(linie, delimiter = ',', usecols = tekstowe, dtype = str,
+                                          comments = None, ndmin = 2))
+        if input_format == 'dec_degrees':
+            wsp = np.loadtxt(linie, delimiter = ',', usecols = range(etykiety, n - koncowe), comments = None, ndmin = 2)
+        else:
+            wsp = _wczytaj_blok([line.strip().split(',', etykiety)[-1].rsplit(',', koncowe)[0] for line in linie],
+                                input_format)
+        return Punkty(wsp, {f'atr{i + 1}': teksty[:, i] for i in range(etykiety + koncowe)}, kolumny)
+    if input_format == 'dec_degrees':
+        linie = [line for line in linie if line.strip()]
+        if not linie:
+            return np.empty((0, 3))
+        return np.loadtxt(linie, delimiter = ',', ndmin = 2)
+    elif input_format == 'dms':
+        # dd:mm:ss.ss,dd:mm:ss.ss,h -> 7 kolumn liczbowych
+        linie = [line.replace(':', ',') for line in linie if line.strip()]
+        if not linie:
+            return np.empty((0, 3))
+        pola = np.loadtxt(linie, delimiter = ',', ndmin = 2)
+        if pola.shape[1] != 7:
+            raise ValueError(f"expected dd:mm:ss,dd:mm:ss,h rows, got {pola.shape[1]} fields")
+        return np.column_stack((dms2deg(pola[:, 0], pola[:, 1], pola[:, 2]),
+                                dms2deg(pola[:, 3], pola[:, 4], pola[:, 5]),
+                                pola[:, 6]))
+    else:
+        raise NotImplementedError(f'Invalid input format. Input format must be dec_degrees or dms.')
+
+
+def _formatuj_blok(wynik, fmt, przed = (), po = ()):
+    '''
+    Formatuje cały blok wyników jednym wywołaniem operatora % - każda wartość
+    według fmt, wartości w wierszu rozdzielone przecinkiem, wiersze znakiem nowej linii.
+
+    Parameters
+    ----------
+    wynik : ARRAY
+        tablica (N,k) liczb lub napisów
+    fmt : STR lub LIST
+        format pojedynczej wartości, np. '%11.3f', '%.3f', '%r', '%s',
+        albo lista formatów kolejnych kolumn
+    przed, po : LIST - optional
+        tablice (N,) atrybutów (np. identyfikatorów) wypisywanych przed
+        i za wynikami, każda jako kolumna '%s'
+    '''
+    n, k = wynik.shape
+    wzor = ','.join(fmt if isinstance(fmt, list) else [fmt] * k)
+    if not (przed or po):
+        return ((wzor + '\n') * n) % tuple(wynik.ravel().tolist())
+    tabela = np.empty((n, len(przed) + k + len(po)), dtype = object)
+    tabela[:, len(przed):len(przed) + k] = wynik
+    for j, kolumna in enumerate(przed):
+        tabela[:, j] = kolumna
+    for j, kolumna in enumerate(po):
+        tabela[:, len(przed) + k + j] = kolumna
+    wzor = ','.join(['%s'] * len(przed) + [wzor] + ['%s'] * len(po)) + '\n'
+    return (wzor * n) % tuple(tabela.ravel().tolist())
+
+
+def _opis_operacji(opcje):
+    '''
+    Buduje opis operacji wybranej w wierszu poleceń.
+
+    Parameters
+    ----------
+    opcje : DICT
+        operacja - nazwa funkcji (xyz2plh, plh2xyz, xyzGRS2KRA, xyzKRA2GRS, pl21992, pl22000,
+            pl19922plh, pl20002plh, xyz2neu)
+        model - model elipsoidy (wgs84, grs80, krasowski)
+        dms - dla xyz2plh, pl19922plh, pl20002plh: wynik w stopniach, minutach, sekundach
+        metoda, tolerancja - dla xyz2plh (i łańcuchów pl21992/pl22000, pl19922plh/pl20002plh
+            z elipsoidą Krasowskiego): metoda przeliczenia xyz -> plh i tolerancja iteracji [rad]
+        odwzorowanie, dokladnosc_siatki - dla pl21992/pl22000: 'exact' lub 'grid'
+            i dopuszczalny błąd siatki [m]
+        x0, y0, z0 - dla xyz2neu: środek układu topocentrycznego
+        stacje - dla xyz2neu: słownik identyfikator -> (x0, y0, z0); wtedy
+            pierwsza kolumna pliku wejściowego zawiera identyfikator stacji
+
+    Returns
+    -------
+    DICT
+        plik - nazwa pliku wynikowego
+        naglowek - pierwsza linia pliku wynikowego
+        przelicz - funkcja przeliczająca tablicę (N,3) na tablicę (N,k)
+        format - format pojedynczej wartości w pliku wynikowym
+        kolumny - liczba kolumn wyniku
+        etykiety - liczba początkowych kolumn tekstowych pliku wejściowego,
+            przekazywanych do funkcji przelicz i przepisywanych do wyniku (opcjonalnie)
+        cieply_start - dla metody warm: lista stanów StanCieplegoStartu używanych
+            przez przelicz (opcjonalnie, patrz _ustaw_cieply_start)
+    '''
+    operacja = opcje['operacja']
+    model = opcje.get('model')
+    if operacja in ('xyzGRS2KRA', 'xyzKRA2GRS'):
+        grs = elipsoida('grs80')
+        if operacja == 'xyzGRS2KRA':
+            przelicz = grs.xyzGRS2KRA_batch
+        else:
+            przelicz = grs.xyzKRA2GRS_batch
+        return {'plik': f'result_{operacja}.txt', 'naglowek': 'x[m], y[m], z[m] \n',
+                'przelicz': przelicz, 'format': '%11.3f', 'kolumny': 3}
+
+    elip = elipsoida(model)
+    metoda = opcje.get('metoda') or 'hirvonen'
+    # jawne 0 jest poprawną wartością - domyślna tylko dla brakującej opcji
+    tolerancja = opcje['tolerancja'] if opcje.get('tolerancja') is not None else TOLERANCJA_HIRVONENA
+    dokladnosc = opcje['dokladnosc_siatki'] if opcje.get('dokladnosc_siatki') is not None else DOKLADNOSC_SIATKI
+    stan = StanCieplegoStartu() if metoda == 'warm' else None
+    if operacja == 'xyz2plh':
+        if opcje.get('dms'):
+            przelicz = lambda blok: np.column_stack(elip.xyz2plh_batch(blok, output = 'dms', metoda = metoda,
+                                                                      tolerancja = tolerancja, stan = stan))
+            fmt = '%s'
+        else:
+            przelicz = lambda blok: np.column_stack(elip.xyz2plh_batch(blok, metoda = metoda, tolerancja = tolerancja,
+                                                                      stan = stan))
+            fmt = '%r'
+        return _z_cieplym_startem({'plik': 'result_xyz2plh.txt', 'naglowek': 'phi[deg], lam[deg], h[m] \n',
+                                   'przelicz': przelicz, 'format': fmt, 'kolumny': 3}, [stan])
+    elif operacja == 'plh2xyz':
+        return {'plik': 'result_plh2xyz.txt', 'naglowek': 'x[m], y[m], z[m] \n',
+                'przelicz': lambda blok: elip.plh2xyz_batch(*blok.T), 'format': '%11.3f', 'kolumny': 3}
+    elif operacja in ('pl21992', 'pl22000'):
+        # dla elipsoid spoza układu GRS-80 (np. Krasowskiego) łańcuch obejmuje zmianę układu odniesienia
+        model_celu = _elipsoida_odwzorowan(model)
+        lancuch = LancuchTransformacji(f'plh:{model}', f'{operacja.replace("pl2", "pl")}:{model_celu}',
+                                       metoda = metoda, tolerancja = tolerancja, stan = stan,
+                                       odwzorowanie = opcje.get('odwzorowanie') or 'exact',
+                                       dokladnosc = dokladnosc)
+        return _z_cieplym_startem({'plik': f'result_{operacja}.txt', 'naglowek': 'x[m], y[m] \n',
+                                   'przelicz': lancuch.przelicz,
+                                   'format': '%.3f' if operacja == 'pl21992' else '%11.3f', 'kolumny': 2}, [stan])
+    elif operacja in OPERACJE_PL:
+        # współrzędne 1992 i 2000 są na GRS-80 - dla innych układów (np. Krasowskiego) łańcuch zmienia układ odniesienia
+        model_zrodla = _elipsoida_odwzorowan(model)
+        lancuch = LancuchTransformacji(f'{operacja[:6]}:{model_zrodla}', f'plh:{model}',
+                                       metoda = metoda, tolerancja = tolerancja, stan = stan)
+        if opcje.get('dms'):
+            przelicz = lambda blok: np.column_stack(_plh_dms(*lancuch.przelicz(blok).T))
+            fmt = '%s'
+        else:
+            przelicz = lancuch.przelicz
+            fmt = '%r'
+        return _z_cieplym_startem({'plik': f'result_{operacja}.txt', 'naglowek': 'phi[deg], lam[deg], h[m] \n',
+                                   'przelicz': przelicz, 'format': fmt, 'kolumny': 3}, [stan])
+    elif operacja == 'xyz2neu':
+        if opcje.get('stacje') is not None:
+            stacje = opcje['stacje']
+            return {'plik': 'result_xyz2neu.txt', 'naglowek': 'id, n[m], e[m], u[m] \n',
+                    'przelicz': lambda blok, id_stacji: elip.xyz2neu_stacje(blok, id_stacji, stacje),
+                    'format': '%.3f', 'kolumny': 3, 'etykiety': 1}
+        x0, y0, z0 = opcje['x0'], opcje['y0'], opcje['z0']
+        return {'plik': 'result_xyz2neu.txt', 'naglowek': 'n[m], e[m], u[m] \n',
+                'przelicz': lambda blok: elip.xyz2neu_batch(blok, x0, y0, z0), 'format': '%.3f', 'kolumny': 3}
+    else:
+        raise NotImplementedError(f'{operacja} - operation not recognized')
+
+
+def _z_cieplym_startem(opis, stany):
+    '''
+    Dołącza do opisu operacji stany metody warm (pomijając None).
+    '''
+    stany = [stan for stan in stany if stan is not None]
+    if stany:
+        opis['cieply_start'] = stany
+    return opis
+
+
+def _ustaw_cieply_start(operacja, wiersz, kotwice = None):
+    '''
+    Ustawia stany metody warm operacji przed przeliczeniem fragmentu zbioru
+    punktów: wiersz - numer pierwszego punktu fragmentu w całym zbiorze,
+    kotwice - szerokości [rad] ostatnich punktów kotwicznych przed fragmentem
+    (patrz _kotwice) lub None. Dla innych metod nic nie zmienia.
+    '''
+    for i, stan in enumerate(operacja.get('cieply_start', [])):
+        stan.wiersz = wiersz
+        stan.kotwica = kotwice[i] if kotwice else None
+
+
+def _kotwice(operacja):
+    '''
+    Szerokości [rad] ostatnich punktów kotwicznych metody warm (patrz _ustaw_cieply_start).
+    '''
+    return [stan.kotwica for stan in operacja.get('cieply_start', [])]
+
+
+OPERACJE_XYZ = ('xyz2plh', 'xyzGRS2KRA', 'xyzKRA2GRS', 'xyz2neu')   # operacje na współrzędnych xyz
+OPERACJE_PL = ('pl19922plh', 'pl20002plh')    # operacje na współrzędnych x, y układów 1992 i 2000 (z wysokością h)
+
+
+def _przygotuj_operacje(opcje):
+    '''
+    Opis operacji (patrz _opis_operacji, a dla kilku operacji -
+    _przygotuj_operacje_laczone) uzupełniony o kolumny atrybutów przepisywane
+    z pliku wejściowego do wyniku.
+
+    Parameters
+    ----------
+    opcje : DICT
+        jak w _opis_operacji oraz (opcjonalnie):
+        operacje - lista kilku operacji wykonywanych razem
+        przenoszone - (N, M): liczba początkowych i końcowych kolumn tekstowych
+            wejścia przepisywanych do wyniku; przy stacjach N >= 1, bo pierwsza
+            kolumna to identyfikator stacji
+        nazwy_przenoszonych - nazwy tych kolumn w nagłówku wyniku
+        atrybuty - typ pól atrybutów wejściowej tablicy rekordów (.npy)
+
+    Returns
+    -------
+    DICT
+        opis jak w _opis_operacji oraz:
+        wejscie - nazwy kolumn współrzędnych wejścia: x, y, z, x, y, h albo phi, lam, h
+        przenoszone - (N, M) dla tej operacji
+        nazwy_przenoszonych - nazwy wszystkich kolumn atrybutów
+        typ_rekordow - typ wynikowej tablicy rekordów (dla wejścia z rekordami)
+    '''
+    operacje = opcje.get('operacje') or [opcje['operacja']]
+    opis = _przygotuj_operacje_laczone(opcje) if len(operacje) > 1 else _opis_operacji(opcje)
+    stacje = opcje.get('stacje') is not None
+    przed, po = opcje.get('przenoszone') or (0, 0)
+    # bez jawnie przenoszonych kolumn początkowych przepisywany jest tylko identyfikator stacji
+    opis['przenoszone'] = (max(przed, int(stacje)) if przed else opis.get('etykiety', 0), po)
+    opis['nazwy_przenoszonych'] = list(opcje.get('nazwy_przenoszonych') or
+                                       ['id' if stacje and i == 0 else f'atr{i + 1}'
+                                        for i in range(max(przed, int(stacje)) + po)])
+    opis['wejscie'] = _kolumny_wejscia(opcje)
+    if opcje.get('atrybuty') is not None:
+        opis['typ_rekordow'] = Punkty.typ_rekordow(opcje['atrybuty'], _nazwy_wyniku(opis))
+    return opis
+
+
+def _kolumny_wejscia(opcje):
+    '''
+    Nazwy kolumn współrzędnych wejścia operacji: x, y, z, x, y, h albo phi, lam, h.
+    '''
+    operacje = opcje.get('operacje') or [opcje['operacja']]
+    if any(op in OPERACJE_PL for op in operacje):
+        return ('x', 'y', 'h')
+    return ('x', 'y', 'z') if any(op in OPERACJE_XYZ for op in operacje) else ('phi', 'lam', 'h')
+
+
+def _nazwy_wyniku(opis):
+    '''
+    Nazwy kolumn wyniku operacji (z nagłówka, bez jednostek i identyfikatora stacji).
+    '''
+    return [nazwa.strip().split('[')[0] for nazwa in opis['naglowek'].split(',')
+            if nazwa.strip() and nazwa.strip() != 'id']
+
+
+def _naglowek_wyniku(opis):
+    '''
+    Pierwsza linia pliku wynikowego: nazwy przenoszonych kolumn początkowych,
+    kolumn wyniku i przenoszonych kolumn końcowych.
+    '''
+    przed, po = opis['przenoszone']
+    if not (przed or po):
+        return opis['naglowek']
+    nazwy = opis['nazwy_przenoszonych']
+    wynik = [nazwa.strip() for nazwa in opis['naglowek'].split(',') if nazwa.strip() != 'id']
+    return ', '.join(nazwy[:przed] + wynik + nazwy[len(nazwy) - po:]) + ' \n'
+
+
+def _atrybuty_wyniku(opis, punkty):
+    '''
+    Tablice atrybutów zapisywanych przed i za kolumnami wyniku operacji.
+    '''
+    if punkty is None:
+        return [], []
+    przed, po = opis['przenoszone']
+    nazwy = punkty.atrybuty.dtype.names
+    return [punkty.atrybuty[n] for n in nazwy[:przed]], [punkty.atrybuty[n] for n in nazwy[len(nazwy) - po:]]
+
+
+class _WspolrzednePosrednie:
+    """
+    Współrzędne jednej porcji punktów (xyz i plh na kolejnych elipsoidach)
+    dla operacji łączonych - każda postać liczona jest co najwyżej raz.
+    Dla metody warm stany słownika stany (model -> StanCieplegoStartu)
+    przenoszą kotwice pomiędzy porcjami.
+    """
+    def __init__(self, blok, rodzaj, model, metoda, tolerancja, stany = None):
+        self.wejscie = blok
+        self.model = model
+        self._metoda = metoda
+        self._tolerancja = tolerancja
+        self._stany = stany or {}
+        self._wsp = {(rodzaj, model): blok}
+
+    def xyz(self, model):
+        if ('xyz', model) not in self._wsp:
+            if ('plh', model) in self._wsp:
+                plh = self._wsp[('plh', model)]
+                wynik = elipsoida(model).plh2xyz_batch(plh[:, 0], plh[:, 1], plh[:, 2])
+            else:
+                xyz = self.xyz(self.model)
+                if _datum(self.model) == _datum(model):
+                    wynik = xyz
                 else:
-                    print("Invalid input format. Input format must be dec_degrees or dms.")
-                if model_elip == 'wgs84':
-                    x, y, z = geo.plh2xyz(phi,lam,h)
-                elif model_elip == 'grs80':
-                    x, y, z = grs.plh2xyz(phi,lam,h)
-                elif model_elip == 'krasowski':
-                    x, y, z = kras.plh2xyz(phi,lam,h)
-                coords_xyz.append([x,y,z])
-    
-        with open('result_plh2xyz.txt','w+') as f:
-            f. write('x[m], y[m], z[m] \n')
-            for coords in coords_xyz:
-                coords_xyz_line = ','.join([f'{coord:11.3f}' for coord in coords])
-                f.write(coords_xyz_line + '\n')
-
-    elif '--pl21992' in sys.argv:
-        input_format = input("Enter input format (dec_degrees/dms): ")
-        with open(input_file_path, 'r') as f:
-        	lines = f.readlines()
-        	lines = lines[header_lines:]
-            
-        coords_1992 = []
-        for line in lines: 
+                    wynik = transformacja_datum(_datum(self.model), _datum(model)).przelicz(xyz)
+            self._wsp[('xyz', model)] = wynik
+        return self._wsp[('xyz', model)]
+
+    def plh(self, model):
+        if ('plh', model) not in self._wsp:
+            self._wsp[('plh', model)] = np.column_stack(elipsoida(model).xyz2plh_batch(
+                self.xyz(model), metoda = self._metoda, tolerancja = self._tolerancja, stan = self._stany.get(model)))
+        return self._wsp[('plh', model)]
+
+
+def _przygotuj_operacje_laczone(opcje):
+    '''
+    Buduje opis kilku operacji wykonywanych na tym samym pliku wejściowym.
+    Plik jest czytany raz, a wspólne wyniki pośrednie (np. phi, lam, h dla
+    xyz2plh i obu odwzorowań) liczone są raz dla każdej porcji punktów.
+    Jeśli wśród operacji jest którakolwiek z OPERACJE_XYZ, plik wejściowy
+    zawiera xyz, a pl21992 i pl22000 liczone są z phi, lam wyznaczonych z xyz;
+    w przeciwnym razie plik zawiera phi, lam, h.
+
+    Parameters
+    ----------
+    opcje : DICT
+        jak w _przygotuj_operacje oraz:
+        operacje - lista nazw operacji
+        jeden_plik - wszystkie wyniki jako kolejne kolumny jednego pliku;
+            domyślnie każda operacja zapisywana jest do własnego pliku
+
+    Returns
+    -------
+    DICT
+        opis jak w _przygotuj_operacje; przelicz zwraca tablicę (N, suma kolumn)
+        z wynikami kolejnych operacji, a czesci (przy osobnych plikach) - listę
+        opisów poszczególnych operacji z zakresem ich kolumn
+    '''
+    operacje = list(opcje['operacje'])
+    if any(op in OPERACJE_PL for op in operacje):
+        raise NotImplementedError('pl19922plh and pl20002plh cannot be combined with other operations')
+    rodzaj = 'xyz' if any(op in OPERACJE_XYZ for op in operacje) else 'plh'
+    if rodzaj == 'xyz' and 'plh2xyz' in operacje:
+        raise NotImplementedError('plh2xyz cannot be combined with operations on xyz coordinates')
+    model = opcje.get('model')
+    metoda = opcje.get('metoda') or 'hirvonen'
+    tolerancja = opcje['tolerancja'] if opcje.get('tolerancja') is not None else TOLERANCJA_HIRVONENA
+    odwzorowanie = opcje.get('odwzorowanie') or 'exact'
+    dokladnosc = opcje['dokladnosc_siatki'] if opcje.get('dokladnosc_siatki') is not None else DOKLADNOSC_SIATKI
+    dms = bool(opcje.get('dms'))
+    stacje = opcje.get('stacje')
+    # osobne kotwice metody warm dla każdej elipsoidy, na której liczone są phi, lam, h
+    stany = {}
+    if metoda == 'warm' and rodzaj == 'xyz' and model is not None:
+        stany = {m: StanCieplegoStartu() for m in (model, _elipsoida_odwzorowan(model))}
+
+    czesci = []
+    kolumna = 0
+    for op in operacje:
+        opis = _przygotuj_operacje(dict(opcje, operacja = op, operacje = None))
+        del opis['przelicz']
+        opis.pop('cieply_start', None)
+        opis['format'] = ['%s', '%s', '%.3f'] if op == 'xyz2plh' and dms else [opis['format']] * opis['kolumny']
+        opis['zakres'] = slice(kolumna, kolumna + opis['kolumny'])
+        kolumna += opis['kolumny']
+        czesci.append(opis)
+
+    def wynik_operacji(op, wsp, etykiety):
+        if op == 'xyz2plh':
+            plh = wsp.plh(model)
+            return [formatuj_dms(plh[:, 0]), formatuj_dms(plh[:, 1]), plh[:, 2]] if dms else plh
+        if op == 'plh2xyz':
+            return wsp.xyz(model)
+        if op in ('pl21992', 'pl22000'):
+            siatka = _elipsoida_odwzorowan(model)     # elipsoida odwzorowań 1992 i 2000
+            plh = wsp.plh(siatka)
+            odwzoruj = elipsoida(siatka).pl21992_batch if op == 'pl21992' else elipsoida(siatka).pl22000_batch
+            return np.column_stack(odwzoruj(plh[:, 0], plh[:, 1], metoda = odwzorowanie, dokladnosc = dokladnosc))
+        if op == 'xyz2neu' and stacje is not None:
+            return elipsoida(model).xyz2neu_stacje(wsp.wejscie, etykiety, stacje)
+        if op == 'xyz2neu':
+            return elipsoida(model).xyz2neu_batch(wsp.wejscie, opcje['x0'], opcje['y0'], opcje['z0'])
+        if op == 'xyzGRS2KRA':
+            return elipsoida('grs80').xyzGRS2KRA_batch(wsp.wejscie)
+        return elipsoida('grs80').xyzKRA2GRS_batch(wsp.wejscie)
+
+    def przelicz(blok, etykiety = None):
+        wsp = _WspolrzednePosrednie(blok, rodzaj, model, metoda, tolerancja, stany)
+        tabela = np.empty((len(blok), kolumna), dtype = object if dms else float)
+        for op, czesc in zip(operacje, czesci):
+            wynik = wynik_operacji(op, wsp, etykiety)
+            if isinstance(wynik, list):
+                for j, wartosci in enumerate(wynik):
+                    tabela[:, czesc['zakres'].start + j] = wartosci
+            else:
+                tabela[:, czesc['zakres']] = wynik
+        return tabela
+
+    nazwy = [f'{op}:{nazwa.strip()}' for op, czesc in zip(operacje, czesci)
+             for nazwa in czesc['naglowek'].split(',') if nazwa.strip() != 'id']
+    opis = {'plik': f'result_{"_".join(operacje)}.txt',
+            'naglowek': ('id, ' if stacje is not None else '') + ', '.join(nazwy) + ' \n',
+            'przelicz': przelicz, 'format': [f for czesc in czesci for f in czesc['format']], 'kolumny': kolumna}
+    if stacje is not None:
+        opis['etykiety'] = 1
+    if not opcje.get('jeden_plik'):
+        opis['czesci'] = czesci
+    return _z_cieplym_startem(opis, stany.values())
+
+
+def _zapisz_blok(f_wyj, wynik, operacja, out_format = 'txt', punkty = None):
+    '''
+    Zapisuje blok wyników do otwartego pliku: jako tekst (txt) albo jako
+    surowe wartości float64 little-endian, wiersz po wierszu (npy, f64).
+    Atrybuty punktów (Punkty wczytane z wejścia) zapisywane są w tekście
+    jako przenoszone kolumny, a w npy - jako pola rekordów.
+    Dla operacji łączonych zapisywanych do osobnych plików f_wyj jest listą
+    plików (_Wyjscia), a każdy otrzymuje kolumny swojej operacji.
+    '''
+    if 'czesci' in operacja:
+        for f, czesc in zip(f_wyj, operacja['czesci']):
+            _zapisz_blok(f, wynik[:, czesc['zakres']], czesc, out_format, punkty)
+        return
+    with _etap('format'):
+        if out_format == 'txt':
+            dane = _formatuj_blok(wynik, operacja['format'], *_atrybuty_wyniku(operacja, punkty))
+        elif punkty is not None:
+            rekordy = np.empty(len(wynik), dtype = operacja['typ_rekordow'])
+            dane = punkty.z_wynikiem(wynik, _nazwy_wyniku(operacja)).rekordy(rekordy).tobytes()
+        else:
+            dane = np.ascontiguousarray(wynik, dtype = '<f8').tobytes()
+    with _etap('write'):
+        f_wyj.write(dane)
+
+
+def przetworz_strumien(f_wej, f_wyj, operacja, input_format = 'dec_degrees', rozmiar_bloku = ROZMIAR_BLOKU, out_format = 'txt',
+                       splukuj = False):
+    '''
+    Przetwarza otwarty plik wejściowy porcjami po rozmiar_bloku linii: każda porcja
+    jest parsowana do tablicy NumPy, przeliczana funkcją wsadową i zapisywana,
+    zanim zostanie wczytana następna. Zużycie pamięci zależy od rozmiaru porcji,
+    a nie od rozmiaru pliku.
+
+    Parameters
+    ----------
+    f_wej, f_wyj : FILE
+        plik wejściowy (ustawiony za nagłówkiem) i plik wynikowy
+    operacja : DICT
+        opis operacji zwrócony przez _przygotuj_operacje
+    input_format : STR - optional, default dec_degrees
+        format współrzędnych phi, lam w pliku wejściowym (dec_degrees lub dms)
+    rozmiar_bloku : INT - optional
+        liczba linii przetwarzanych jednocześnie
+    out_format : STR - optional, default txt
+        txt - plik tekstowy; npy, f64 - surowe wartości float64 (f_wyj otwarty w trybie binarnym)
+    splukuj : BOOL - optional, default False
+        opróżnia bufor f_wyj po każdej porcji (np. przy zapisie na standardowe wyjście)
+
+    Returns
+    -------
+    INT
+        liczba przeliczonych punktów
+    '''
+    liczba_punktow = 0
+    for linie in _czytaj_bloki(f_wej, rozmiar_bloku):
+        blok, wynik, punkty = _przelicz_linie(linie, operacja, input_format)
+        if wynik is None:
+            continue
+        _zapisz_blok(f_wyj, wynik, operacja, out_format, punkty)
+        if splukuj:
+            f_wyj.flush()
+        liczba_punktow += len(blok)
+    return liczba_punktow
+
+
+def _przelicz_linie(linie, operacja, input_format = 'dec_degrees'):
+    '''
+    Parsuje porcję linii pliku wejściowego i przelicza ją operacją.
+    Zwraca tablicę punktów (N,3), wynik (None dla porcji bez punktów)
+    i Punkty z atrybutami przenoszonymi do wyniku (lub None).
+    '''
+    # kolumny tekstowe: (przy stacjach co najmniej) identyfikator oraz kolumny przenoszone
+    po = operacja['przenoszone'][1]
+    przed = len(operacja['nazwy_przenoszonych']) - po
+    with _etap('dms' if input_format == 'dms' else 'parse'):
+        punkty = _wczytaj_blok(linie, input_format, przed, po, operacja['wejscie']) if przed or po else None
+        blok = punkty.wsp if punkty is not None else _wczytaj_blok(linie, input_format)
+    if not len(blok):
+        return blok, None, punkty
+    with _etap('transform'):
+        if operacja.get('etykiety'):
+            wynik = operacja['przelicz'](blok, punkty.atrybuty['atr1'])
+        else:
+            wynik = operacja['przelicz'](blok)
+    return blok, wynik, punkty
+
+
+FORMATY_BINARNE = ('npy', 'f64')
+
+
+def wczytaj_tablice(sciezka, in_format):
+    '''
+    Otwiera binarny plik współrzędnych jako tablicę (N,3) mapowaną w pamięci -
+    dane czytane są z dysku dopiero przy odwołaniu do kolejnych wierszy.
+    Plik npy może też zawierać tablicę rekordów (N,) z polami współrzędnych
+    i atrybutów (patrz Punkty.z_rekordow).
+
+    Parameters
+    ----------
+    sciezka : STR
+        ścieżka pliku
+    in_format : STR
+        npy - plik NumPy z tablicą (N,3) float64 lub tablicą rekordów (N,)
+        f64 - surowe wartości float64 little-endian (x, y, z kolejnych punktów)
+
+    Returns
+    -------
+    ARRAY
+        tablica (N,3) lub tablica rekordów (N,) tylko do odczytu
+    '''
+    if in_format == 'npy':
+        wsp = np.load(sciezka, mmap_mode = 'r')
+    elif in_format == 'f64':
+        wsp = np.memmap(sciezka, dtype = '<f8', mode = 'r')
+        if wsp.size % 3:
+            raise ValueError(f"{sciezka} - file size is not a multiple of 3 float64 values")
+        wsp = wsp.reshape(-1, 3)
+    else:
+        raise NotImplementedError(f'{in_format} - input format not recognized')
+    if wsp.dtype.names is not None and wsp.ndim == 1:
+        return wsp
+    if wsp.ndim != 2 or wsp.shape[1] != 3:
+        raise ValueError(f"expected (N,3) array, got shape {wsp.shape}")
+    return wsp
+
+
+def _tablica_wynikowa(sciezka, out_format, ksztalt, tryb = 'w+', typ = '<f8'):
+    '''
+    Tworzy (tryb 'w+') lub otwiera do zapisu (tryb 'r+') binarny plik wynikowy
+    jako tablicę float64 (lub - w npy - tablicę rekordów typu typ) mapowaną w pamięci.
+    '''
+    if out_format == 'npy':
+        if tryb == 'w+':
+            return np.lib.format.open_memmap(sciezka, mode = 'w+', dtype = typ, shape = ksztalt)
+        return np.load(sciezka, mmap_mode = 'r+')
+    return np.memmap(sciezka, dtype = '<f8', mode = tryb, shape = ksztalt)
+
+
+def _naglowek_npy(n, k, typ = None):
+    '''
+    Nagłówek pliku .npy dla tablicy (n,k) float64. Ma zawsze 128 bajtów, więc
+    przy zapisie strumieniowym można go nadpisać po poznaniu liczby punktów.
+    Dla tablicy rekordów (n,) typu typ długość nagłówka zależy od typu -
+    liczba punktów musi być znana z góry.
+    '''
+    bufor = io.BytesIO()
+    if typ is None:
+        np.lib.format.write_array_header_1_0(bufor, {'descr': '<f8', 'fortran_order': False, 'shape': (n, k)})
+    else:
+        np.lib.format.write_array_header_1_0(bufor, {'descr': np.lib.format.dtype_to_descr(np.dtype(typ)),
+                                                     'fortran_order': False, 'shape': (n,)})
+    return bufor.getvalue()
+
+
+def przetworz_tablice(wsp, f_wyj, operacja, out_format = 'txt', rozmiar_bloku = ROZMIAR_BLOKU, out = None,
+                      splukuj = False):
+    '''
+    Przelicza tablicę (np. mapowaną w pamięci) porcjami po rozmiar_bloku wierszy.
+    Wyniki trafiają do tablicy out (np. mapowanego pliku wynikowego), a jeśli
+    nie jest podana - do pliku f_wyj. Tablica rekordów (N,) dzielona jest na
+    współrzędne (pola operacja['wejscie']) i atrybuty przepisywane do wyniku;
+    przy stacjach identyfikatorem jest pierwsze pole atrybutów.
+
+    Returns
+    -------
+    INT
+        liczba przeliczonych punktów
+    '''
+    rekordy = wsp.dtype.names is not None
+    for i in range(0, len(wsp), rozmiar_bloku):
+        with _etap('read'):
+            if rekordy:
+                punkty = Punkty.z_rekordow(wsp[i:i + rozmiar_bloku], operacja['wejscie'])
+                blok = punkty.wsp
+            else:
+                punkty = None
+                blok = np.array(wsp[i:i + rozmiar_bloku], dtype = float)
+        with _etap('transform'):
+            if operacja.get('etykiety'):
+                wynik = operacja['przelicz'](blok, punkty.atrybuty[punkty.atrybuty.dtype.names[0]])
+            else:
+                wynik = operacja['przelicz'](blok)
+        if out is not None:
+            with _etap('write'):
+                if rekordy:
+                    punkty.z_wynikiem(wynik, _nazwy_wyniku(operacja)).rekordy(out[i:i + len(blok)])
+                else:
+                    out[i:i + len(blok)] = wynik
+        else:
+            _zapisz_blok(f_wyj, wynik, operacja, out_format, punkty)
+            if splukuj:
+                f_wyj.flush()
+    return len(wsp)
+
+
+def _czytaj_bloki_binarne(f, in_format, rozmiar_bloku = ROZMIAR_BLOKU):
+    '''
+    Generator zwracający kolejne porcje (tablice (n,3)) binarnego strumienia
+    npy lub f64, którego nie można mapować w pamięci (np. standardowe wejście).
+    '''
+    if in_format == 'npy':
+        wersja = np.lib.format.read_magic(f)
+        if wersja == (1, 0):
+            ksztalt, fortran, typ = np.lib.format.read_array_header_1_0(f)
+        else:
+            ksztalt, fortran, typ = np.lib.format.read_array_header_2_0(f)
+        if len(ksztalt) != 2 or ksztalt[1] != 3 or fortran or typ != np.dtype('<f8'):
+            raise ValueError(f"expected a C-ordered (N,3) float64 array, got shape {ksztalt}, dtype {typ}")
+    elif in_format != 'f64':
+        raise NotImplementedError(f'{in_format} - file format not recognized, expected npy or f64.')
+    while True:
+        with _etap('read'):
+            dane = f.read(24 * rozmiar_bloku)
+        if not dane:
+            return
+        if len(dane) % 24:
+            raise ValueError("stream size is not a multiple of 3 float64 values")
+        yield np.frombuffer(dane, dtype = '<f8').reshape(-1, 3)
+
+
+def przetworz_strumien_binarny(f_wej, f_wyj, operacja, in_format, out_format = 'txt',
+                               rozmiar_bloku = ROZMIAR_BLOKU, splukuj = False):
+    '''
+    Przelicza binarny strumień wejściowy (npy lub f64) porcjami po rozmiar_bloku
+    punktów i zapisuje wyniki do f_wyj.
+
+    Returns
+    -------
+    INT
+        liczba przeliczonych punktów
+    '''
+    liczba_punktow = 0
+    for blok in _czytaj_bloki_binarne(f_wej, in_format, rozmiar_bloku):
+        with _etap('transform'):
+            wynik = operacja['przelicz'](blok)
+        _zapisz_blok(f_wyj, wynik, operacja, out_format)
+        if splukuj:
+            f_wyj.flush()
+        liczba_punktow += len(blok)
+    return liczba_punktow
+
+
+def _podziel_plik(sciezka, header_lines, liczba_czesci, zakres = None):
+    '''
+    Dzieli plik (bez nagłówka) na liczba_czesci zakresów bajtów o podobnej
+    wielkości. Granice zakresów przesuwane są na początek następnej linii,
+    więc żadna linia nie jest rozdzielona pomiędzy dwa zakresy. Zamiast
+    całego pliku można podzielić zakres (start, koniec) zaczynający się
+    i kończący na granicy linii - wtedy nagłówek nie jest pomijany.
+
+    Returns
+    -------
+    LIST
+        lista par (start, koniec) - pozycje w bajtach
+    '''
+    with open(sciezka, 'rb') as f:
+        if zakres is None:
+            for _ in range(header_lines):
+                f.readline()
+            start = f.tell()
+            rozmiar = os.fstat(f.fileno()).st_size
+        else:
+            start, rozmiar = zakres
+        granice = [start]
+        for i in range(1, liczba_czesci):
+            pozycja = start + (rozmiar - start) * i // liczba_czesci
+            if pozycja <= granice[-1]:
+                continue
+            f.seek(pozycja - 1)
+            f.readline()                  # dokończenie bieżącej linii
+            granice.append(min(f.tell(), rozmiar))
+        granice.append(rozmiar)
+    return [(a, b) for a, b in zip(granice[:-1], granice[1:]) if b > a]
+
+
+def _policz_punkty(f, start, koniec):
+    '''
+    Liczba punktów (niepustych linii) w bajtach [start, koniec) pliku otwartego
+    w trybie binarnym; koniec leży na granicy linii.
+    '''
+    f.seek(start)
+    liczba = 0
+    while start < koniec:
+        dane = f.read(min(1 << 20, koniec - start))
+        if not dane:
+            break
+        if not dane.endswith(b'\n'):
+            dane += f.readline()          # dokończenie linii przeciętej porcją
+        start += len(dane)
+        liczba += sum(1 for linia in dane.split(b'\n') if linia.strip())
+    return liczba
+
+
+def _wyrownaj_zakresy(sciezka, zakresy, krok, wiersz0 = 0):
+    '''
+    Przesuwa granice kolejnych zakresów pliku tekstowego (patrz _podziel_plik)
+    do przodu tak, by numer pierwszego punktu każdego zakresu poza pierwszym był
+    podzielny przez krok - metoda warm zaczyna wtedy każdy zakres od punktu
+    kotwicznego. Punkty numerowane są od wiersz0 (numer pierwszego punktu
+    pierwszego zakresu), puste linie nie są punktami.
+
+    Returns
+    -------
+    LIST
+        lista trójek (start, koniec, wiersz) - pozycje w bajtach i numer
+        pierwszego punktu zakresu
+    '''
+    koniec = zakresy[-1][1]
+    granice = [(zakresy[0][0], wiersz0)]
+    with open(sciezka, 'rb') as f:
+        for _, granica in zakresy[:-1]:
+            pozycja, wiersz = granice[-1]
+            if granica <= pozycja:
+                continue
+            wiersz += _policz_punkty(f, pozycja, granica)
+            f.seek(granica)
+            pozycja = granica
+            while wiersz % krok and pozycja < koniec:
+                linia = f.readline()
+                pozycja += len(linia)
+                wiersz += bool(linia.strip())
+            if pozycja < koniec:
+                granice.append((pozycja, wiersz))
+    granice.append((koniec, None))
+    return [(a, b, wiersz) for (a, wiersz), (b, _) in zip(granice[:-1], granice[1:])]
+
+
+def _linie_zakresu(f, start, koniec):
+    '''
+    Generator linii (jako str) pliku otwartego w trybie binarnym, od pozycji start do koniec.
+    '''
+    f.seek(start)
+    pozycja = start
+    while pozycja < koniec:
+        line = f.readline()
+        if not line:
+            return
+        pozycja += len(line)
+        yield line.decode()
+
+
+class _Wyjscia(list):
+    """Lista otwartych plików wynikowych operacji łączonych."""
+    def flush(self):
+        for f in self:
+            f.flush()
+
+
+@contextmanager
+def _otworz_wyniki(sciezki, out_format, dopisz = False):
+    with ExitStack() as stos:
+        yield _Wyjscia(stos.enter_context(_otworz_wynik(s, out_format, dopisz)) for s in sciezki)
+
+
+def _otworz_wynik(sciezka, out_format, dopisz = False):
+    '''
+    Otwiera plik wynikowy: tekstowy dla txt, binarny dla npy i f64; z dopisz -
+    do dopisywania na końcu istniejącego pliku. Ścieżka '-' oznacza standardowe
+    wyjście (które nie jest zamykane), a lista ścieżek - pliki kolejnych
+    operacji łączonych (_Wyjscia).
+    '''
+    if isinstance(sciezka, list):
+        return _otworz_wyniki(sciezka, out_format, dopisz)
+    if sciezka == '-':
+        return nullcontext(sys.stdout if out_format == 'txt' else sys.stdout.buffer)
+    if dopisz:
+        return open(sciezka, 'a' if out_format == 'txt' else 'ab')
+    return open(sciezka, 'w+' if out_format == 'txt' else 'wb')
+
+
+def _otworz_wejscie(sciezka, in_format):
+    '''
+    Otwiera plik wejściowy: tekstowy dla txt, binarny dla npy i f64.
+    Ścieżka '-' oznacza standardowe wejście (które nie jest zamykane).
+    '''
+    if sciezka == '-':
+        return nullcontext(sys.stdin if in_format == 'txt' else sys.stdin.buffer)
+    return open(sciezka, 'r' if in_format == 'txt' else 'rb')
+
+
+def _przetworz_zakres(opcje, sciezka, start, koniec, sciezka_wyj, cieply_start = None):
+    '''
+    Zadanie procesu roboczego: przelicza zakres pliku wejściowego - bajty
+    [start, koniec) pliku tekstowego lub wiersze [start, koniec) pliku
+    binarnego - i zapisuje wynik (bez nagłówka) do pliku sciezka_wyj
+    (listy plików dla operacji łączonych).
+    Każdy proces buduje własne obiekty Transformacje. Dla metody warm
+    cieply_start to numer pierwszego punktu zakresu w całym pliku i kotwice
+    sprzed zakresu (patrz _ustaw_cieply_start).
+
+    Returns
+    -------
+    INT
+        liczba przeliczonych punktów
+    '''
+    operacja = _przygotuj_operacje(opcje)
+    if cieply_start is not None:
+        _ustaw_cieply_start(operacja, *cieply_start)
+    in_format = opcje.get('in_format', 'txt')
+    out_format = opcje.get('out_format', 'txt')
+    with _otworz_wynik(sciezka_wyj, out_format) as f_wyj:
+        if in_format in FORMATY_BINARNE:
+            return przetworz_tablice(wczytaj_tablice(sciezka, in_format)[start:koniec], f_wyj, operacja, out_format)
+        with open(sciezka, 'rb') as f_wej:
+            return przetworz_strumien(_linie_zakresu(f_wej, start, koniec), f_wyj, operacja,
+                                      opcje['input_format'], out_format = out_format)
+
+
+def _przetworz_wiersze(opcje, sciezka, start, koniec, sciezka_wyj, cieply_start = None):
+    '''
+    Zadanie procesu roboczego dla wejścia i wyjścia binarnego: przelicza wiersze
+    [start, koniec) i zapisuje je bezpośrednio w mapowanym pliku wynikowym.
+    '''
+    operacja = _przygotuj_operacje(opcje)
+    if cieply_start is not None:
+        _ustaw_cieply_start(operacja, *cieply_start)
+    out = _tablica_wynikowa(sciezka_wyj, opcje['out_format'], None, tryb = 'r+')
+    if out.ndim == 1 and out.dtype.names is None:
+        out = out.reshape(-1, operacja['kolumny'])
+    liczba_punktow = przetworz_tablice(wczytaj_tablice(sciezka, opcje['in_format'])[start:koniec], None,
+                                       operacja, out = out[start:koniec])
+    out.flush()
+    return liczba_punktow
+
+
+def _wykonaj_zadanie(zadanie, opcje, *argumenty):
+    '''
+    Uruchamia zadanie w procesie roboczym. Przy profilowaniu zwraca też raport
+    pomiarów tego procesu, dołączany później do raportu głównego.
+    '''
+    global _profil
+    _profil = Profil() if opcje.get('profile') else None
+    wynik = zadanie(opcje, *argumenty)
+    return wynik, (_profil.raport() if _profil is not None else None)
+
+
+def _uruchom_rownolegle(zadanie, opcje, sciezka, zakresy, sciezki_wyj, workers):
+    '''
+    Wykonuje zadanie dla kolejnych zakresów w puli procesów i zwraca łączną liczbę punktów.
+    Zakresy to trójki (start, koniec, cieply_start) - patrz _przetworz_zakres.
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers = workers) as pula:
+        zadania = [pula.submit(_wykonaj_zadanie, zadanie, opcje, sciezka, start, koniec, sciezka_wyj, cieply_start)
+                   for (start, koniec, cieply_start), sciezka_wyj in zip(zakresy, sciezki_wyj)]
+        liczba_punktow = 0
+        for z in zadania:
+            wynik, raport = z.result()
+            liczba_punktow += wynik
+            if raport is not None and _profil is not None:
+                _profil.dolacz(raport)
+        return liczba_punktow
+
+
+def _podziel_wiersze(n, workers):
+    '''
+    Dzieli n wierszy pliku binarnego na workers zakresów o granicach na punktach
+    kotwicznych metody warm. Zwraca trójki (start, koniec, cieply_start).
+    '''
+    granice = [n * i // workers // KROK_CIEPLEGO_STARTU * KROK_CIEPLEGO_STARTU for i in range(workers)] + [n]
+    return [(a, b, (a, None)) for a, b in zip(granice[:-1], granice[1:]) if b > a]
+
+
+def przetworz_rownolegle(opcje, sciezka, f_wyj, header_lines, workers, zakres = None, cieply_start = None):
+    '''
+    Dzieli plik wejściowy na workers zakresów i przelicza je w osobnych procesach.
+    Wyniki częściowe zapisywane są do plików tymczasowych i dołączane do f_wyj
+    w kolejności zgodnej z plikiem wejściowym - wynik jest taki sam jak przy
+    przetwarzaniu w jednym procesie. Dla pliku tekstowego zakres (start, koniec)
+    ogranicza przeliczenie do tych bajtów (patrz _podziel_plik), a cieply_start -
+    numer jego pierwszego punktu i kotwice metody warm (patrz _ustaw_cieply_start).
+    Dla metody warm granice zakresów wypadają na punktach kotwicznych.
+
+    Returns
+    -------
+    INT
+        liczba przeliczonych punktów
+    '''
+    import shutil
+    import tempfile
+    in_format = opcje.get('in_format', 'txt')
+    if in_format in FORMATY_BINARNE:
+        zakresy = _podziel_wiersze(len(wczytaj_tablice(sciezka, in_format)), workers)
+    else:
+        zakresy = _podziel_plik(sciezka, header_lines, workers, zakres)
+        if opcje.get('metoda') == 'warm' and zakresy:
+            wiersz0, kotwice = cieply_start or (0, None)
+            zakresy = [(a, b, (wiersz, kotwice if i == 0 else None)) for i, (a, b, wiersz)
+                       in enumerate(_wyrownaj_zakresy(sciezka, zakresy, KROK_CIEPLEGO_STARTU, wiersz0))]
+        else:
+            zakresy = [(a, b, None) for a, b in zakresy]
+    wyjscia = f_wyj if isinstance(f_wyj, _Wyjscia) else [f_wyj]
+    czesci = []      # dla każdego zakresu - pliki częściowe kolejnych wyjść
+    try:
+        for _ in zakresy:
+            czesci.append([])
+            for f in wyjscia:
+                uchwyt, sciezka_czesci = tempfile.mkstemp(suffix = '.part', dir = os.path.dirname(os.path.abspath(f.name)))
+                os.close(uchwyt)
+                czesci[-1].append(sciezka_czesci)
+        sciezki_czesci = czesci if isinstance(f_wyj, _Wyjscia) else [c[0] for c in czesci]
+        liczba_punktow = _uruchom_rownolegle(_przetworz_zakres, opcje, sciezka, zakresy, sciezki_czesci, workers)
+        for i, f in enumerate(wyjscia):
+            f.flush()
+            f_bin = getattr(f, 'buffer', f)
+            for czesc in czesci:
+                with open(czesc[i], 'rb') as f_czesci:
+                    shutil.copyfileobj(f_czesci, f_bin)
+    finally:
+        for czesc in czesci:
+            for sciezka_czesci in czesc:
+                if os.path.exists(sciezka_czesci):
+                    os.remove(sciezka_czesci)
+    return liczba_punktow
+
+
+def sciezka_wyniku(operacja, out_format = 'txt', katalog = '', przedrostek = ''):
+    '''
+    Nazwa pliku wynikowego operacji - [katalog/][przedrostek]result_<operacja>.txt,
+    .npy lub .f64; dla operacji łączonych zapisywanych do osobnych plików - lista nazw.
+    '''
+    if 'czesci' in operacja:
+        return [sciezka_wyniku(czesc, out_format, katalog, przedrostek) for czesc in operacja['czesci']]
+    return os.path.join(katalog, przedrostek + os.path.splitext(operacja['plik'])[0] + '.' + out_format)
+
+
+def przetworz_plik(opcje, sciezka_wej, header_lines = 0, workers = 1, sciezka_wyj = None):
+    '''
+    Przelicza cały plik wejściowy operacją opisaną w opcjach i zapisuje wynik.
+    Jeśli opcje['profile'] jest ustawione, mierzy czas etapów przetwarzania,
+    wypisuje raport na standardowe wyjście błędów i zapisuje go w pliku
+    <plik wynikowy>.profile.json.
+
+    Parameters
+    ----------
+    opcje : DICT
+        opcje operacji (patrz _przygotuj_operacje) oraz:
+        input_format - dec_degrees lub dms (dla wejścia tekstowego)
+        in_format, out_format - txt (domyślnie), npy lub f64
+        profile - włącza profilowanie
+        przyrostowo - przelicza tylko linie dopisane od poprzedniego
+            uruchomienia (patrz _przetworz_przyrostowo)
+    sciezka_wej : STR
+        ścieżka pliku wejściowego lub '-' (standardowe wejście)
+    header_lines : INT - optional
+        liczba linii nagłówka pliku tekstowego
+    workers : INT - optional
+        liczba procesów
+    sciezka_wyj : STR - optional
+        ścieżka pliku wynikowego lub '-' (standardowe wyjście, opróżniane po
+        każdej porcji), domyślnie result_<operacja>.<format>; dla operacji
+        łączonych w osobnych plikach - katalog wyników albo lista ścieżek
+
+    Returns
+    -------
+    INT
+        liczba przeliczonych punktów (w trybie przyrostowym - nowych)
+    '''
+    global _profil
+    operacja = _przygotuj_operacje(opcje)
+    if 'czesci' in operacja and not isinstance(sciezka_wyj, list):
+        # operacje łączone w osobnych plikach - sciezka_wyj jest katalogiem wyników
+        if sciezka_wyj == '-':
+            raise NotImplementedError('combined operations can be written to stdout only with --one-file')
+        if sciezka_wyj:
+            os.makedirs(sciezka_wyj, exist_ok = True)
+        sciezka_wyj = sciezka_wyniku(operacja, opcje.get('out_format', 'txt'), sciezka_wyj or '')
+    elif sciezka_wyj is None:
+        sciezka_wyj = sciezka_wyniku(operacja, opcje.get('out_format', 'txt'))
+    przetworz = _przetworz_przyrostowo if opcje.get('przyrostowo') else _przetworz_plik
+    if not opcje.get('profile'):
+        return przetworz(opcje, sciezka_wej, header_lines, workers, sciezka_wyj)
+    _profil = Profil()
+    start = (time.perf_counter(), time.process_time())
+    try:
+        liczba_punktow = przetworz(opcje, sciezka_wej, header_lines, workers, sciezka_wyj)
+        profil = _profil
+    finally:
+        _profil = None
+    czas_wall = time.perf_counter() - start[0]
+    czas_cpu = time.process_time() - start[1]
+    if workers > 1:
+        # czas procesora procesów roboczych
+        czas_cpu += sum(c for nazwa, (w, c) in profil.etapy.items())
+    raport = {'operation': '+'.join(opcje.get('operacje') or [opcje['operacja']]), 'input': sciezka_wej, 'output': sciezka_wyj,
+              'workers': workers, 'points': liczba_punktow, 'wall_s': czas_wall, 'cpu_s': czas_cpu,
+              'points_per_s': liczba_punktow / czas_wall if czas_wall > 0 else None,
+              'peak_rss_mb': _szczyt_rss()}
+    raport.update(profil.raport())
+    sciezka_raportu = sciezka_wyj if isinstance(sciezka_wyj, str) and sciezka_wyj != '-' else operacja['plik']
+    with open(sciezka_raportu + '.profile.json', 'w') as f:
+        json.dump(raport, f, indent = 1)
+    wypisz_raport(raport, sys.stderr)
+    return liczba_punktow
+
+
+def wypisz_raport(raport, f):
+    '''
+    Wypisuje raport profilowania w postaci tabeli.
+    '''
+    f.write(f"\nprofile: {raport['operation']}, {raport['points']} points, {raport['workers']} worker(s)\n")
+    f.write(f"{'stage':12s} {'wall [s]':>10s} {'cpu [s]':>10s} {'wall [%]':>9s}\n")
+    suma = sum(e['wall_s'] for e in raport['stages'].values()) or 1.0
+    for nazwa, e in sorted(raport['stages'].items(), key = lambda x: -x[1]['wall_s']):
+        f.write(f"{nazwa:12s} {e['wall_s']:10.3f} {e['cpu_s']:10.3f} {100 * e['wall_s'] / suma:9.1f}\n")
+    f.write(f"{'total':12s} {raport['wall_s']:10.3f} {raport['cpu_s']:10.3f}\n")
+    if raport['points_per_s'] is not None:
+        f.write(f"throughput: {raport['points_per_s']:.0f} points/s\n")
+    if raport['peak_rss_mb'] is not None:
+        f.write(f"peak RSS: {raport['peak_rss_mb']:.1f} MB\n")
+    if raport['hirvonen_iterations']:
+        f.write('Hirvonen iterations (iterations: points):\n')
+        for k, ile in raport['hirvonen_iterations'].items():
+            f.write(f"  {k:>3s}: {ile}\n")
+
+
+def _opcje_przenoszenia(opcje, sciezka_wej, header_lines):
+    '''
+    Uzupełnia opcje o kolumny przenoszone z pliku wejściowego do wyniku (patrz
+    _przygotuj_operacje): dla pliku npy z tablicą rekordów - wszystkie pola
+    poza współrzędnymi, zapisywane przed wynikami; dla pliku tekstowego -
+    nazwy przenoszonych kolumn z ostatniej linii nagłówka, jeśli ma ona
+    odpowiednią liczbę pól.
+    '''
+    in_format = opcje.get('in_format', 'txt')
+    przed, po = opcje.get('przenoszone') or (0, 0)
+    if in_format == 'npy' and sciezka_wej != '-':
+        wsp = wczytaj_tablice(sciezka_wej, in_format)
+        if wsp.dtype.names is not None:
+            atrybuty = Punkty.z_rekordow(wsp[:0], _kolumny_wejscia(opcje)).atrybuty.dtype
+            if opcje.get('stacje') is not None and not atrybuty.names:
+                raise ValueError('record array has no station ID field')
+            return dict(opcje, przenoszone = (len(atrybuty.names), 0), nazwy_przenoszonych = list(atrybuty.names),
+                        atrybuty = atrybuty)
+    if not (przed or po):
+        return opcje
+    if in_format in FORMATY_BINARNE:
+        raise NotImplementedError('passthrough columns need a text input file or an npy record array')
+    if header_lines and sciezka_wej != '-':
+        with _otworz_wejscie(sciezka_wej, in_format) as f:
+            naglowek = list(islice(f, header_lines))
+        pola = [p.strip() for p in naglowek[-1].split(',')] if naglowek else []
+        przed = max(przed, int(opcje.get('stacje') is not None))
+        if len(pola) >= przed + po + 3:
+            return dict(opcje, nazwy_przenoszonych = pola[:przed] + pola[len(pola) - po:])
+    return opcje
+
+
+def _przetworz_plik(opcje, sciezka_wej, header_lines, workers, sciezka_wyj):
+    opcje = _opcje_przenoszenia(opcje, sciezka_wej, header_lines)
+    operacja = _przygotuj_operacje(opcje)
+    in_format = opcje.get('in_format', 'txt')
+    out_format = opcje.get('out_format', 'txt')
+    rekordy = 'typ_rekordow' in operacja
+    _sprawdz_format_wyniku(operacja, out_format)
+    if rekordy and out_format == 'f64':
+        raise NotImplementedError('f64 output has no fields for record attributes, use npy or txt')
+    stdin, stdout = sciezka_wej == '-', sciezka_wyj == '-'
+    if stdin and workers > 1:
+        raise NotImplementedError('--workers needs a regular input file, not stdin')
+    if stdout and out_format == 'npy' and (stdin or in_format not in FORMATY_BINARNE):
+        raise NotImplementedError('npy output to stdout needs a binary input file with a known number of points, use f64')
+
+    if in_format in FORMATY_BINARNE and out_format in FORMATY_BINARNE and not (stdin or stdout or 'czesci' in operacja):
+        # liczba punktów jest znana - wyniki zapisywane są wprost do mapowanego pliku
+        wsp = wczytaj_tablice(sciezka_wej, in_format)
+        if rekordy:
+            out = _tablica_wynikowa(sciezka_wyj, out_format, (len(wsp),), typ = operacja['typ_rekordow'])
+        else:
+            out = _tablica_wynikowa(sciezka_wyj, out_format, (len(wsp), operacja['kolumny']))
+        if workers > 1:
+            del out
+            zakresy = _podziel_wiersze(len(wsp), workers)
+            return _uruchom_rownolegle(_przetworz_wiersze, opcje, sciezka_wej, zakresy,
+                                       [sciezka_wyj] * len(zakresy), workers)
+        liczba_punktow = przetworz_tablice(wsp, None, operacja, out = out)
+        out.flush()
+        return liczba_punktow
+
+    with _otworz_wynik(sciezka_wyj, out_format) as f_wyj:
+        # operacje łączone w osobnych plikach - nagłówek w każdym z nich
+        wyjscia = list(zip(f_wyj, operacja['czesci'])) if 'czesci' in operacja else [(f_wyj, operacja)]
+        for f, opis in wyjscia:
+            if out_format == 'txt':
+                f.write(_naglowek_wyniku(opis))
+            elif out_format == 'npy':
+                # na standardowe wyjście i dla rekordów - tylko dla pliku binarnego, którego liczba punktów jest znana
+                n = len(wczytaj_tablice(sciezka_wej, in_format)) if stdout or rekordy else 0
+                f.write(_naglowek_npy(n, opis['kolumny'], opis.get('typ_rekordow')))
+        if workers > 1:
+            liczba_punktow = przetworz_rownolegle(opcje, sciezka_wej, f_wyj, header_lines, workers)
+        elif in_format in FORMATY_BINARNE and stdin:
+            with _otworz_wejscie(sciezka_wej, in_format) as f_wej:
+                liczba_punktow = przetworz_strumien_binarny(f_wej, f_wyj, operacja, in_format, out_format,
+                                                            splukuj = stdout)
+        elif in_format in FORMATY_BINARNE:
+            liczba_punktow = przetworz_tablice(wczytaj_tablice(sciezka_wej, in_format), f_wyj, operacja, out_format,
+                                               splukuj = stdout)
+        else:
+            with _otworz_wejscie(sciezka_wej, in_format) as f_wej:
+                for _ in islice(f_wej, header_lines):
+                    pass
+                liczba_punktow = przetworz_strumien(f_wej, f_wyj, operacja, opcje['input_format'],
+                                                    out_format = out_format, splukuj = stdout)
+        if out_format == 'npy' and not stdout:
+            for f, opis in wyjscia:
+                f.seek(0)
+                f.write(_naglowek_npy(liczba_punktow, opis['kolumny'], opis.get('typ_rekordow')))
+        f_wyj.flush()
+    return liczba_punktow
+
+
+def _sprawdz_format_wyniku(operacja, out_format):
+    '''
+    Wyniki tekstowe (dms, identyfikatory stacji, kolumny przenoszone - poza
+    tablicą rekordów) można zapisać tylko w pliku txt.
+    '''
+    if out_format in FORMATY_BINARNE and ('%s' in operacja['format'] or
+                                          (any(operacja['przenoszone']) and 'typ_rekordow' not in operacja)):
+        raise NotImplementedError('text-only results (dms, station IDs, passthrough columns) cannot be written '
+                                  'in a binary format')
+
+
+WERSJA_PUNKTU_KONTROLNEGO = 1
+ROZSZERZENIE_PUNKTU_KONTROLNEGO = '.checkpoint.json'
+
+
+def _koniec_pelnych_linii(f):
+    '''
+    Pozycja za ostatnim znakiem nowej linii pliku otwartego w trybie binarnym -
+    niedokończona ostatnia linia (plik właśnie dopisywany) czeka na kolejne uruchomienie.
+    '''
+    pozycja = os.fstat(f.fileno()).st_size
+    while pozycja > 0:
+        krok = min(65536, pozycja)
+        f.seek(pozycja - krok)
+        fragment = f.read(krok)
+        znak = fragment.rfind(b'\n')
+        if znak >= 0:
+            return pozycja - krok + znak + 1
+        pozycja -= krok
+    return 0
+
+
+def _skroty_pliku(sciezka, pozycje):
+    '''
+    Skróty SHA-256 i liczby linii początkowych fragmentów pliku [0, pozycja)
+    dla rosnących pozycji - wszystkie w jednym przejściu przez plik.
+
+    Returns
+    -------
+    LIST
+        (skrót szesnastkowy, liczba linii) dla kolejnych pozycji
+    '''
+    import hashlib
+    skrot = hashlib.sha256()
+    linie = 0
+    wyniki = []
+    with open(sciezka, 'rb') as f:
+        przeczytane = 0
+        for pozycja in pozycje:
+            while przeczytane < pozycja:
+                fragment = f.read(min(1 << 20, pozycja - przeczytane))
+                if not fragment:
+                    break
+                skrot.update(fragment)
+                linie += fragment.count(b'\n')
+                przeczytane += len(fragment)
+            wyniki.append((skrot.copy().hexdigest(), linie))
+    return wyniki
+
+
+def _sygnatura_opcji(opcje, header_lines):
+    '''
+    Skrót opcji wpływających na wynik - punkt kontrolny innego przeliczenia nie jest używany.
+    '''
+    import hashlib
+    istotne = sorted((k, v) for k, v in opcje.items() if k not in ('profile', 'przyrostowo'))
+    return hashlib.sha256(repr((istotne, header_lines)).encode()).hexdigest()
+
+
+def _wczytaj_punkt_kontrolny(sciezka):
+    try:
+        with open(sciezka) as f:
+            punkt = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return punkt if isinstance(punkt, dict) and punkt.get('version') == WERSJA_PUNKTU_KONTROLNEGO else None
+
+
+def _rozmiary_wynikow(sciezki):
+    return {os.path.abspath(s): os.path.getsize(s) if os.path.exists(s) else None for s in sciezki}
+
+
+def _odtworz_kotwice(operacja, sciezka, poczatek, koniec, punkty, input_format):
+    '''
+    Kotwice metody warm dla linii dopisanych za pozycją koniec pliku, którego
+    punkty (w liczbie punkty, od pozycji poczatek - za nagłówkiem) przeliczono
+    wcześniej: ostatni punkt kotwiczny przed pozycją koniec jest przeliczany
+    ponownie. Zwraca listę kotwic (patrz _kotwice) lub None, gdy dopisane
+    punkty zaczynają się od punktu kotwicznego.
+    '''
+    global _profil
+    reszta = punkty % KROK_CIEPLEGO_STARTU
+    if not reszta:
+        return None
+    # reszta-ta niepusta linia przed koniec; okno czytania powiększane, aż ją obejmie
+    with open(sciezka, 'rb') as f:
+        rozmiar = 1 << 16
+        while True:
+            a = max(poczatek, koniec - rozmiar)
+            f.seek(a)
+            linie = f.read(koniec - a).split(b'\n')
+            if a > poczatek:
+                linie = linie[1:]         # pierwsza linia okna może być niepełna
+            linie = [linia for linia in linie if linia.strip()]
+            if len(linie) >= reszta or a == poczatek:
+                break
+            rozmiar *= 4
+    if len(linie) < reszta:
+        return None
+    # ponowne przeliczenie kotwicy nie trafia do profilu
+    profil, _profil = _profil, None
+    try:
+        _ustaw_cieply_start(operacja, punkty - reszta)
+        _przelicz_linie([linie[-reszta].decode()], operacja, input_format)
+    finally:
+        _profil = profil
+    return _kotwice(operacja)
+
+
+def _przetworz_przyrostowo(opcje, sciezka_wej, header_lines, workers, sciezka_wyj):
+    '''
+    Tryb przyrostowy (--incremental) dla plików, do których dopisywane są
+    kolejne linie (np. szeregi czasowe stacji permanentnych). Obok pierwszego
+    pliku wynikowego zapisywany jest punkt kontrolny <wynik>.checkpoint.json:
+    pozycja w bajtach za ostatnią przeliczoną linią, liczba linii i punktów,
+    skrót SHA-256 początku pliku wejściowego do tej pozycji, skrót opcji
+    i rozmiary plików wynikowych. Jeśli wszystkie się zgadzają, przeliczane są
+    tylko linie dopisane od poprzedniego uruchomienia, a ich wyniki dopisywane
+    na końcu plików wynikowych. W przeciwnym razie (zmieniony początek pliku,
+    inne opcje, zmieniony lub usunięty wynik) wykonywane jest pełne przeliczenie.
+    Niedokończona ostatnia linia wejścia pozostaje na następne uruchomienie.
+
+    Returns
+    -------
+    INT
+        liczba punktów przeliczonych w tym uruchomieniu
+    '''
+    in_format = opcje.get('in_format', 'txt')
+    out_format = opcje.get('out_format', 'txt')
+    if sciezka_wej == '-' or sciezka_wyj == '-' or in_format != 'txt' or out_format == 'npy':
+        raise NotImplementedError('--incremental needs a text input file and txt or f64 output files')
+    opcje = _opcje_przenoszenia(opcje, sciezka_wej, header_lines)
+    operacja = _przygotuj_operacje(opcje)
+    _sprawdz_format_wyniku(operacja, out_format)
+    wyniki = sciezka_wyj if isinstance(sciezka_wyj, list) else [sciezka_wyj]
+    sciezka_punktu = wyniki[0] + ROZSZERZENIE_PUNKTU_KONTROLNEGO
+    sygnatura = _sygnatura_opcji(opcje, header_lines)
+
+    with open(sciezka_wej, 'rb') as f:
+        koniec = _koniec_pelnych_linii(f)
+    punkt = _wczytaj_punkt_kontrolny(sciezka_punktu)
+    # tanie warunki najpierw - skrót początku pliku tylko dla pasującego punktu kontrolnego
+    if punkt is not None and not (punkt.get('input') == os.path.abspath(sciezka_wej)
+                                  and punkt.get('options') == sygnatura
+                                  and 0 < punkt.get('offset', -1) <= koniec
+                                  and punkt.get('outputs') == _rozmiary_wynikow(wyniki)):
+        punkt = None
+    if punkt is not None:
+        (skrot_poczatku, _), (skrot, linie) = _skroty_pliku(sciezka_wej, [punkt['offset'], koniec])
+        if skrot_poczatku != punkt['prefix_sha256']:
+            punkt = None
+    else:
+        [(skrot, linie)] = _skroty_pliku(sciezka_wej, [koniec])
+
+    dopisz = punkt is not None
+    with open(sciezka_wej, 'rb') as f:
+        for _ in range(header_lines):
+            f.readline()
+        poczatek = min(f.tell(), koniec)
+    if dopisz:
+        start = punkt['offset']
+        punkty_przed = punkt['points']
+    else:
+        start = poczatek
+        punkty_przed = 0
+    cieply_start = None
+    if dopisz and 'cieply_start' in operacja:
+        cieply_start = (punkty_przed, _odtworz_kotwice(operacja, sciezka_wej, poczatek, start, punkty_przed,
+                                                       opcje['input_format']))
+        _ustaw_cieply_start(operacja, *cieply_start)
+    try:
+        with _otworz_wynik(sciezka_wyj, out_format, dopisz) as f_wyj:
+            if not dopisz and out_format == 'txt':
+                for f, opis in (zip(f_wyj, operacja['czesci']) if 'czesci' in operacja else [(f_wyj, operacja)]):
+                    f.write(_naglowek_wyniku(opis))
+            if workers > 1 and koniec > start:
+                f_wyj.flush()
+                liczba_punktow = przetworz_rownolegle(opcje, sciezka_wej, f_wyj, 0, workers, (start, koniec),
+                                                      cieply_start)
+            else:
+                with open(sciezka_wej, 'rb') as f_wej:
+                    liczba_punktow = przetworz_strumien(_linie_zakresu(f_wej, start, koniec), f_wyj, operacja,
+                                                        opcje['input_format'], out_format = out_format)
+            f_wyj.flush()
+    except BaseException:
+        if dopisz:
+            # przerwane dopisywanie - wyniki wracają do stanu z punktu kontrolnego
+            for s, rozmiar in punkt['outputs'].items():
+                os.truncate(s, rozmiar)
+        raise
+
+    punkt = {'version': WERSJA_PUNKTU_KONTROLNEGO, 'input': os.path.abspath(sciezka_wej), 'options': sygnatura,
+             'offset': koniec, 'lines': linie, 'prefix_sha256': skrot, 'points': punkty_przed + liczba_punktow,
+             'mode': 'append' if dopisz else 'full', 'outputs': _rozmiary_wynikow(wyniki)}
+    tymczasowy = sciezka_punktu + '.tmp'
+    with open(tymczasowy, 'w') as f:
+        json.dump(punkt, f, indent = 1)
+    os.replace(tymczasowy, sciezka_punktu)
+    return liczba_punktow
+
+
+PLIK_MANIFESTU = 'batch_manifest.json'
+
+
+def pliki_wsadu(wzorzec):
+    '''
+    Lista plików wejściowych trybu wsadowego: wszystkie pliki katalogu albo pliki
+    pasujące do wzorca glob, posortowane. Pomijane są wyniki (*.result_*),
+    raporty profilowania i manifesty wcześniejszych przebiegów.
+    '''
+    import glob
+    if os.path.isdir(wzorzec):
+        pliki = [os.path.join(wzorzec, nazwa) for nazwa in os.listdir(wzorzec)]
+    else:
+        pliki = glob.glob(wzorzec)
+    return sorted(p for p in pliki if os.path.isfile(p) and '.result_' not in os.path.basename(p)
+                  and not p.endswith('.profile.json') and os.path.basename(p) != PLIK_MANIFESTU)
+
+
+def _przetworz_plik_wsadu(opcje, sciezka_wej, header_lines, sciezka_wyj):
+    '''
+    Zadanie trybu wsadowego: przelicza jeden plik i zwraca jego wpis manifestu.
+    Błąd nie przerywa wsadu - trafia do wpisu, a niepełne wyniki są usuwane.
+    '''
+    wpis = {'input': sciezka_wej, 'output': sciezka_wyj}
+    start = time.perf_counter()
+    try:
+        wpis['points'] = przetworz_plik(opcje, sciezka_wej, header_lines, 1, sciezka_wyj)
+        wpis['status'] = 'ok'
+    except Exception as blad:
+        wpis['points'] = None
+        wpis['status'] = 'error'
+        wpis['error'] = f'{type(blad).__name__}: {blad}'
+        for sciezka in (sciezka_wyj if isinstance(sciezka_wyj, list) else [sciezka_wyj]):
+            if os.path.exists(sciezka):
+                os.remove(sciezka)
+    wpis['wall_s'] = time.perf_counter() - start
+    return wpis
+
+
+def przetworz_wsad(opcje, wzorzec, header_lines = 0, workers = 1, katalog_wyj = None, pula = 'process',
+                   sciezka_manifestu = None):
+    '''
+    Tryb wsadowy: przelicza wszystkie pliki katalogu lub wzorca glob tą samą
+    operacją, po kilka plików jednocześnie, i zapisuje manifest wsadu (JSON)
+    z liczbą punktów, czasem i ewentualnym błędem każdego pliku.
+
+    Wynik pliku <nazwa>.<rozszerzenie> zapisywany jest obok niego albo w katalogu
+    katalog_wyj jako <nazwa>.result_<operacja>.<format>.
+
+    Parameters
+    ----------
+    opcje : DICT
+        opcje operacji (patrz przetworz_plik)
+    wzorzec : STR
+        katalog albo wzorzec glob plików wejściowych
+    header_lines : INT - optional
+        liczba linii nagłówka każdego pliku tekstowego
+    workers : INT - optional
+        liczba plików przeliczanych jednocześnie
+    katalog_wyj : STR - optional
+        katalog wyników i manifestu, domyślnie katalogi plików wejściowych
+        i bieżący katalog
+    pula : STR - optional
+        'process' (domyślnie) - pula procesów, obliczenia równolegle na kilku
+        rdzeniach; 'thread' - pula wątków, odczyt i zapis plików nakładają się
+        na obliczenia jednego procesu
+    sciezka_manifestu : STR - optional
+        ścieżka manifestu, domyślnie <katalog_wyj>/batch_manifest.json
+
+    Returns
+    -------
+    DICT
+        manifest wsadu
+    '''
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+    if pula not in ('process', 'thread'):
+        raise NotImplementedError(f'{pula} - pool type not implemented, expected process or thread')
+    if katalog_wyj == '-':
+        raise NotImplementedError('batch mode writes result files, --output must be a directory')
+    if pula == 'thread' and opcje.get('profile'):
+        raise NotImplementedError('--profile is not supported with a thread pool, use process')
+    pliki = pliki_wsadu(wzorzec)
+    if not pliki:
+        raise FileNotFoundError(f'{wzorzec} - no input files found')
+    operacja = _przygotuj_operacje(opcje)
+    out_format = opcje.get('out_format', 'txt')
+    if katalog_wyj is not None:
+        os.makedirs(katalog_wyj, exist_ok = True)
+    zadania = []
+    for sciezka in pliki:
+        katalog = katalog_wyj if katalog_wyj is not None else os.path.dirname(sciezka)
+        przedrostek = os.path.splitext(os.path.basename(sciezka))[0] + '.'
+        zadania.append((sciezka, sciezka_wyniku(operacja, out_format, katalog, przedrostek)))
+    wyjscia = [w for _, wyj in zadania for w in (wyj if isinstance(wyj, list) else [wyj])]
+    if len(set(wyjscia)) != len(wyjscia):
+        raise ValueError('input files with the same name but different extensions would share an output file')
+
+    start = time.perf_counter()
+    pula_zadan = ThreadPoolExecutor if pula == 'thread' else ProcessPoolExecutor
+    with pula_zadan(max_workers = workers) as wykonawca:
+        przyszle = {wykonawca.submit(_przetworz_plik_wsadu, opcje, sciezka, header_lines, wyj): (sciezka, wyj)
+                    for sciezka, wyj in zadania}
+        wpisy = {}
+        for przyszly in as_completed(przyszle):
+            sciezka, wyj = przyszle[przyszly]
+            try:
+                wpisy[sciezka] = przyszly.result()
+            except Exception as blad:
+                # np. przerwany proces roboczy
+                wpisy[sciezka] = {'input': sciezka, 'output': wyj, 'points': None, 'status': 'error',
+                                  'error': f'{type(blad).__name__}: {blad}', 'wall_s': None}
+    czas = time.perf_counter() - start
+
+    wpisy = [wpisy[sciezka] for sciezka in pliki]
+    bledy = [w for w in wpisy if w['status'] != 'ok']
+    liczba_punktow = sum(w['points'] for w in wpisy if w['status'] == 'ok')
+    manifest = {'operation': '+'.join(opcje.get('operacje') or [opcje['operacja']]), 'input': wzorzec,
+                'pool': pula, 'workers': workers, 'files': len(wpisy), 'ok': len(wpisy) - len(bledy),
+                'failed': len(bledy), 'points': liczba_punktow, 'wall_s': czas,
+                'points_per_s': liczba_punktow / czas if czas > 0 else None, 'entries': wpisy}
+    if sciezka_manifestu is None:
+        sciezka_manifestu = os.path.join(katalog_wyj or '', PLIK_MANIFESTU)
+    with open(sciezka_manifestu, 'w') as f:
+        json.dump(manifest, f, indent = 1)
+    return manifest
+
+
+def wczytaj_stacje(sciezka):
+    '''
+    Wczytuje plik stacji odniesienia: w każdej linii identyfikator stacji
+    i jej współrzędne geocentryczne x0, y0, z0 rozdzielone przecinkiem.
+    Puste linie i linie zaczynające się od '#' są pomijane.
+
+    Returns
+    -------
+    DICT
+        identyfikator stacji -> (x0, y0, z0)
+    '''
+    stacje = {}
+    with open(sciezka, 'r') as f:
+        for line in f:
             line = line.strip()
-            if input_format == 'dec_degrees':
-                phi_str, lam_str, h_str = line.split(',')
-                phi, lam, h = float(phi_str), float(lam_str), float(h_str)
-            elif input_format == 'dms':
-                phi_dms, lam_dms, h = line.split(',')
-                phi_l = phi_dms.split(':')
-                lam_l = lam_dms.split(":")
-                phi = float(phi_l[0]) + float(phi_l[1])/60 + float(phi_l[2])/3600
-                lam = float(lam_l[0]) + float(lam_l[1])/60 + float(lam_l[2])/3600
-                h = float(h)
+            if not line or line.startswith('#'):
+                continue
+            id_st, x0, y0, z0 = line.split(',')
+            try:
+                stacje[id_st.strip()] = (float(x0), float(y0), float(z0))
+            except ValueError:
+                raise ValueError("x0, y0, z0 must be floats.")
+    return stacje
+
+
+OPERACJE = ('xyz2plh', 'plh2xyz', 'pl21992', 'pl22000', 'xyz2neu', 'xyzGRS2KRA', 'xyzKRA2GRS') + OPERACJE_PL
+_STATUSY = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class _BladZapytania(Exception):
+    """Błąd zapytania do serwera - zwracany klientowi z podanym kodem HTTP."""
+    def __init__(self, komunikat, status = 400):
+        super().__init__(komunikat)
+        self.status = status
+
+
+class SerwerTransformacji:
+    """
+    Lokalny serwer HTTP (asyncio) udostępniający operacje klasy Transformacje
+    jako punkty końcowe przyjmujące tablice punktów. Obiekty Transformacje,
+    łańcuchy i macierze Helmerta budowane są raz i pozostają w pamięci między
+    zapytaniami. Zapytania tej samej operacji (z tymi samymi parametrami),
+    które nadejdą w ciągu okna czasowego, łączone są w jedną tablicę i
+    przeliczane jednym wywołaniem funkcji wsadowej - poza metodą warm, której
+    punkty kotwiczne muszą pochodzić z punktów tego samego zapytania, więc
+    zapytania porcji przeliczane są osobno. Przeliczenia wykonywane są kolejno
+    w wątku roboczym, więc pętla zdarzeń w tym czasie przyjmuje zapytania.
+
+        POST /<operacja>?model=...   - przeliczenie punktów:
+            application/json: {"points": [[..], ...], "model": ..., "x0": ..., "dms": ..., "method": ..., "tol": ...}
+            application/octet-stream: wartości float64 little-endian, po trzy na punkt,
+                parametry w adresie; wynik w tej samej postaci, liczba kolumn w nagłówku X-Columns
+        GET /                        - lista operacji i modeli
+        GET /stats                   - liczba zapytań, przeliczeń wsadowych i punktów
+    """
+    def __init__(self, okno = 0.002, maks_punktow = 65536):
+        """
+        Parameters
+        ----------
+        okno : FLOAT - optional, default 0.002
+            [s] - czas oczekiwania na kolejne zapytania łączone w jedną porcję
+        maks_punktow : INT - optional, default 65536
+            liczba punktów, po której porcja przeliczana jest bez czekania
+        """
+        self.okno = okno
+        self.maks_punktow = maks_punktow
+        self.statystyki = {'requests': 0, 'batches': 0, 'points': 0}
+        self._operacje = {}   # parametry operacji -> opis operacji (_przygotuj_operacje)
+        self._kolejki = {}    # parametry operacji -> [(blok, future), ...]
+        self._liczby = {}     # parametry operacji -> liczba punktów w kolejce
+        self._zegary = {}     # parametry operacji -> TimerHandle przeliczenia po upływie okna
+        self._wykonawca = None
+
+    def _operacja(self, klucz):
+        if klucz not in self._operacje:
+            self._operacje[klucz] = _przygotuj_operacje(dict(klucz))
+        return self._operacje[klucz]
+
+    async def przelicz(self, opcje, blok):
+        """
+        Dodaje blok punktów do kolejki operacji i zwraca jego wynik po przeliczeniu porcji.
+        """
+        klucz = tuple(sorted(opcje.items()))
+        self._operacja(klucz)
+        petla = asyncio.get_running_loop()
+        wynik = petla.create_future()
+        kolejka = self._kolejki.setdefault(klucz, [])
+        kolejka.append((blok, wynik))
+        self._liczby[klucz] = self._liczby.get(klucz, 0) + len(blok)
+        if self._liczby[klucz] >= self.maks_punktow:
+            self._wykonaj(klucz)
+        elif len(kolejka) == 1:
+            self._zegary[klucz] = petla.call_later(self.okno, self._wykonaj, klucz)
+        return await wynik
+
+    def _wykonaj(self, klucz):
+        """
+        Przekazuje porcję zapytań operacji do wątku roboczego (w pętli zdarzeń).
+        """
+        zegar = self._zegary.pop(klucz, None)
+        if zegar is not None:
+            zegar.cancel()        # porcja pełna (maks_punktow) przed upływem okna
+        kolejka = self._kolejki.pop(klucz, None)
+        self._liczby.pop(klucz, None)
+        if not kolejka:
+            return
+        self.statystyki['batches'] += 1
+        if self._wykonawca is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._wykonawca = ThreadPoolExecutor(max_workers = 1)
+        # przeliczenie (i budowa siatki przy pierwszym użyciu) poza pętlą zdarzeń
+        zadanie = asyncio.get_running_loop().run_in_executor(self._wykonawca, self._przelicz_porcje, klucz,
+                                                              [blok for blok, _ in kolejka])
+        zadanie.add_done_callback(lambda zadanie: self._rozdziel(kolejka, zadanie))
+
+    def _przelicz_porcje(self, klucz, bloki):
+        """
+        Przelicza bloki porcji (w wątku roboczym). Zwraca listę wyników kolejnych
+        bloków; w miejscu bloku, którego nie udało się przeliczyć - wyjątek.
+        """
+        operacja = self._operacja(klucz)
+        przelicz = operacja['przelicz']
+        if 'cieply_start' not in operacja:
+            try:
+                wynik = przelicz(np.concatenate(bloki))
+            except Exception:
+                pass
             else:
-                raise NotImplementedError(f'Invalid input format. Input format must be dec_degrees or dms.')
-            if model_elip == 'wgs84':
-                x, y = geo.pl21992(phi, lam)
-            elif model_elip == 'grs80':
-                x, y = grs.pl21992(phi, lam)
-            elif model_elip == 'krasowski':
-                x_kra, y_kra, z_kra = kras.plh2xyz(phi, lam, h)
-                x_grs, y_grs, z_grs = kras.xyzKRA2GRS(x_kra, y_kra, z_kra)
-                phi, lam, h = grs.xyz2plh(x_grs, y_grs, z_grs)
-                x, y = grs.pl21992(phi, lam)
-            coords_1992.append([x,y])
+                return np.split(wynik, np.cumsum([len(b) for b in bloki])[:-1])
+        # metoda warm (kotwice z punktów tego samego zapytania) albo błąd porcji -
+        # błąd jednego zapytania nie może trafić do pozostałych, każdy blok przeliczany jest osobno
+        wyniki = []
+        for blok in bloki:
+            _ustaw_cieply_start(operacja, 0)
+            try:
+                wyniki.append(przelicz(blok))
+            except ValueError as e:
+                wyniki.append(_BladZapytania(str(e)))
+            except Exception as e:
+                wyniki.append(e)
+        return wyniki
+
+    def _rozdziel(self, kolejka, zadanie):
+        """
+        Przekazuje wyniki porcji (lub wyjątki) zapytaniom z kolejki (w pętli zdarzeń).
+        """
+        if zadanie.cancelled():
+            return
+        wyniki = zadanie.result() if zadanie.exception() is None else [zadanie.exception()] * len(kolejka)
+        for (_, przyszly), wynik in zip(kolejka, wyniki):
+            if przyszly.done():
+                continue
+            if isinstance(wynik, BaseException):
+                przyszly.set_exception(wynik)
+            else:
+                przyszly.set_result(wynik)
+
+    def _opcje(self, operacja, parametry):
+        opcje = {'operacja': operacja}
+        if operacja not in ('xyzGRS2KRA', 'xyzKRA2GRS'):
+            model = str(parametry.get('model', '')).lower()
+            if model not in _ELIPSOIDY:
+                raise _BladZapytania(f'{model} - reference ellipsoid model not recognized.')
+            opcje['model'] = model
+        if operacja in ('xyz2plh',) + OPERACJE_PL:
+            opcje['dms'] = str(parametry.get('dms', '')).lower() in ('1', 'true')
+        if operacja in ('xyz2plh', 'pl21992', 'pl22000') + OPERACJE_PL:
+            opcje['metoda'] = parametry.get('method', 'hirvonen')
+            if opcje['metoda'] not in METODY_XYZ2PLH:
+                raise _BladZapytania(f"{opcje['metoda']} - xyz2plh method not implemented")
+            try:
+                opcje['tolerancja'] = float(parametry.get('tol', 0.000001)) / 206265
+            except (TypeError, ValueError):
+                raise _BladZapytania("tol must be a float.")
+            if not opcje['tolerancja'] >= 0:
+                raise _BladZapytania("tol must not be negative.")
+        if operacja in ('pl21992', 'pl22000'):
+            opcje['odwzorowanie'] = parametry.get('projection', 'exact')
+            if opcje['odwzorowanie'] not in METODY_ODWZOROWANIA:
+                raise _BladZapytania(f"{opcje['odwzorowanie']} - projection method not implemented")
+            try:
+                opcje['dokladnosc_siatki'] = float(parametry.get('grid_tol', DOKLADNOSC_SIATKI))
+            except (TypeError, ValueError):
+                raise _BladZapytania("grid_tol must be a float.")
+            if not opcje['dokladnosc_siatki'] > 0:
+                raise _BladZapytania("grid_tol must be positive.")
+        if operacja == 'xyz2neu':
+            try:
+                for nazwa in ('x0', 'y0', 'z0'):
+                    opcje[nazwa] = float(parametry[nazwa])
+            except (KeyError, TypeError, ValueError):
+                raise _BladZapytania("x0, y0, z0 must be floats.")
+        return opcje
+
+    async def _odpowiedz(self, metoda, cel, naglowki, cialo):
+        """
+        Obsługuje jedno zapytanie HTTP. Zwraca (status, typ treści, treść, dodatkowe nagłówki).
+        """
+        from urllib.parse import parse_qs
+        sciezka, _, zapytanie = cel.partition('?')
+        parametry = {k: v[-1] for k, v in parse_qs(zapytanie).items()}
+        sciezka = sciezka.strip('/')
+        if metoda == 'GET' and sciezka == '':
+            return 200, 'application/json', json.dumps({'operations': OPERACJE, 'models': list(_ELIPSOIDY)}).encode(), {}
+        if metoda == 'GET' and sciezka == 'stats':
+            return 200, 'application/json', json.dumps(self.statystyki).encode(), {}
+        if metoda != 'POST':
+            raise _BladZapytania(f'{metoda} - method not allowed', 405)
+        if sciezka not in OPERACJE:
+            raise _BladZapytania(f'{sciezka} - operation not recognized', 404)
+        binarne = naglowki.get('content-type', '').startswith('application/octet-stream')
+        if binarne:
+            if len(cialo) % 24:
+                raise _BladZapytania('body size is not a multiple of 3 float64 values')
+            blok = np.frombuffer(cialo, dtype = '<f8').reshape(-1, 3)
+        else:
+            try:
+                dane = json.loads(cialo or b'{}')
+                parametry.update({k: v for k, v in dane.items() if k != 'points'})
+            except (ValueError, AttributeError) as e:
+                raise _BladZapytania(f'invalid JSON request: {e}')
+            try:
+                blok = np.asarray(dane.get('points', []), dtype = float).reshape(-1, 3)
+            except (ValueError, TypeError):
+                raise _BladZapytania('points must be a list of [a, b, c] triples')
+        opcje = self._opcje(sciezka, parametry)
+        if binarne and opcje.get('dms'):
+            raise _BladZapytania('dms results cannot be returned in binary form')
+        self.statystyki['requests'] += 1
+        self.statystyki['points'] += len(blok)
+        wynik = await self.przelicz(opcje, blok) if len(blok) else np.empty((0, 3))
+        if binarne:
+            dane = np.ascontiguousarray(wynik, dtype = '<f8').tobytes()
+            return 200, 'application/octet-stream', dane, {'X-Columns': str(self._operacja(tuple(sorted(opcje.items())))['kolumny'])}
+        kolumny = [k.strip() for k in self._operacja(tuple(sorted(opcje.items())))['naglowek'].split(',')]
+        return 200, 'application/json', json.dumps({'columns': kolumny, 'result': wynik.tolist()}).encode(), {}
+
+    async def _obsluz_polaczenie(self, czytnik, pisarz):
+        """
+        Obsługuje połączenie HTTP/1.1 (z utrzymywaniem połączenia między zapytaniami).
+        """
+        try:
+            while True:
+                linia = await czytnik.readline()
+                if not linia.strip():
+                    break
+                naglowki = {}
+                while True:
+                    wiersz = await czytnik.readline()
+                    if wiersz in (b'\r\n', b'\n', b''):
+                        break
+                    nazwa, _, wartosc = wiersz.decode('latin-1').partition(':')
+                    naglowki[nazwa.strip().lower()] = wartosc.strip()
+                try:
+                    metoda, cel, wersja = linia.decode('latin-1').split()
+                    cialo = await czytnik.readexactly(int(naglowki.get('content-length', 0)))
+                    status, typ, tresc, dodatkowe = await self._odpowiedz(metoda, cel, naglowki, cialo)
+                except _BladZapytania as e:
+                    status, typ, tresc, dodatkowe = e.status, 'application/json', json.dumps({'error': str(e)}).encode(), {}
+                except ValueError as e:
+                    status, typ, tresc, dodatkowe = 400, 'application/json', json.dumps({'error': str(e)}).encode(), {}
+                    wersja = 'HTTP/1.0'
+                except Exception as e:
+                    status, typ, tresc, dodatkowe = 500, 'application/json', json.dumps({'error': str(e)}).encode(), {}
+                zamknij = wersja == 'HTTP/1.0' or naglowki.get('connection', '').lower() == 'close'
+                pola = [f'HTTP/1.1 {status} {_STATUSY[status]}', f'Content-Type: {typ}',
+                        f'Content-Length: {len(tresc)}', 'Connection: ' + ('close' if zamknij else 'keep-alive')]
+                pola += [f'{k}: {v}' for k, v in dodatkowe.items()]
+                pisarz.write(('\r\n'.join(pola) + '\r\n\r\n').encode('latin-1') + tresc)
+                await pisarz.drain()
+                if zamknij:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            pisarz.close()
+
+    async def serwuj(self, adres):
+        """
+        Uruchamia serwer pod adresem 'unix:/ścieżka/gniazda', 'host:port' lub 'port'
+        (domyślnie na 127.0.0.1) i obsługuje zapytania do przerwania programu.
+        """
+        if adres.startswith('unix:'):
+            sciezka = adres[len('unix:'):]
+            if os.path.exists(sciezka):
+                os.remove(sciezka)
+            serwer = await asyncio.start_unix_server(self._obsluz_polaczenie, path = sciezka)
+        else:
+            host, _, port = adres.rpartition(':')
+            serwer = await asyncio.start_server(self._obsluz_polaczenie, host or '127.0.0.1', int(port))
+        print(f'serving on {adres}', file = sys.stderr)
+        async with serwer:
+            await serwer.serve_forever()
+
+
+def uruchom_serwer(adres, okno = 0.002):
+    '''
+    Uruchamia SerwerTransformacji pod podanym adresem (patrz SerwerTransformacji.serwuj).
+    '''
+    try:
+        asyncio.run(SerwerTransformacji(okno = okno).serwuj(adres))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if adres.startswith('unix:') and os.path.exists(adres[len('unix:'):]):
+            os.remove(adres[len('unix:'):])
+
+
+def _wartosc_flagi(flaga, domyslna = None):
+    '''
+    Zwraca wartość podaną w wierszu poleceń bezpośrednio po fladze (lub domyślną).
+    '''
+    if flaga not in sys.argv:
+        return domyslna
+    return sys.argv[sys.argv.index(flaga) + 1]
+
+
+if __name__ == "__main__":
+    output_path = _wartosc_flagi('--output')
+    # przy wyniku na standardowym wyjściu komunikaty trafiają na standardowe wyjście błędów
+    print(sys.argv, file = sys.stderr if output_path == '-' else sys.stdout)
+    input_file_path = sys.argv[-1]
+    
+    header_lines = int(_wartosc_flagi('--header_lines', 0))
+    workers = int(_wartosc_flagi('--workers', 1))
+    in_format = _wartosc_flagi('--in-format', 'txt')
+    out_format = _wartosc_flagi('--out-format', 'txt')
+    for format_pliku in (in_format, out_format):
+        if format_pliku not in ('txt',) + FORMATY_BINARNE:
+            raise NotImplementedError(f'{format_pliku} - file format not recognized, expected txt, npy or f64.')
         
-        with open('result_pl21992.txt','w+') as f:
-            f. write('x[m], y[m] \n')
-            for coords in coords_1992:
-                coords_1992_line = ','.join([f'{coord:.3f}' for coord in coords])
-                f.write(coords_1992_line + '\n')
-                
-
-    elif '--pl22000' in sys.argv:
-        input_format = input("Enter input format (dec_degrees/dms): ")
-        with open(input_file_path, 'r') as f:
-        	lines = f.readlines()
-        	lines = lines[header_lines:]
+    if '--registry' in sys.argv:
+        # plik JSON z dodatkowymi elipsoidami i transformacjami układów odniesienia;
+        # przez zmienną środowiskową rejestr trafia też do procesów roboczych
+        os.environ['SKRYPT_REGISTRY'] = os.path.abspath(_wartosc_flagi('--registry'))
+        wczytaj_rejestr(os.environ['SKRYPT_REGISTRY'])
+    model_elip = None
+    if '--model' in sys.argv:
+        model_inp = _wartosc_flagi('--model')
+        model_elip = model_inp.lower()
+        if model_elip not in _ELIPSOIDY:
+            raise NotImplementedError(f'{model_elip} - reference ellipsoid  model not recognized.')
             
-        coords_2000 = []
-        for line in lines: 
-            line = line.strip()
-            if input_format == 'dec_degrees':
-                phi_str, lam_str, h_str = line.split(',')
-                phi, lam, h = float(phi_str), float(lam_str), float(h_str)
-            elif input_format == 'dms':
-                phi_dms, lam_dms, h = line.split(',')
-                phi_l = phi_dms.split(':')
-                lam_l = lam_dms.split(":")
-                phi = float(phi_l[0]) + float(phi_l[1])/60 + float(phi_l[2])/3600
-                lam = float(lam_l[0]) + float(lam_l[1])/60 + float(lam_l[2])/3600
-                h = float(h)
-            else:
+    
+    if '--flags' in sys.argv:  #displays all callable flags
+        print('\n --xyz2plh \n --plh2xyz \n --pl21992 \n --pl22000 \n --pl19922plh \n --pl20002plh \n --xyz2neu \n --xyzGRS2KRA \n --xyzKRA2GRS \n --header_lines \n --model \n --dms \n --workers \n --stations \n --in-format \n --out-format \n --profile \n --input-format \n --output \n --serve \n --coalesce-ms \n --method \n --tol \n --one-file \n --batch \n --pool \n --manifest \n --projection \n --grid-tol \n --grid-cache \n --passthrough \n --registry \n --incremental') 
+    
+    opcje = {'model': model_elip, 'dms': '--dms' in sys.argv, 'input_format': 'dec_degrees',
+             'in_format': in_format, 'out_format': out_format, 'profile': '--profile' in sys.argv,
+             'metoda': _wartosc_flagi('--method', 'hirvonen'),
+             'tolerancja': float(_wartosc_flagi('--tol', 0.000001)) / 206265}
+    if opcje['metoda'] not in METODY_XYZ2PLH:
+        raise NotImplementedError(f"{opcje['metoda']} - xyz2plh method not implemented")
+    if not opcje['tolerancja'] >= 0:
+        raise ValueError('--tol must not be negative')
+    opcje['odwzorowanie'] = _wartosc_flagi('--projection', 'exact')
+    opcje['dokladnosc_siatki'] = float(_wartosc_flagi('--grid-tol', DOKLADNOSC_SIATKI))
+    if not opcje['dokladnosc_siatki'] > 0:
+        raise ValueError('--grid-tol must be positive')
+    if opcje['odwzorowanie'] not in METODY_ODWZOROWANIA:
+        raise NotImplementedError(f"{opcje['odwzorowanie']} - projection method not implemented")
+    if '--grid-cache' in sys.argv:
+        # przez zmienną środowiskową katalog siatek trafia też do procesów roboczych
+        os.environ['SKRYPT_GRID_CACHE'] = _wartosc_flagi('--grid-cache')
+    # kilka flag operacji - jeden odczyt pliku i wspólne wyniki pośrednie
+    opcje['operacje'] = [operacja for operacja in OPERACJE if '--' + operacja in sys.argv]
+    opcje['jeden_plik'] = '--one-file' in sys.argv
+    opcje['przyrostowo'] = '--incremental' in sys.argv
+    if '--passthrough' in sys.argv:
+        # N[:M] - N początkowych i M końcowych kolumn tekstowych przepisywanych do wyniku
+        przed, _, po = _wartosc_flagi('--passthrough').partition(':')
+        opcje['przenoszone'] = (int(przed or 0), int(po or 0))
+        if min(opcje['przenoszone']) < 0:
+            raise ValueError('--passthrough expects N or N:M with non-negative integers')
+    if opcje['operacje']:
+        opcje['operacja'] = opcje['operacje'][0]
+    
+    if '--serve' in sys.argv:
+        uruchom_serwer(_wartosc_flagi('--serve'), okno = float(_wartosc_flagi('--coalesce-ms', 2)) / 1000)
+
+    elif '--xyz2plh' in sys.argv and '--plh2xyz' in sys.argv:
+        print('Możesz podać tylko jedną flagę.')
+        
+    elif 'operacja' in opcje:
+        if not any(operacja in OPERACJE_XYZ + OPERACJE_PL for operacja in opcje['operacje']) and in_format == 'txt':
+            if '--input-format' in sys.argv:
+                opcje['input_format'] = _wartosc_flagi('--input-format')
+            elif input_file_path != '-':
+                # przy wyniku na standardowym wyjściu pytanie trafia na standardowe wyjście błędów
+                pytanie = "Enter input format (dec_degrees/dms): "
+                if output_path == '-':
+                    print(pytanie, end = '', file = sys.stderr, flush = True)
+                    pytanie = ''
+                opcje['input_format'] = input(pytanie)
+            if opcje['input_format'] not in ('dec_degrees', 'dms'):
                 raise NotImplementedError(f'Invalid input format. Input format must be dec_degrees or dms.')
-            if model_elip == 'wgs84':
-                x, y = geo.pl22000(phi, lam)
-            elif model_elip == 'grs80':
-                x, y = grs.pl22000(phi, lam)
-            elif model_elip == 'krasowski':
-                x_kra, y_kra, z_kra = kras.plh2xyz(phi, lam, h)
-                x_grs, y_grs, z_grs = kras.xyzKRA2GRS(x_kra, y_kra, z_kra)
-                phi, lam, h = grs.xyz2plh(x_grs, y_grs, z_grs)
-                x, y = grs.pl22000(phi, lam)
-            coords_2000.append([x,y])
+        if 'xyz2neu' in opcje['operacje'] and '--stations' in sys.argv:
+            opcje['stacje'] = wczytaj_stacje(_wartosc_flagi('--stations'))
+        elif 'xyz2neu' in opcje['operacje']:
+            x0, y0, z0 = sys.argv[-4:-1]
+            try:
+                opcje['x0'] = float(x0)
+                opcje['y0'] = float(y0)
+                opcje['z0'] = float(z0)
+            except ValueError:
+                raise ValueError("x0, y0, z0 must be floats.")
         
-        with open('result_pl22000.txt','w+') as f:
-            f. write('x[m], y[m] \n')
-            for coords in coords_2000:
-                coords_2000_line = ','.join([f'{coord:11.3f}' for coord in coords])
-                f.write(coords_2000_line + '\n')
-                
-                
-    elif '--xyz2neu' in sys.argv:
-        x0, y0, z0 = sys.argv[-4:-1]
-        try:
-            x0 = float(x0)
-            y0 = float(y0)
-            z0 = float(z0)
-        except ValueError:
-            raise ValueError("x0, y0, z0 must be floats.")
-
-        with open(input_file_path, 'r') as f:
-            lines = f.readlines()
-            lines = lines[header_lines:]
-
-        coords_neu = []
-        for line in lines: 
-            line = line.strip()
-            x, y, z = line.split(',')
-            x, y, z = float(x), float(y), float(z)
-            if model_elip == 'wgs84':
-                n, e, u = geo.xyz2neu(x, y, z, x0, y0, z0)
-            elif model_elip == 'grs80':
-                n, e, u = grs.xyz2neu(x, y, z, x0, y0, z0)
-            elif model_elip == 'krasowski':
-                n, e, u = kras.xyz2neu(x, y, z, x0, y0, z0)
-            coords_neu.append([n, e, u])
-
-        with open('result_xyz2neu.txt', 'w+') as f:
-            f.write('n[m], e[m], u[m] \n')
-            for coords in coords_neu:
-                coords_neu_line = ','.join([f'{coord:.3f}' for coord in coords])
-                f.write(coords_neu_line + '\n')
+        if '--batch' in sys.argv:
+            # plik wejściowy to katalog lub wzorzec glob, --workers - liczba plików przeliczanych jednocześnie
+            manifest = przetworz_wsad(opcje, input_file_path, header_lines,
+                                      int(_wartosc_flagi('--workers', os.cpu_count() or 1)), output_path,
+                                      _wartosc_flagi('--pool', 'process'), _wartosc_flagi('--manifest'))
+            print(f"{manifest['files']} files, {manifest['ok']} ok, {manifest['failed']} failed, "
+                  f"{manifest['points']} points, {manifest['wall_s']:.2f} s")
+            for wpis in manifest['entries']:
+                if wpis['status'] != 'ok':
+                    print(f"{wpis['input']}: {wpis['error']}", file = sys.stderr)
+            if manifest['failed']:
+                sys.exit(1)
+        else:
+            przetworz_plik(opcje, input_file_path, header_lines, workers, output_path)
@@ -0,0 +1,98 @@
+"""
+Testy metody warm - wynik nie zależy od podziału pliku na porcje, procesy
+(--workers) ani od trybu przyrostowego (--incremental).
+
+Uruchomienie:
+    python -m unittest discover tests
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+KATALOG_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KATALOG_REPO)
+from skrypt import KROK_CIEPLEGO_STARTU, ROZMIAR_BLOKU, StanCieplegoStartu, elipsoida
+
+SKRYPT = os.path.join(KATALOG_REPO, 'skrypt.py')
+
+
+def _punkty_xyz(n, ziarno = 0):
+    rng = np.random.default_rng(ziarno)
+    phi = rng.uniform(-80, 80, n)
+    lam = rng.uniform(-180, 180, n)
+    h = rng.uniform(-100, 5000, n)
+    return elipsoida('grs80').plh2xyz_batch(phi, lam, h)
+
+
+class TestPorcji(unittest.TestCase):
+
+    def test_porcje_ze_stanem_jak_calosc(self):
+        grs = elipsoida('grs80')
+        xyz = _punkty_xyz(5000)
+        calosc = np.column_stack(grs.xyz2plh_batch(xyz, metoda = 'warm'))
+        stan = StanCieplegoStartu()
+        granice = [0, 1, 100, 777, 3001, 3002, 5000]
+        porcje = [np.column_stack(grs.xyz2plh_batch(xyz[a:b], metoda = 'warm', stan = stan))
+                  for a, b in zip(granice[:-1], granice[1:])]
+        np.testing.assert_array_equal(np.concatenate(porcje), calosc)
+        self.assertEqual(stan.wiersz, len(xyz))
+
+
+class TestPlikow(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # więcej punktów niż ROZMIAR_BLOKU, puste linie i liczba punktów niepodzielna przez KROK_CIEPLEGO_STARTU
+        cls.katalog = tempfile.mkdtemp()
+        linie = ['%.4f,%.4f,%.4f\n' % tuple(p) for p in _punkty_xyz(ROZMIAR_BLOKU + 20011, ziarno = 1)]
+        linie.insert(30000, '\n')
+        linie.insert(90001, '   \n')
+        cls.linie = linie
+        cls.dane = os.path.join(cls.katalog, 'dane.txt')
+        with open(cls.dane, 'w') as f:
+            f.writelines(linie)
+        cls.wzor = cls._uruchom('wzor.txt', cls.dane)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.katalog)
+
+    @classmethod
+    def _uruchom(cls, nazwa, wejscie, *flagi):
+        wynik = os.path.join(cls.katalog, nazwa)
+        subprocess.run([sys.executable, SKRYPT, '--xyz2plh', '--model', 'grs80', '--method', 'warm',
+                        '--output', wynik, *flagi, wejscie], check = True, stdout = subprocess.DEVNULL)
+        with open(wynik, 'rb') as f:
+            return f.read()
+
+    def test_workers(self):
+        for workers in (2, 3):
+            with self.subTest(workers = workers):
+                self.assertEqual(self._uruchom(f'workers{workers}.txt', self.dane, '--workers', str(workers)),
+                                 self.wzor)
+
+    def test_przyrostowo(self):
+        wejscie = os.path.join(self.katalog, 'przyrost.txt')
+        podzial = 3 * KROK_CIEPLEGO_STARTU * 331 + 17
+        for flagi in ((), ('--workers', '3')):
+            with self.subTest(flagi = flagi):
+                with open(wejscie, 'w') as f:
+                    f.writelines(self.linie[:podzial])
+                self._uruchom('przyrost_wynik.txt', wejscie, '--incremental', *flagi)
+                with open(wejscie, 'a') as f:
+                    f.writelines(self.linie[podzial:])
+                self.assertEqual(self._uruchom('przyrost_wynik.txt', wejscie, '--incremental', *flagi), self.wzor)
+                punkt_kontrolny = os.path.join(self.katalog, 'przyrost_wynik.txt.checkpoint.json')
+                with open(punkt_kontrolny) as f:
+                    self.assertEqual(json.load(f)['mode'], 'append')
+                os.remove(punkt_kontrolny)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Testy dokładności xyz2plh - błąd maksymalny metod xyz2plh_batch względem
+punktów wzorcowych i ograniczenie liczby iteracji wersji skalarnej.
+
+Uruchomienie:
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import skrypt
+from skrypt import METODY_XYZ2PLH, elipsoida
+
+PUNKTY = 4000
+# błąd maksymalny [mm]: (phi przy |h| <= 10 km, phi przy h <= 1000 km, h poza otoczeniem biegunów) - patrz README
+BLEDY_MM = {'hirvonen': (0.001, 0.001, 0.1),
+            'warm': (0.001, 0.001, 0.1),
+            'bowring': (0.001, 10, 0.001),
+            'vermeille': (0.0001, 0.0001, 0.0001)}
+
+
+def _punkty_plh(n, h_min, h_max, ziarno = 0):
+    rng = np.random.default_rng(ziarno)
+    phi = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    phi[:3] = [0.0, 89.9999999, -89.9999999]
+    return phi, rng.uniform(-180, 180, n), rng.uniform(h_min, h_max, n)
+
+
+class TestMetodXyz2plh(unittest.TestCase):
+
+    def test_bledy_metod(self):
+        grs = elipsoida('grs80')
+        for i, (h_min, h_max) in enumerate(((-1e4, 1e4), (-1e3, 1e6))):
+            phi, lam, h = _punkty_plh(PUNKTY, h_min, h_max, ziarno = i)
+            xyz = grs.plh2xyz_batch(phi, lam, h)
+            bieguny = np.abs(phi) > 89.9
+            for metoda in METODY_XYZ2PLH:
+                with self.subTest(metoda = metoda, h_max = h_max):
+                    phi_m, lam_m, h_m = grs.xyz2plh_batch(xyz, metoda = metoda)
+                    blad_phi = np.abs(np.radians(phi_m - phi)) * (grs.a + np.abs(h)) * 1000
+                    blad_lam = np.abs(np.radians((lam_m - lam + 180) % 360 - 180)) * grs.a * 1000
+                    blad_h = np.abs(h_m - h)[~bieguny] * 1000
+                    self.assertLess(blad_phi.max(), BLEDY_MM[metoda][i])
+                    self.assertLess(blad_lam.max(), 0.0001)
+                    self.assertLess(blad_h.max(), BLEDY_MM[metoda][2])
+
+    def test_warm_i_phi0_jak_hirvonen(self):
+        grs = elipsoida('grs80')
+        xyz = grs.plh2xyz_batch(*_punkty_plh(PUNKTY, -1e4, 1e4))
+        hirvonen = grs.xyz2plh_batch(xyz)
+        for opcje in ({'metoda': 'warm'}, {'phi0': 52.0}):
+            with self.subTest(**opcje):
+                phi, lam, h = grs.xyz2plh_batch(xyz, **opcje)
+                # 1e-10 stopnia to ok. 0.01 mm
+                np.testing.assert_allclose(phi, hirvonen[0], rtol = 0, atol = 1e-10)
+                np.testing.assert_array_equal(lam, hirvonen[1])
+                np.testing.assert_allclose(h, hirvonen[2], rtol = 0, atol = 1e-5)
+
+
+class TestSkalarnegoXyz2plh(unittest.TestCase):
+
+    def test_jak_wersja_wsadowa(self):
+        grs = elipsoida('grs80')
+        phi, lam, h = _punkty_plh(200, -1e4, 1e4)
+        xyz = grs.plh2xyz_batch(phi, lam, h)
+        wsadowo = np.column_stack(grs.xyz2plh_batch(xyz))
+        skalarnie = np.array([grs.xyz2plh(*punkt) for punkt in xyz])
+        np.testing.assert_allclose(skalarnie[:, :2], wsadowo[:, :2], rtol = 0, atol = 1e-12)
+        np.testing.assert_allclose(skalarnie[:, 2], wsadowo[:, 2], rtol = 0, atol = 1e-6)
+
+    def test_limit_iteracji(self):
+        # przy ujemnej tolerancji warunek zbieżności nigdy nie jest spełniony - pętlę kończy limit iteracji
+        grs = elipsoida('grs80')
+        punkt = grs.plh2xyz(52.1, 21.0, 100.0)
+        zbiezny = grs.xyz2plh(*punkt)
+        sin = skrypt.sin
+        wywolania = []
+
+        def licz_sin(x):
+            wywolania.append(x)
+            return sin(x)
+
+        with mock.patch.object(skrypt, 'TOLERANCJA_HIRVONENA', -1.0), mock.patch.object(skrypt, 'sin', licz_sin):
+            wynik = grs.xyz2plh(*punkt)
+        # w każdej iteracji jeden sin, po pętli - jeszcze jeden
+        self.assertEqual(len(wywolania), skrypt.MAKS_ITERACJI_HIRVONENA + 1)
+        for wartosc, oczekiwana, dokladnosc in zip(wynik, zbiezny, (1e-12, 1e-12, 1e-6)):
+            self.assertAlmostEqual(wartosc, oczekiwana, delta = dokladnosc)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Testy odwzorowań odwrotnych pl19922plh i pl20002plh - przeliczenie tam
+i z powrotem przez układy 1992 i 2000, także dla pojedynczych punktów.
+
+Uruchomienie:
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from skrypt import elipsoida
+
+PUNKTY = 4000
+DOPUSZCZALNY_MM = 0.01
+# obszar Polski z zapasem 1 stopnia długości na krańcach układu 1992
+PHI = (49.0, 54.9)
+LAM = (13.1, 25.2)
+
+
+def _blad_mm(elip, phi, lam, phi_o, lam_o):
+    return np.hypot(np.radians(phi_o - phi) * elip.a,
+                    np.radians(lam_o - lam) * elip.a * np.cos(np.radians(phi))) * 1000
+
+
+class TestOdwzorowanOdwrotnych(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.phi = rng.uniform(*PHI, PUNKTY)
+        self.lam = rng.uniform(*LAM, PUNKTY)
+
+    def _odwzorowania(self, elip):
+        return (('pl1992', elip.pl21992_batch, elip.pl19922plh_batch, elip.pl19922plh),
+                ('pl2000', elip.pl22000_batch, elip.pl20002plh_batch, elip.pl20002plh))
+
+    def test_tam_i_z_powrotem(self):
+        for model in ('wgs84', 'grs80', 'krasowski'):
+            elip = elipsoida(model)
+            for uklad, odwzoruj, odwrotne, _ in self._odwzorowania(elip):
+                with self.subTest(uklad = uklad, model = model):
+                    phi_o, lam_o = odwrotne(*odwzoruj(self.phi, self.lam))
+                    self.assertEqual(phi_o.shape, self.phi.shape)
+                    self.assertLess(_blad_mm(elip, self.phi, self.lam, phi_o, lam_o).max(), DOPUSZCZALNY_MM)
+
+    def test_pojedynczy_punkt(self):
+        elip = elipsoida('grs80')
+        for uklad, odwzoruj, odwrotne, odwrotne_skalarne in self._odwzorowania(elip):
+            x, y = odwzoruj(self.phi[:20], self.lam[:20])
+            phi_o, lam_o = odwrotne(x, y)
+            for i in range(20):
+                with self.subTest(uklad = uklad, punkt = i):
+                    phi_s, lam_s = odwrotne(float(x[i]), float(y[i]))
+                    self.assertEqual(np.shape(phi_s), ())
+                    self.assertEqual(np.shape(lam_s), ())
+                    # skalar i tablica mogą różnić się o ostatni bit (inna ścieżka obliczeń NumPy)
+                    self.assertAlmostEqual(float(phi_s), phi_o[i], delta = 1e-12)
+                    self.assertAlmostEqual(float(lam_s), lam_o[i], delta = 1e-12)
+                    phi_m, lam_m = odwrotne_skalarne(float(x[i]), float(y[i]))
+                    self.assertLess(_blad_mm(elip, self.phi[i], self.lam[i], phi_m, lam_m), DOPUSZCZALNY_MM)
+
+
+if __name__ == '__main__':
+    unittest.main()
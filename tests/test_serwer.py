@@ -0,0 +1,132 @@
+"""
+Testy serwera (SerwerTransformacji) - izolacja zapytań łączonych w jedną porcję,
+zegar okna i przeliczanie poza pętlą zdarzeń.
+
+Uruchomienie:
+    python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from skrypt import SerwerTransformacji, _BladZapytania, elipsoida
+
+
+class TestIzolacjiZapytan(unittest.TestCase):
+
+    def _przelicz_razem(self, serwer, opcje, bloki):
+        async def razem():
+            return await asyncio.gather(*(serwer.przelicz(opcje, np.array(b, dtype = float)) for b in bloki),
+                                        return_exceptions = True)
+        return asyncio.run(razem())
+
+    def test_bledne_zapytanie_nie_psuje_poprawnego(self):
+        serwer = SerwerTransformacji(okno = 0.05)
+        opcje = {'operacja': 'pl20002plh', 'model': 'grs80'}
+        zle, dobre = self._przelicz_razem(serwer, opcje, [[[1, 2, 3]], [[5770000, 7500000, 100]]])
+        self.assertEqual(serwer.statystyki['batches'], 1)
+        self.assertIsInstance(zle, _BladZapytania)
+        self.assertEqual(zle.status, 400)
+        self.assertIsInstance(dobre, np.ndarray)
+        oczekiwany = serwer._operacja(tuple(sorted(opcje.items())))['przelicz'](np.array([[5770000, 7500000, 100.0]]))
+        np.testing.assert_array_equal(dobre, oczekiwany)
+
+    def test_nieoczekiwany_blad_nie_jest_bledem_zapytania(self):
+        serwer = SerwerTransformacji(okno = 0.05)
+        opcje = {'operacja': 'pl20002plh', 'model': 'grs80'}
+        klucz = tuple(sorted(opcje.items()))
+        operacja = dict(serwer._operacja(klucz))
+        przelicz = operacja['przelicz']
+
+        def awaria(punkty):
+            if (punkty[:, 0] < 0).any():
+                raise RuntimeError('internal failure')
+            return przelicz(punkty)
+
+        operacja['przelicz'] = awaria
+        serwer._operacje[klucz] = operacja
+        zle, dobre = self._przelicz_razem(serwer, opcje, [[[-1, 7500000, 0]], [[5770000, 7500000, 100]]])
+        self.assertIsInstance(zle, RuntimeError)
+        self.assertNotIsInstance(zle, _BladZapytania)
+        self.assertIsInstance(dobre, np.ndarray)
+
+    def test_warm_bez_kotwic_innych_zapytan(self):
+        rng = np.random.default_rng(0)
+        xyz = elipsoida('grs80').plh2xyz_batch(rng.uniform(-80, 80, 300), rng.uniform(-180, 180, 300),
+                                               rng.uniform(0, 3000, 300))
+        bloki = [xyz[:100], xyz[100:]]
+        opcje = {'operacja': 'xyz2plh', 'model': 'grs80', 'metoda': 'warm'}
+        razem = self._przelicz_razem(SerwerTransformacji(okno = 0.05), opcje, bloki)
+        for blok, wynik in zip(bloki, razem):
+            osobno = self._przelicz_razem(SerwerTransformacji(okno = 0), opcje, [blok])[0]
+            np.testing.assert_array_equal(wynik, osobno)
+            np.testing.assert_array_equal(wynik, np.column_stack(elipsoida('grs80').xyz2plh_batch(blok, metoda = 'warm')))
+
+
+class TestWykonania(unittest.TestCase):
+
+    def test_pelna_porcja_anuluje_zegar(self):
+        serwer = SerwerTransformacji(okno = 60, maks_punktow = 2)
+        opcje = {'operacja': 'pl20002plh', 'model': 'grs80'}
+        klucz = tuple(sorted(opcje.items()))
+        punkt = np.array([[5770000, 7500000, 100.0]])
+
+        async def dwa_zapytania():
+            pierwsze = asyncio.ensure_future(serwer.przelicz(opcje, punkt))
+            await asyncio.sleep(0)
+            zegar = serwer._zegary[klucz]
+            await asyncio.gather(pierwsze, serwer.przelicz(opcje, punkt))
+            return zegar
+
+        zegar = asyncio.run(dwa_zapytania())
+        self.assertTrue(zegar.cancelled())
+        self.assertNotIn(klucz, serwer._zegary)
+        self.assertEqual(serwer.statystyki['batches'], 1)
+
+    def test_przeliczenie_poza_petla_zdarzen(self):
+        serwer = SerwerTransformacji(okno = 0)
+        opcje = {'operacja': 'pl20002plh', 'model': 'grs80'}
+        klucz = tuple(sorted(opcje.items()))
+        operacja = dict(serwer._operacja(klucz))
+        przelicz = operacja['przelicz']
+        watki = []
+
+        def zapisz_watek(punkty):
+            watki.append(threading.get_ident())
+            return przelicz(punkty)
+
+        operacja['przelicz'] = zapisz_watek
+        serwer._operacje[klucz] = operacja
+
+        async def zapytanie():
+            return threading.get_ident(), await serwer.przelicz(opcje, np.array([[5770000, 7500000, 100.0]]))
+
+        watek_petli, wynik = asyncio.run(zapytanie())
+        self.assertEqual(len(watki), 1)
+        self.assertNotEqual(watki[0], watek_petli)
+        self.assertEqual(wynik.shape, (1, 3))
+
+
+class TestParametrow(unittest.TestCase):
+
+    def test_zerowa_tolerancja_nie_jest_domyslna(self):
+        serwer = SerwerTransformacji()
+        opcje = serwer._opcje('xyz2plh', {'model': 'grs80', 'tol': '0'})
+        self.assertEqual(opcje['tolerancja'], 0)
+        punkty = np.array([[3664940.5, 1409153.6, 5009571.2], [3500000.0, 1500000.0, 5100000.0]])
+        wynik = asyncio.run(serwer.przelicz(opcje, punkty))
+        np.testing.assert_array_equal(wynik, np.column_stack(elipsoida('grs80').xyz2plh_batch(punkty, tolerancja = 0)))
+
+    def test_ujemna_tolerancja(self):
+        with self.assertRaises(_BladZapytania) as blad:
+            SerwerTransformacji()._opcje('xyz2plh', {'model': 'grs80', 'tol': '-1'})
+        self.assertEqual(blad.exception.status, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
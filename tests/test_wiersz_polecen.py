@@ -0,0 +1,31 @@
+"""
+Testy wiersza poleceń - wynik na standardowym wyjściu (--output -) nie zawiera
+komunikatów ani pytań.
+
+Uruchomienie:
+    python -m unittest discover tests
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SKRYPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skrypt.py')
+
+
+class TestStandardowegoWyjscia(unittest.TestCase):
+
+    def test_pytanie_o_format_na_stderr(self):
+        with tempfile.TemporaryDirectory() as katalog:
+            wejscie = os.path.join(katalog, 'plh.txt')
+            with open(wejscie, 'w') as f:
+                f.write('52.1,21.0,100\n')
+            wynik = subprocess.run([sys.executable, SKRYPT, '--plh2xyz', '--model', 'grs80', '--output', '-', wejscie],
+                                   input = 'dec_degrees\n', capture_output = True, text = True, check = True)
+        self.assertEqual(wynik.stdout, 'x[m], y[m], z[m] \n3665468.151,1407041.395,5009724.959\n')
+        self.assertIn('Enter input format', wynik.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()